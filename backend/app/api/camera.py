@@ -1,14 +1,25 @@
 """
 API de Cámara - Endpoints optimizados
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, WebSocket
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from app.services.camera_service import CameraService
+from app.services.camera_registry import CameraRegistry
+from app.services.capture_channel import CaptureChannel
+from app.services.capture_daemon import CaptureDaemon
+from app.services.live_stream import BOUNDARY, LiveStreamHub
 from app.config import get_photo_url
+from app.api.settings import load_settings
 from app.schemas.camera import (
     CaptureRequest,
     CaptureResponse,
+    BurstCaptureRequest,
+    BurstCaptureResponse,
     CameraListResponse,
-    CameraTestResponse
+    CameraTestResponse,
+    CaptureDaemonStartRequest,
+    CaptureDaemonStatus,
 )
 
 router = APIRouter(prefix="/api/camera", tags=["camera"])
@@ -18,12 +29,15 @@ router = APIRouter(prefix="/api/camera", tags=["camera"])
 async def capture_photo(request: CaptureRequest):
     """
     Captura una foto de la cámara.
-    Optimizado: Abre/captura/cierra inmediatamente.
+    Optimizado: Abre/captura/cierra inmediatamente, o toma el frame del
+    daemon de captura si está corriendo.
     """
     try:
-        session_id, filepath = CameraService.capture_photo(
+        session_id, filepath = await run_in_threadpool(
+            CameraService.capture_photo,
             camera_id=request.camera_id,
-            session_id=request.session_id
+            session_id=request.session_id,
+            trigger_ts=request.trigger_ts,
         )
         
         # Convertir path absoluto a URL usando función centralizada (DRY principle)
@@ -42,16 +56,51 @@ async def capture_photo(request: CaptureRequest):
         )
 
 
+@router.post("/burst", response_model=BurstCaptureResponse)
+async def capture_burst(request: BurstCaptureRequest):
+    """
+    Captura N fotos con una sola apertura de la cámara.
+    Responde cuando los originales están en disco; thumbnails y sesión (una
+    sola actualización) se completan en segundo plano.
+    """
+    try:
+        count = request.count or load_settings().photos_to_take
+        session_id, filepaths = await run_in_threadpool(
+            CameraService.capture_burst,
+            camera_id=request.camera_id,
+            session_id=request.session_id,
+            count=count,
+            interval_s=request.interval_s,
+            warmup_frames=request.warmup_frames,
+        )
+
+        return BurstCaptureResponse(
+            success=True,
+            session_id=session_id,
+            file_paths=[get_photo_url(path) for path in filepaths],
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al capturar ráfaga: {str(e)}"
+        )
+
+
 @router.post("/upload", response_model=CaptureResponse)
 async def upload_photo(
     file: UploadFile = File(...),
     session_id: str | None = Form(None),
 ):
-    """Recibe una foto capturada por el renderer y la guarda como parte de una sesión."""
+    """Recibe una foto capturada por el renderer y la guarda como parte de una sesión.
+
+    Se copia por bloques desde el archivo temporal del multipart (sin cargar
+    la foto completa en memoria).
+    """
     try:
-        contents = await file.read()
-        session_value, filepath = CameraService.save_uploaded_bytes(
-            contents,
+        session_value, filepath = await run_in_threadpool(
+            CameraService.save_uploaded_stream,
+            file.file,
             session_id=session_id,
         )
 
@@ -70,17 +119,35 @@ async def upload_photo(
         )
 
 
+@router.websocket("/ws")
+async def capture_channel(websocket: WebSocket):
+    """
+    Canal binario persistente para las fotos del renderer (alternativa a /upload).
+    Frames: [uint32 largo header][header JSON {session_id, shot_index}][JPEG].
+    Responde un ack JSON por shot al quedar persistido; admite varios en vuelo.
+    """
+    await CaptureChannel.serve(websocket)
+
+
+@router.get("/ws/status")
+async def capture_channel_status():
+    """Conexiones y shots persistidos por el canal WebSocket."""
+    return CaptureChannel.stats()
+
+
 @router.get("/list", response_model=CameraListResponse)
-async def list_cameras():
+async def list_cameras(refresh: bool = False):
     """
-    Lista cámaras disponibles.
+    Lista cámaras disponibles (registro en memoria; ``refresh`` fuerza re-enumerar).
     """
     try:
-        cameras = CameraService.get_available_cameras()
+        devices = await run_in_threadpool(CameraRegistry.devices, refresh)
+        cameras = [device.index for device in devices]
         
         return CameraListResponse(
             available_cameras=cameras,
-            default_camera=cameras[0] if cameras else 0
+            default_camera=cameras[0] if cameras else 0,
+            devices=devices,
         )
     
     except Exception as e:
@@ -109,3 +176,50 @@ async def test_camera(camera_id: int):
             status_code=500,
             detail=f"Error al probar cámara: {str(e)}"
         )
+
+
+@router.post("/daemon/start", response_model=CaptureDaemonStatus)
+async def start_capture_daemon(request: CaptureDaemonStartRequest):
+    """
+    Mantiene la cámara abierta con un ring buffer de frames.
+    Las capturas siguientes no pagan apertura ni calentamiento.
+    """
+    # Puede esperar al lector anterior y abre la cámara: fuera del event loop
+    await run_in_threadpool(CaptureDaemon.start, request.camera_id, idle_timeout_s=request.idle_timeout_s)
+    return CaptureDaemonStatus(**CaptureDaemon.status())
+
+
+@router.post("/daemon/stop", response_model=CaptureDaemonStatus)
+async def stop_capture_daemon():
+    """Libera la cámara y vuelve al modo de captura única."""
+    await run_in_threadpool(CaptureDaemon.stop)
+    return CaptureDaemonStatus(**CaptureDaemon.status())
+
+
+@router.get("/daemon/status", response_model=CaptureDaemonStatus)
+async def capture_daemon_status():
+    """Estado del daemon de captura."""
+    return CaptureDaemonStatus(**CaptureDaemon.status())
+
+
+@router.get("/stream")
+async def live_stream(camera_id: int = 0):
+    """
+    Live view MJPEG (multipart/x-mixed-replace) para segunda pantalla/tablet.
+    Un solo hilo de captura y un solo encode por frame, compartido por todos
+    los clientes. Desactivado por defecto (PHOTOBOOTH_LIVE_STREAM=1).
+    """
+    if not LiveStreamHub.ENABLED:
+        raise HTTPException(status_code=404, detail="Live view desactivado en este backend")
+
+    return StreamingResponse(
+        LiveStreamHub.stream(camera_id),
+        media_type=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@router.get("/stream/status")
+async def live_stream_status():
+    """Clientes conectados y costo de encode del live view."""
+    return LiveStreamHub.stats()
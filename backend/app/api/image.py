@@ -3,16 +3,22 @@ API de Imágenes - Endpoints optimizados
 """
 from pathlib import Path
 import json
-import shutil
 import time
 import traceback
 from uuid import uuid4
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Body
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
+from starlette.concurrency import run_in_threadpool
 from app.services.image_service import ImageService
 from app.services.image_jobs import ImageJobQueueService
+from app.services.compose_cache import ComposeResultCache
+from app.services.photo_pipeline import PhotoPipeline
+from app.services.color_management import ColorManagement
+from app.services.encode_profiles import EncodeProfiles
+from app.services.layout_plan import print_target_size
+from app.api.settings import load_settings
 from app.schemas.image import ComposeStripRequest, ComposeStripResponse, ComposeJobResult
-from app.config import DATA_DIR, TEMP_DIR, RESOURCE_LIMITS
+from app.config import DATA_DIR, TEMP_DIR, RESOURCE_LIMITS, IMAGE_CONFIG, PHOTO_PIPELINE_CONFIG
 
 router = APIRouter(prefix="/api/image", tags=["image"])
 
@@ -92,10 +98,54 @@ def _cleanup_temp_dir() -> None:
                 pass
 
 
+# Campos que no cambian los píxeles del strip (o que se resuelven aparte)
+_CACHE_EXCLUDED_FIELDS = {
+    "photo_paths",
+    "design_path",
+    "session_id",
+    "print_mode",
+    "quality",
+    "preview_scale",
+    "inline",
+    "preview_format",
+}
+
+
+def _compose_cache_params(request: ComposeStripRequest) -> dict:
+    """Parámetros de composición normalizados para la clave del cache."""
+    params = request.model_dump(exclude=_CACHE_EXCLUDED_FIELDS)
+    params["design_stretch"] = bool(params.get("design_stretch"))
+    # Otro perfil de codificación produce otros bytes
+    params["encode_profiles"] = EncodeProfiles.resolved()
+    return params
+
+
+def _compose_cache_inputs(photo_paths: list[Path], design_path: Path | None) -> list[Path]:
+    inputs = list(photo_paths)
+    if design_path is not None and design_path.exists():
+        inputs.append(design_path)
+    return inputs
+
+
+def _resolve_print_target(settings, is_dual_strip: bool) -> tuple[tuple[int, int], int] | None:
+    """(tamaño del strip, dpi) si Settings pide render a resolución de impresora."""
+    if settings is None or settings.render_target != "print":
+        return None
+    strips_per_page = 2 if is_dual_strip else 1
+    return print_target_size(settings.paper_size, settings.printer_dpi, strips_per_page), settings.printer_dpi
+
+
 def _compose_strip_core(request: ComposeStripRequest) -> ComposeStripResponse:
     """Core composition logic reused by sync and job endpoints."""
     photo_paths, design_path = _resolve_photo_and_design_paths(request)
 
+    # Capturas recién subidas: esperar thumbnails/registro pendientes de la sesión
+    # (set_strip no debe adelantarse a append_photos)
+    if request.session_id and not PhotoPipeline.flush(
+        request.session_id, timeout=PHOTO_PIPELINE_CONFIG["flush_timeout_s"]
+    ):
+        print(f"⚠️ Escrituras de fotos pendientes para {request.session_id}; componiendo igual")
+
     for photo_path in photo_paths:
         if not photo_path.exists():
             raise HTTPException(
@@ -106,31 +156,74 @@ def _compose_strip_core(request: ComposeStripRequest) -> ComposeStripResponse:
     if design_path:
         print(f"🎨 Usando diseño: {design_path}")
 
+    is_dual_strip = request.print_mode == "dual-strip"
+    full_page_path = None
+
     try:
-        strip_path = ImageService.compose_strip(
-            photo_paths=photo_paths,
-            design_path=design_path,
-            session_id=request.session_id,
-            layout=request.layout,
-            design_position=request.design_position,
-            background_color=request.background_color,
-            photo_spacing=request.photo_spacing,
-            photo_filter=request.photo_filter,
-            overlay_mode=request.overlay_mode,
-            design_scale=request.design_scale,
-            design_offset_x=request.design_offset_x,
-            design_offset_y=request.design_offset_y,
-            design_stretch=bool(request.design_stretch) if request.design_stretch is not None else False,
-            photo_aspect_ratio=request.photo_aspect_ratio,
-        )
+        settings = load_settings()
+    except Exception as exc:
+        print(f"⚠️ No se pudo leer settings para compose-strip: {exc}")
+        settings = None
+
+    # Render a resolución de impresora (Settings.render_target = "print")
+    print_target = _resolve_print_target(settings, is_dual_strip)
+    target_size, target_dpi = print_target if print_target else (None, None)
+    # Conversión ICC a la impresora por defecto (Settings.printer_icc_profiles)
+    color = ColorManagement.resolve(settings) if settings is not None else None
+
+    # Cache direccionado por contenido: misma petición + mismos archivos
+    cache_params = _compose_cache_params(request)
+    cache_inputs = _compose_cache_inputs(photo_paths, design_path)
+    if print_target:
+        cache_params["print_target"] = [*target_size, target_dpi]
+    if color:
+        cache_params["color"] = color
+        cache_inputs.append(Path(color["output_profile"]))  # mtime del ICC
+    cache_key = ComposeResultCache.make_key(cache_params, cache_inputs)
+
+    try:
+        cached_strip = ComposeResultCache.lookup(cache_key, "strip.jpg")
+        if cached_strip is not None:
+            strip_path = ImageService.restore_strip(cached_strip, request.session_id)
+        else:
+            strip_path = ImageService.compose_strip(
+                photo_paths=photo_paths,
+                design_path=design_path,
+                session_id=request.session_id,
+                layout=request.layout,
+                design_position=request.design_position,
+                background_color=request.background_color,
+                photo_spacing=request.photo_spacing,
+                photo_filter=request.photo_filter,
+                overlay_mode=request.overlay_mode,
+                design_scale=request.design_scale,
+                design_offset_x=request.design_offset_x,
+                design_offset_y=request.design_offset_y,
+                design_stretch=bool(request.design_stretch) if request.design_stretch is not None else False,
+                photo_aspect_ratio=request.photo_aspect_ratio,
+                dual_strip=is_dual_strip,
+                target_size=target_size,
+                target_dpi=target_dpi,
+                color=color,
+            )
+            ComposeResultCache.store(cache_key, "strip.jpg", strip_path)
+            if is_dual_strip:
+                full_page_path = ImageService.full_page_output_path(strip_path)
+                ComposeResultCache.store(cache_key, "full_strip.jpg", full_page_path)
     except Exception as compose_err:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"compose_strip failed: {compose_err}")
 
-    full_page_path = None
-    if request.print_mode == "dual-strip":
+    if is_dual_strip and full_page_path is None:
         try:
-            full_page_path = ImageService.create_duplicate_strip(strip_path)
+            cached_full = ComposeResultCache.lookup(cache_key, "full_strip.jpg")
+            if cached_full is not None:
+                full_page_path = ComposeResultCache.copy_atomic(
+                    cached_full, ImageService.full_page_output_path(strip_path)
+                )
+            else:
+                full_page_path = ImageService.create_duplicate_strip(strip_path)
+                ComposeResultCache.store(cache_key, "full_strip.jpg", full_page_path)
         except Exception as dup_err:
             print(f"⚠️ Error al crear full_strip: {dup_err}")
             full_page_path = None
@@ -174,7 +267,8 @@ async def compose_strip(request: ComposeStripRequest):
     Optimizado para bajo consumo de memoria.
     """
     try:
-        return _compose_strip_core(request)
+        # La composición corre en el pool de procesos; no bloquear el event loop
+        return await run_in_threadpool(_compose_strip_core, request)
     except HTTPException:
         raise
     except Exception as e:
@@ -185,6 +279,15 @@ async def compose_strip(request: ComposeStripRequest):
         )
 
 
+def _resolve_preview_scale(request: ComposeStripRequest) -> float | None:
+    """Escala de render del preview: explícita, default de borrador o None (impresión)."""
+    if request.preview_scale is not None:
+        return request.preview_scale
+    if request.quality == "draft":
+        return IMAGE_CONFIG["preview_draft_scale"]
+    return None
+
+
 @router.post("/preview-strip")
 async def preview_strip(
     request: ComposeStripRequest | None = Body(None),
@@ -202,9 +305,18 @@ async def preview_strip(
     overlay_mode: str | None = Form(None),
     design_stretch: bool | None = Form(None),
     photo_aspect_ratio: str | None = Form(None),
+    quality: str | None = Form(None),
+    preview_scale: float | None = Form(None),
+    inline: bool | None = Form(None),
+    preview_format: str | None = Form(None),
 ):
     """Genera un preview temporal del strip y devuelve la ruta servible (/data/...).
 
+    Con ``quality="draft"`` (o ``preview_scale``) se compone a menor resolución
+    con la misma geometría, para que los sliders del editor respondan rápido.
+    Con ``inline=true`` la imagen (JPEG o WebP según ``preview_format``) se
+    devuelve directamente en el cuerpo de la respuesta, sin pasar por disco.
+
     Si se envía ``design_file`` (multipart), se usa ese archivo temporalmente.
     También aplica una limpieza ligera de ``TEMP_DIR`` basada en ``RESOURCE_LIMITS``
     para evitar crecimiento descontrolado de archivos temporales.
@@ -245,6 +357,14 @@ async def preview_strip(
                 payload["design_stretch"] = bool(design_stretch)
         if photo_aspect_ratio is not None:
             payload["photo_aspect_ratio"] = photo_aspect_ratio
+        if quality:
+            payload["quality"] = quality
+        if preview_scale is not None:
+            payload["preview_scale"] = preview_scale
+        if inline is not None:
+            payload["inline"] = inline
+        if preview_format:
+            payload["preview_format"] = preview_format.lower()
 
         # Asegurar que vengan photo_paths válidas
         if not payload.get("photo_paths"):
@@ -284,19 +404,7 @@ async def preview_strip(
             else:
                 design_path = Path(request_obj.design_path)
         
-        # Generar preview en carpeta temporal con nombre único para evitar colisiones
-        # Cuando se generaban varias tiras casi al mismo tiempo, todas usaban
-        # el mismo nombre basado solo en segundos, y el último preview pisaba a los demás.
-        timestamp_ms = int(time.time() * 1000)
-        unique_suffix = uuid4().hex[:8]
-        preview_filename = f"preview_{timestamp_ms}_{unique_suffix}.jpg"
-        preview_path = TEMP_DIR / preview_filename
-        
-        # Componer strip (sin crear duplicate) con metadatos del template
-        strip_path = ImageService.compose_strip(
-            photo_paths=photo_paths,
-            design_path=design_path,
-            session_id="preview",  # Carpeta temporal
+        template_options = dict(
             layout=request_obj.layout,
             design_position=request_obj.design_position,
             background_color=request_obj.background_color,
@@ -308,16 +416,66 @@ async def preview_strip(
             design_offset_y=request_obj.design_offset_y,
             design_stretch=bool(request_obj.design_stretch) if request_obj.design_stretch is not None else False,
             photo_aspect_ratio=request_obj.photo_aspect_ratio,
+            preview_scale=_resolve_preview_scale(request_obj),
         )
+
+        # Previews repetidos con los mismos parámetros salen del cache. Los
+        # diseños subidos en la petición son temporales: nunca se repiten.
+        preview_key = None
+        if not design_file:
+            preview_key = ComposeResultCache.make_key(
+                _compose_cache_params(request_obj),
+                _compose_cache_inputs(photo_paths, design_path),
+            )
+        preview_variant = f"preview_{template_options['preview_scale'] or 1}"
+
+        if request_obj.inline:
+            # Preview en memoria: sin archivos en photos/ ni en TEMP_DIR
+            image_format = (request_obj.preview_format or "jpeg").upper()
+            artifact = f"{preview_variant}.{image_format.lower()}"
+            content = ComposeResultCache.lookup_preview(preview_key, artifact)
+            if content is None:
+                try:
+                    content = await run_in_threadpool(
+                        ImageService.render_preview_bytes,
+                        photo_paths=photo_paths,
+                        design_path=design_path,
+                        image_format=image_format,
+                        **template_options,
+                    )
+                finally:
+                    if design_file and design_path is not None:
+                        design_path.unlink(missing_ok=True)
+                ComposeResultCache.store_preview(preview_key, artifact, content)
+
+            return Response(
+                content=content,
+                media_type=f"image/{image_format.lower()}",
+                headers={"Cache-Control": "no-store"},
+            )
+
+        # Generar preview en carpeta temporal con nombre único para evitar colisiones
+        # Cuando se generaban varias tiras casi al mismo tiempo, todas usaban
+        # el mismo nombre basado solo en segundos, y el último preview pisaba a los demás.
+        timestamp_ms = int(time.time() * 1000)
+        unique_suffix = uuid4().hex[:8]
+        preview_filename = f"preview_{timestamp_ms}_{unique_suffix}.jpg"
+        preview_path = TEMP_DIR / preview_filename
         
-        # Mover a temp
-        shutil.move(str(strip_path), str(preview_path))
-        
-        # Limpiar carpeta preview
-        preview_dir = strip_path.parent
-        if preview_dir.exists() and preview_dir.name == "preview":
-            shutil.rmtree(preview_dir)
-        
+        content = ComposeResultCache.lookup_preview(preview_key, f"{preview_variant}.jpg")
+        if content is None:
+            # Cada petición compone en memoria y escribe solo su propio archivo:
+            # previews concurrentes (threadpool + pool de procesos) no comparten
+            # carpeta de salida
+            content = await run_in_threadpool(
+                ImageService.render_preview_bytes,
+                photo_paths=photo_paths,
+                design_path=design_path,
+                **template_options,
+            )
+            ComposeResultCache.store_preview(preview_key, f"{preview_variant}.jpg", content)
+        preview_path.write_bytes(content)
+
         preview_relative = "/" + str(preview_path.relative_to(DATA_DIR.parent))
 
         # Limpieza ligera después de generar el preview
@@ -334,6 +492,12 @@ async def preview_strip(
         )
 
 
+@router.get("/cache/stats")
+async def compose_cache_stats():
+    """Contadores del cache de composición (hits, misses, bytes, evictions)."""
+    return ComposeResultCache.stats()
+
+
 @router.post("/design-preview-upload")
 async def design_preview_upload(file: UploadFile = File(...)):
     """Sube un diseño temporal para previews y devuelve su ruta servible (/data/...).
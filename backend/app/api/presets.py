@@ -245,6 +245,7 @@ async def create_preset(preset_data: PresetCreate):
         voice_pitch=preset_data.voice_pitch,
         voice_volume=preset_data.voice_volume,
         photo_filter=preset_data.photo_filter or "none",
+        encode_profiles=preset_data.encode_profiles,
         design_id=preset_data.design_id,
         design_name=design_name,
         design_path=design_path,
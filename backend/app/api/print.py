@@ -70,9 +70,17 @@ async def queue_print(request: PrintRequest):
         if settings.print_mode == "dual-strip" and not is_already_full_strip:
             from app.services.image_service import ImageService
             try:
-                # Generar composición 4x6 con dos tiras
-                print(f"✂️ Generando dual-strip para: {file_path.name}")
-                final_path = ImageService.create_duplicate_strip(file_path)
+                full_page_path = ImageService.full_page_output_path(file_path)
+                if (
+                    full_page_path.exists()
+                    and full_page_path.stat().st_mtime_ns >= file_path.stat().st_mtime_ns
+                ):
+                    # compose-strip ya generó la página en la misma pasada
+                    final_path = full_page_path
+                else:
+                    # Generar composición 4x6 con dos tiras
+                    print(f"✂️ Generando dual-strip para: {file_path.name}")
+                    final_path = ImageService.create_duplicate_strip(file_path)
             except Exception as e:
                 print(f"⚠️ Error generando dual-strip, imprimiendo original: {e}")
                 # Fallback al original si falla la duplicación
@@ -18,6 +18,7 @@ from PIL import Image
 
 from app.config import DESIGNS_DIR, DATA_DIR
 from app.services.print_service import PrintService
+from app.services.encode_profiles import EncodeProfiles
 from app.models.template import (
     Template,
     TemplateCreate,
@@ -410,7 +411,13 @@ async def upload_template_design(
             scale = min(max_width / img.width, max_height / img.height)
             new_size = (int(img.width * scale), int(img.height * scale))
             img_resized = img.resize(new_size, Image.Resampling.LANCZOS)
-            img_resized.save(file_path, quality=95)
+            if file_path.suffix.lower() in (".jpg", ".jpeg"):
+                img_resized.save(
+                    file_path,
+                    **EncodeProfiles.save_kwargs(EncodeProfiles.for_artifact("design")),
+                )
+            else:
+                img_resized.save(file_path, quality=95)
             print(f"ℹ️  Design resized from {img.size} to {new_size}")
             img_resized.close()
 
@@ -29,6 +29,45 @@ CAMERA_CONFIG = {
     "height": 720,
     "fps": 30,
     "buffer_size": 1,  # Buffer mínimo para reducir RAM
+    # device | synthetic[:WxH][@FPS] | file:<video> (ver frame_sources.py)
+    "source": os.getenv("PHOTOBOOTH_CAMERA_SOURCE", "device"),
+}
+
+# Registro de cámaras en memoria (ver camera_registry.py)
+CAMERA_REGISTRY_CONFIG = {
+    "ttl_s": float(os.getenv("PHOTOBOOTH_CAMERA_REGISTRY_TTL", "300")),  # Además se refresca si cambia /dev
+    "probe_indices": 3,  # Índices a sondear con OpenCV fuera de Linux
+}
+
+# Daemon de captura (cámara abierta + ring buffer, ver capture_daemon.py)
+CAPTURE_DAEMON_CONFIG = {
+    "autostart": os.getenv("PHOTOBOOTH_CAPTURE_DAEMON", "0") == "1",  # Off: captura única de bajo consumo
+    "ring_size": int(os.getenv("PHOTOBOOTH_CAPTURE_RING_SIZE", "4")),  # Frames en memoria (~2.7 MB c/u a 720p)
+    "idle_timeout_s": float(os.getenv("PHOTOBOOTH_CAPTURE_IDLE_TIMEOUT", "300")),  # 0 = sin timeout
+}
+
+# Persistencia de fotos: original durable en la petición, thumbnail + sesión en
+# writers de fondo (ver photo_pipeline.py)
+PHOTO_PIPELINE_CONFIG = {
+    "enabled": os.getenv("PHOTOBOOTH_PHOTO_PIPELINE", "1") != "0",
+    "workers": int(os.getenv("PHOTOBOOTH_PHOTO_WRITERS", "2")),  # Shards por sesión
+    "queue_size": 16,  # Tareas en cola por writer antes de aplicar backpressure
+    "fsync": os.getenv("PHOTOBOOTH_PHOTO_FSYNC", "1") != "0",
+    "flush_timeout_s": 10.0,  # Espera máxima de compose-strip por escrituras pendientes
+}
+
+# Live view MJPEG (/api/camera/stream, ver live_stream.py). Opcional: abre la
+# cámara desde el backend, así que solo si el renderer no la está usando.
+LIVE_STREAM_CONFIG = {
+    "enabled": os.getenv("PHOTOBOOTH_LIVE_STREAM", "0") == "1",
+    "fps": float(os.getenv("PHOTOBOOTH_LIVE_STREAM_FPS", "15")),
+    "width": int(os.getenv("PHOTOBOOTH_LIVE_STREAM_WIDTH", "640")),  # Se reduce antes del encode único
+    "quality": 70,
+}
+
+# Canal WebSocket de capturas (/api/camera/ws, ver capture_channel.py)
+CAPTURE_CHANNEL_CONFIG = {
+    "max_in_flight": 8,  # Shots recibidos sin ack por conexión antes de dejar de leer el socket
 }
 
 # Configuración de imágenes (optimizada)
@@ -40,6 +79,66 @@ IMAGE_CONFIG = {
     "quality": 90,  # Buena calidad pero no máxima
     "dpi": (300, 300),
     "format": "JPEG",  # JPEG es más ligero que PNG
+    "resize_reducing_gap": 3.0,  # Reducción entera previa a LANCZOS (None = desactivado)
+    # Cache LRU de overlays de diseño decodificados + redimensionados
+    "design_cache_entries": 8,
+    "design_cache_max_pixels": 8_000_000,  # ~32 MB en RAM (RGB = 4 bytes/px en PIL)
+    # Decodificación paralela de fotos dentro de un strip (<= 1 = secuencial)
+    "photo_decode_threads": int(os.getenv("PHOTOBOOTH_DECODE_THREADS", str(min(4, os.cpu_count() or 1)))),
+    "photo_decode_max_inflight": int(os.getenv("PHOTOBOOTH_DECODE_MAX_INFLIGHT", "3")),  # Tope de decodificaciones simultáneas
+    # Previews borrador (editor de templates): escala de render
+    "preview_draft_scale": 0.5,
+    # Canvas desde este tamaño se respaldan en un archivo mapeado (memoria acotada)
+    "mapped_canvas_min_pixels": int(os.getenv("PHOTOBOOTH_MAPPED_CANVAS_MIN_PIXELS", "2500000")),
+}
+
+# Perfiles de codificación JPEG (ver app/services/encode_profiles.py)
+# - print: artefactos que van a la impresora (igual que el encoder histórico)
+# - screen: se muestran en pantalla/galería
+# - preview: previews descartables, lo más rápido posible
+# - archive: originales que se conservan (diseños de templates)
+ENCODE_PROFILES = {
+    "print": {"quality": 90, "subsampling": "4:2:0", "optimize": True, "progressive": False, "dpi": (300, 300)},
+    "screen": {"quality": 85, "subsampling": "4:2:0", "optimize": False, "progressive": False},
+    "preview": {"quality": 75, "subsampling": "4:2:0", "optimize": False, "progressive": False},
+    "archive": {"quality": 95, "subsampling": "4:4:4", "optimize": True, "progressive": False, "dpi": (300, 300)},
+}
+
+# Perfil por tipo de artefacto (un preset puede sobrescribirlo con encode_profiles)
+ARTIFACT_ENCODE_PROFILES = {
+    "strip": "print",
+    "full_strip": "print",
+    "preview": "screen",
+    "draft_preview": "preview",
+    "design": "archive",
+}
+
+# Executor de composición en procesos (0 workers = componer inline)
+COMPOSE_EXECUTOR_CONFIG = {
+    "workers": int(os.getenv("PHOTOBOOTH_COMPOSE_WORKERS", "2")),
+    "max_tasks_per_child": int(os.getenv("PHOTOBOOTH_COMPOSE_MAX_TASKS", "50")),
+}
+
+# Cache de resultados de composición (STRIPS_DIR/cache)
+COMPOSE_CACHE_CONFIG = {
+    "enabled": os.getenv("PHOTOBOOTH_COMPOSE_CACHE", "1") != "0",
+    "max_mb": int(os.getenv("PHOTOBOOTH_COMPOSE_CACHE_MB", "512")),
+    # Previews (borrador/inline) solo en memoria: cambian con cada slider
+    "preview_memory_mb": int(os.getenv("PHOTOBOOTH_PREVIEW_CACHE_MB", "32")),
+}
+
+# Conversión de color ICC al final de la composición (ver color_management.py)
+COLOR_MANAGEMENT_CONFIG = {
+    "enabled": os.getenv("PHOTOBOOTH_COLOR_MANAGEMENT", "1") != "0",
+    "transform_cache_entries": 8,  # Transforms littleCMS compilados por proceso
+}
+
+# Tamaños de papel (pulgadas, ancho x alto en vertical) para render a
+# resolución de impresora (Settings.render_target = "print")
+PAPER_SIZES_INCHES = {
+    "2x6": (2, 6),
+    "4x6": (4, 6),
+    "5x7": (5, 7),
 }
 
 # Configuración de API
@@ -53,6 +152,7 @@ API_CONFIG = {
 # Límites de recursos
 RESOURCE_LIMITS = {
     "max_photo_size_mb": 10,  # Máximo tamaño de foto
+    "upload_chunk_bytes": 256 * 1024,  # Copia de uploads por bloques (memoria acotada)
     "max_temp_files": 100,  # Limpiar temp si excede
     "cleanup_after_hours": 24,  # Limpiar archivos temp viejos
 }
@@ -35,6 +35,10 @@ async def lifespan(app: FastAPI):
     from app.logging_config import logger
     from app.services.print_queue import PrintQueueService
     from app.services.image_jobs import ImageJobQueueService
+    from app.services.compose_executor import ComposeExecutor
+    from app.services.capture_daemon import CaptureDaemon
+    from app.services.photo_pipeline import PhotoPipeline
+    from app.config import CAMERA_CONFIG, CAPTURE_DAEMON_CONFIG
     from app.services.demo_assets import ensure_demo_photos
 
     logger.info("🚀 PhotoBooth API iniciando...")
@@ -46,6 +50,10 @@ async def lifespan(app: FastAPI):
         PrintQueueService.cleanup_old_jobs()
     except Exception:
         logger.warning("No se pudo limpiar print_jobs al iniciar")
+    try:
+        ComposeExecutor.start()
+    except Exception:
+        logger.warning("No se pudo iniciar el pool de composición")
     try:
         ImageJobQueueService.cleanup_old_jobs()
         ImageJobQueueService.start_worker()
@@ -55,11 +63,19 @@ async def lifespan(app: FastAPI):
         ensure_demo_photos()
     except Exception:
         logger.warning("No se pudieron generar fotos demo")
+    if CAPTURE_DAEMON_CONFIG["autostart"]:
+        try:
+            CaptureDaemon.start(CAMERA_CONFIG["default_id"])
+        except Exception:
+            logger.warning("No se pudo iniciar el daemon de captura")
     
     yield
     
     # Shutdown
     print("👋 PhotoBooth API cerrando...")
+    CaptureDaemon.stop()
+    PhotoPipeline.shutdown()
+    ComposeExecutor.shutdown()
     gc.collect()  # Limpiar memoria al cerrar
 
 
@@ -193,6 +209,22 @@ async def full_health(include_camera: bool = False):
             "message": f"Error al detectar impresoras: {exc}",
         }
 
+    # Cache de composición (hits/misses para diagnóstico)
+    try:
+        from app.services.compose_cache import ComposeResultCache
+
+        result["compose_cache"] = ComposeResultCache.stats()
+    except Exception as exc:
+        result["compose_cache"] = {"error": f"Error al leer cache de composición: {exc}"}
+
+    # Pipeline de persistencia de fotos (escrituras pendientes)
+    try:
+        from app.services.photo_pipeline import PhotoPipeline
+
+        result["photo_pipeline"] = PhotoPipeline.stats()
+    except Exception as exc:
+        result["photo_pipeline"] = {"error": f"Error al leer pipeline de fotos: {exc}"}
+
     # Estado de cola de impresión
     try:
         PrintQueueService.cleanup_old_jobs()
@@ -220,7 +252,11 @@ async def full_health(include_camera: bool = False):
 
 
 if __name__ == "__main__":
+    import multiprocessing
     import uvicorn
+
+    # Necesario para el pool de composición (spawn) en el ejecutable congelado
+    multiprocessing.freeze_support()
     
     # Ejecutar servidor optimizado
     uvicorn.run(
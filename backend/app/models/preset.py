@@ -3,7 +3,7 @@ Modelo de datos para Presets/Eventos
 Permite guardar configuraciones completas para diferentes tipos de eventos
 """
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 from pydantic import BaseModel, Field
 
 
@@ -31,6 +31,10 @@ class EventPreset(BaseModel):
     voice_pitch: float = Field(default=1.0, ge=0.5, le=2.0, description="Tono de voz")
     voice_volume: float = Field(default=1.0, ge=0.0, le=1.0, description="Volumen de voz")
     photo_filter: str = Field(default="none", description="Filtro de fotos: none, bw, sepia, glam")
+    encode_profiles: Optional[Dict[str, str]] = Field(
+        None,
+        description="Perfil de codificación por artefacto (ej: {'strip': 'archive', 'preview': 'preview'})"
+    )
     
     # Template asociado
     template_id: Optional[str] = Field(None, description="ID del template asociado")
@@ -71,6 +75,7 @@ class PresetCreate(BaseModel):
     template_id: Optional[str] = None  # New: reference to template
     design_id: Optional[str] = None  # Deprecated: keep for backward compatibility
     photo_filter: Optional[str] = None
+    encode_profiles: Optional[Dict[str, str]] = None
     notes: Optional[str] = None
     client_name: Optional[str] = None
     client_contact: Optional[str] = None
@@ -91,6 +96,7 @@ class PresetUpdate(BaseModel):
     template_id: Optional[str] = None  # New: reference to template
     design_id: Optional[str] = None  # Deprecated: keep for backward compatibility
     photo_filter: Optional[str] = None
+    encode_profiles: Optional[Dict[str, str]] = None
     notes: Optional[str] = None
     client_name: Optional[str] = None
     client_contact: Optional[str] = None
@@ -7,6 +7,24 @@ from pydantic import BaseModel, Field
 class CaptureRequest(BaseModel):
     camera_id: int = Field(default=0, ge=0, le=10)
     session_id: str | None = None
+    # Instante del disparo (epoch en segundos); con el daemon activo se usa el
+    # frame más cercano. None = momento en que llega la petición.
+    trigger_ts: float | None = None
+
+
+class BurstCaptureRequest(BaseModel):
+    camera_id: int = Field(default=0, ge=0, le=10)
+    session_id: str | None = None
+    count: int | None = Field(default=None, ge=1, le=6, description="None = photos_to_take de settings")
+    interval_s: float = Field(default=0.0, ge=0, le=15, description="Segundos entre fotos")
+    warmup_frames: int = Field(default=3, ge=0, le=30)
+
+
+class BurstCaptureResponse(BaseModel):
+    success: bool
+    session_id: str
+    file_paths: list[str]
+    message: str = "Ráfaga capturada exitosamente"
 
 
 class CaptureResponse(BaseModel):
@@ -16,12 +34,38 @@ class CaptureResponse(BaseModel):
     message: str = "Foto capturada exitosamente"
 
 
+class CameraDevice(BaseModel):
+    index: int
+    path: str  # /dev/videoN en Linux; índice OpenCV en otros sistemas
+    name: str
+    formats: dict[str, list[str]] = Field(default_factory=dict)  # fourcc -> ["1280x720", ...]
+
+
 class CameraListResponse(BaseModel):
     available_cameras: list[int]
     default_camera: int
+    devices: list[CameraDevice] = Field(default_factory=list)
 
 
 class CameraTestResponse(BaseModel):
     camera_id: int
     available: bool
     message: str
+
+
+class CaptureDaemonStartRequest(BaseModel):
+    camera_id: int = Field(default=0, ge=0, le=10)
+    idle_timeout_s: float | None = Field(default=None, ge=0, description="0 = sin timeout; None = config")
+
+
+class CaptureDaemonStatus(BaseModel):
+    running: bool
+    camera_id: int | None = None
+    ring_size: int
+    buffered_frames: int
+    latest_frame_age_ms: int | None = None
+    idle_timeout_s: float
+    frames_read: int
+    captures: int
+    started_at: float | None = None
+    last_error: str | None = None
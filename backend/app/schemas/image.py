@@ -1,7 +1,7 @@
 """
 Schemas de imágenes
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Literal
 
 
@@ -28,6 +28,13 @@ class ComposeStripRequest(BaseModel):
     overlay_mode: str | None = None  # "free" | "footer"
     design_stretch: bool | None = None
 
+    # Solo preview: "draft" compone a baja resolución (preview_scale o el default)
+    quality: Literal["print", "draft"] | None = None
+    preview_scale: float | None = Field(default=None, gt=0, le=1)
+    # Solo preview: devolver los bytes de la imagen en la respuesta (sin archivo)
+    inline: bool | None = None
+    preview_format: Literal["jpeg", "webp"] | None = None
+
 
 class ComposeStripResponse(BaseModel):
     success: bool
@@ -18,6 +18,7 @@ class SessionPhoto(BaseModel):
     url: str
     thumbnail_url: str | None = None
     captured_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+    photo_index: int | None = None
 
 
 class SessionPrintJob(BaseModel):
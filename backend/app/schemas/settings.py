@@ -2,7 +2,7 @@
 Settings Schemas
 Pydantic models for photobooth configuration
 """
-from typing import Optional, Literal
+from typing import Dict, Optional, Literal
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -32,6 +32,19 @@ class Settings(BaseModel):
         description="Print mode: single strip or dual strips side-by-side"
     )
     paper_size: Literal["2x6", "4x6", "5x7"] = Field(default="4x6", description="Target paper size for printing")
+    render_target: Literal["screen", "print"] = Field(
+        default="screen",
+        description="screen: fixed strip geometry scaled by the driver; print: compose at the exact paper pixel size"
+    )
+    printer_dpi: int = Field(default=300, ge=150, le=600, description="Printer resolution used by render_target=print")
+    printer_icc_profiles: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Printer name -> ICC profile path (relative to the data dir); \"*\" applies to any printer"
+    )
+    icc_rendering_intent: Literal["perceptual", "relative_colorimetric", "saturation", "absolute_colorimetric"] = Field(
+        default="perceptual",
+        description="Rendering intent for the sRGB -> printer profile conversion"
+    )
     photo_spacing: int = Field(default=20, ge=0, le=100, description="Spacing between photos in pixels")
     strip_width: int = Field(default=600, ge=400, le=800, description="Strip width in pixels")
     strip_height: int = Field(default=1800, ge=1200, le=2400, description="Strip height in pixels")
@@ -41,6 +54,10 @@ class Settings(BaseModel):
     print_copies: int = Field(default=2, ge=1, le=6, description="Number of copies to print by default")
     camera_width: int = Field(default=1280, ge=640, le=1920, description="Camera capture width")
     camera_height: int = Field(default=720, ge=480, le=1080, description="Camera capture height")
+    camera_capture_mode: Literal["decoded", "mjpeg"] = Field(
+        default="decoded",
+        description="decoded: BGR frame re-encoded to JPEG; mjpeg: write the camera's MJPG bytes as-is (falls back to decoded)"
+    )
 
     @field_validator('backend_url')
     @classmethod
@@ -68,6 +85,10 @@ class SettingsUpdate(BaseModel):
     strip_layout: Optional[Literal["vertical-3", "vertical-4", "vertical-6", "grid-2x2"]] = None
     print_mode: Optional[Literal["single", "dual-strip"]] = None
     paper_size: Optional[Literal["2x6", "4x6", "5x7"]] = None
+    render_target: Optional[Literal["screen", "print"]] = None
+    printer_dpi: Optional[int] = Field(default=None, ge=150, le=600)
+    printer_icc_profiles: Optional[Dict[str, str]] = None
+    icc_rendering_intent: Optional[Literal["perceptual", "relative_colorimetric", "saturation", "absolute_colorimetric"]] = None
     photo_spacing: Optional[int] = Field(default=None, ge=0, le=100)
     strip_width: Optional[int] = Field(default=None, ge=400, le=800)
     strip_height: Optional[int] = Field(default=None, ge=1200, le=2400)
@@ -77,6 +98,7 @@ class SettingsUpdate(BaseModel):
     print_copies: Optional[int] = Field(default=None, ge=1, le=6)
     camera_width: Optional[int] = Field(default=None, ge=640, le=1920)
     camera_height: Optional[int] = Field(default=None, ge=480, le=1080)
+    camera_capture_mode: Optional[Literal["decoded", "mjpeg"]] = None
 
     @field_validator('backend_url')
     @classmethod
@@ -0,0 +1,222 @@
+"""
+Registro de cámaras en memoria
+
+``/api/camera/list`` y ``/api/health/full?include_camera=true`` abrían
+``cv2.VideoCapture`` en los índices 0-2 en cada llamada: segundos de
+latencia, contención con el renderer por el dispositivo y un
+``gc.collect()`` forzado.
+
+Este registro enumera los dispositivos una vez y responde desde memoria:
+
+- Linux: lista ``/dev/video*`` sin abrir la cámara. Nombre e índice de nodo
+  salen de sysfs (los nodos de metadata, ``index`` != 0, se omiten) y las
+  capacidades (fourcc -> resoluciones) de ``v4l2-ctl --list-formats-ext``
+  si está instalado.
+- Otros sistemas: sondeo con OpenCV de los primeros índices (como antes),
+  pero solo al refrescar.
+- Fuente virtual (``PHOTOBOOTH_CAMERA_SOURCE`` sintética o video): un único
+  dispositivo 0 que la describe.
+- Refresco: cuando vence el TTL o cambia el mtime de ``/dev`` (conectar o
+  desconectar una webcam crea/borra nodos), o a pedido con ``refresh``.
+"""
+from __future__ import annotations
+
+import platform
+import re
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config import CAMERA_REGISTRY_CONFIG
+from app.logging_config import logger
+from app.schemas.camera import CameraDevice
+from app.services.frame_sources import FrameSources
+
+DEV_DIR = Path("/dev")
+SYSFS_V4L_DIR = Path("/sys/class/video4linux")
+
+_FORMAT_RE = re.compile(r"\[\d+\]:\s+'(?P<fourcc>[^']+)'")
+_SIZE_RE = re.compile(r"Size:\s+\w+\s+(?P<width>\d+)x(?P<height>\d+)")
+
+
+class CameraRegistry:
+    """Cache de dispositivos de cámara y sus capacidades."""
+
+    TTL_S: float = CAMERA_REGISTRY_CONFIG["ttl_s"]
+    PROBE_INDICES: int = CAMERA_REGISTRY_CONFIG["probe_indices"]
+
+    _devices: Optional[List[CameraDevice]] = None
+    _refreshed_at: float = 0.0
+    _dev_mtime: Optional[int] = None
+    _refreshes: int = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def devices(cls, refresh: bool = False) -> List[CameraDevice]:
+        """Dispositivos conocidos (refresca si venció el TTL o cambió /dev)."""
+        with cls._lock:
+            if refresh or cls._is_stale_locked():
+                cls._refresh_locked()
+            return list(cls._devices or [])
+
+    @classmethod
+    def indices(cls, refresh: bool = False) -> List[int]:
+        return [device.index for device in cls.devices(refresh=refresh)]
+
+    @classmethod
+    def invalidate(cls) -> None:
+        with cls._lock:
+            cls._devices = None
+
+    @staticmethod
+    def _watch_mtime() -> Optional[int]:
+        try:
+            return DEV_DIR.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    @classmethod
+    def _is_stale_locked(cls) -> bool:
+        if cls._devices is None:
+            return True
+        if cls.TTL_S > 0 and time.monotonic() - cls._refreshed_at > cls.TTL_S:
+            return True
+        return cls._dev_mtime is not None and cls._watch_mtime() != cls._dev_mtime
+
+    @classmethod
+    def _refresh_locked(cls) -> None:
+        started = time.perf_counter()
+        try:
+            if FrameSources.is_virtual():
+                path, name = FrameSources.describe()
+                devices = [CameraDevice(index=0, path=path, name=name)]
+            elif platform.system() == "Linux":
+                devices = cls._enumerate_linux()
+            else:
+                devices = cls._enumerate_probe()
+        except Exception as exc:
+            logger.error(f"Error enumerando cámaras: {exc}")
+            devices = []
+
+        cls._devices = devices
+        cls._refreshed_at = time.monotonic()
+        cls._dev_mtime = cls._watch_mtime() if platform.system() == "Linux" else None
+        cls._refreshes += 1
+        logger.info(
+            f"Registro de cámaras: {len(devices)} dispositivo(s) en "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+
+    # ---------- Linux (sin abrir la cámara) ----------
+
+    @classmethod
+    def _enumerate_linux(cls) -> List[CameraDevice]:
+        devices = []
+        for node in sorted(DEV_DIR.glob("video[0-9]*"), key=lambda p: int(p.name[5:])):
+            index = int(node.name[5:])
+            sysfs = SYSFS_V4L_DIR / node.name
+
+            # Cada webcam UVC expone un nodo de captura (index 0) y uno de metadata
+            node_index = cls._read_sysfs(sysfs / "index")
+            if node_index not in (None, "0"):
+                continue
+
+            devices.append(
+                CameraDevice(
+                    index=index,
+                    path=str(node),
+                    name=cls._read_sysfs(sysfs / "name") or node.name,
+                    formats=cls._v4l2_formats(node),
+                )
+            )
+        return devices
+
+    @staticmethod
+    def _read_sysfs(path: Path) -> Optional[str]:
+        try:
+            return path.read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _v4l2_formats(node: Path) -> Dict[str, List[str]]:
+        """fourcc -> ["WxH", ...] vía v4l2-ctl (vacío si no está instalado)."""
+        if shutil.which("v4l2-ctl") is None:
+            return {}
+        try:
+            result = subprocess.run(
+                ["v4l2-ctl", "-d", str(node), "--list-formats-ext"],
+                capture_output=True,
+                text=True,
+                timeout=3,
+            )
+        except (OSError, subprocess.TimeoutExpired) as exc:
+            logger.warning(f"v4l2-ctl falló para {node}: {exc}")
+            return {}
+        return parse_v4l2_formats(result.stdout)
+
+    # ---------- Otros sistemas (sondeo OpenCV) ----------
+
+    @classmethod
+    def _enumerate_probe(cls) -> List[CameraDevice]:
+        import cv2
+
+        devices = []
+        # NOTA: Es normal ver logs "OpenCV: out device of bound" en la consola
+        # cuando se verifica un índice que no tiene cámara conectada.
+        for index in range(cls.PROBE_INDICES):
+            cap = cv2.VideoCapture(index)
+            try:
+                if not cap.isOpened():
+                    continue
+                fourcc_code = int(cap.get(cv2.CAP_PROP_FOURCC))
+                fourcc = "".join(chr((fourcc_code >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00 ")
+                size = f"{int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))}"
+                devices.append(
+                    CameraDevice(
+                        index=index,
+                        path=str(index),
+                        name=f"Camera {index}",
+                        formats={fourcc or "unknown": [size]},
+                    )
+                )
+            finally:
+                cap.release()
+        return devices
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "devices": len(cls._devices or []),
+                "age_s": round(time.monotonic() - cls._refreshed_at, 1) if cls._devices is not None else None,
+                "ttl_s": cls.TTL_S,
+                "refreshes": cls._refreshes,
+            }
+
+
+def parse_v4l2_formats(output: str) -> Dict[str, List[str]]:
+    """Parsea la salida de ``v4l2-ctl --list-formats-ext``."""
+    formats: Dict[str, List[str]] = {}
+    current: Optional[str] = None
+    for line in output.splitlines():
+        format_match = _FORMAT_RE.search(line)
+        if format_match:
+            current = format_match.group("fourcc").strip()
+            formats.setdefault(current, [])
+            continue
+        size_match = _SIZE_RE.search(line)
+        if size_match and current is not None:
+            size = f"{size_match.group('width')}x{size_match.group('height')}"
+            if size not in formats[current]:
+                formats[current].append(size)
+    return formats
+
+
+__all__ = [
+    "CameraRegistry",
+    "parse_v4l2_formats",
+]
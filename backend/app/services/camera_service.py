@@ -1,56 +1,143 @@
 """
 Servicio de cámara - OPTIMIZADO para bajo consumo de recursos
-- Captura única sin mantener conexión
+- Captura única sin mantener conexión (default)
+- Daemon opcional con la cámara caliente (ver capture_daemon.py)
 - Liberación inmediata de memoria
+- Fuente de frames intercambiable (cámara real, sintética o video; ver
+  frame_sources.py)
+- Modo MJPEG passthrough opcional: los bytes JPEG de la cámara van directo
+  a shot-N.jpg, sin decode ni re-encode
 - Sin video streaming continuo
 """
 import cv2
 import gc
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import BinaryIO, List, Optional, Tuple
 from PIL import Image
 
-from app.config import CAMERA_CONFIG, PHOTOS_DIR, get_photo_url, RESOURCE_LIMITS
-from app.schemas.session import SessionPhoto
-from app.services.session_service import SessionService
+from app.config import CAMERA_CONFIG, PHOTOS_DIR, RESOURCE_LIMITS
+from app.services.camera_registry import CameraRegistry
+from app.services.capture_daemon import CaptureDaemon
+from app.services.frame_sources import MJPG_FOURCC, FrameSources
+from app.services.photo_pipeline import PhotoPipeline
 from app.api.settings import load_settings
 from app.logging_config import logger
 
 
+# Formatos aceptados en /api/camera/upload (el renderer envía JPEG)
+UPLOAD_FORMATS = ("JPEG", "PNG")
+
+
 class CameraService:
     """Servicio ligero de captura de fotos"""
     
+    @staticmethod
+    def _open_device(camera_id: int, settings=None) -> "cv2.VideoCapture":
+        """Abre y configura la cámara (resolución de settings, buffer mínimo).
+
+        Compartido por la captura única y el daemon de captura. Con
+        ``camera_capture_mode="mjpeg"`` negocia MJPG y desactiva la conversión
+        a BGR: ``read()`` devuelve el JPEG crudo de la cámara (ver
+        ``is_jpeg_buffer``). Si la cámara no acepta MJPG queda en modo decodificado.
+        """
+        if settings is None:
+            settings = load_settings()
+
+        cap = FrameSources.open(camera_id)
+        if not cap.isOpened():
+            cap.release()
+            raise RuntimeError(f"No se puede abrir la cámara {camera_id}")
+
+        passthrough = getattr(settings, "camera_capture_mode", "decoded") == "mjpeg"
+        if passthrough:
+            # V4L2 fija el formato antes que la resolución
+            cap.set(cv2.CAP_PROP_FOURCC, MJPG_FOURCC)
+
+        # Configurar resolución (moderada para ahorrar RAM)
+        cap.set(
+            cv2.CAP_PROP_FRAME_WIDTH,
+            settings.camera_width or CAMERA_CONFIG["width"],
+        )
+        cap.set(
+            cv2.CAP_PROP_FRAME_HEIGHT,
+            settings.camera_height or CAMERA_CONFIG["height"],
+        )
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, CAMERA_CONFIG["buffer_size"])
+
+        if passthrough:
+            if int(cap.get(cv2.CAP_PROP_FOURCC)) == MJPG_FOURCC and cap.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+                logger.info(f"Cámara {camera_id} en modo MJPEG passthrough")
+            else:
+                cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+                logger.warning(f"La cámara {camera_id} no entrega MJPG; se usa captura decodificada")
+        return cap
+
+    @staticmethod
+    def is_jpeg_buffer(frame) -> bool:
+        """True si ``read()`` devolvió el JPEG crudo (modo MJPEG) y no un frame BGR."""
+        return (
+            frame is not None
+            and frame.dtype == "uint8"
+            and (frame.ndim == 1 or frame.shape[0] == 1)
+            and frame.size > 2
+            and frame.flat[0] == 0xFF
+            and frame.flat[1] == 0xD8
+        )
+
+    @staticmethod
+    def decode_frame(frame, min_width: Optional[int] = None):
+        """Frame BGR a partir de lo que devuelva ``read()`` (decodifica si es JPEG crudo).
+
+        Con ``min_width`` decodifica a escala reducida en el DCT (1/2, 1/4,
+        1/8) siempre que el resultado no quede más angosto que ``min_width``.
+        """
+        if not CameraService.is_jpeg_buffer(frame):
+            return frame
+        flag = cv2.IMREAD_COLOR
+        if min_width:
+            with Image.open(io.BytesIO(frame.tobytes())) as img:
+                width = img.size[0]
+            for factor, reduced in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2)):
+                if width // factor >= min_width:
+                    flag = reduced
+                    break
+        decoded = cv2.imdecode(frame.reshape(-1), flag)
+        if decoded is None:
+            raise RuntimeError("JPEG de la cámara inválido")
+        return decoded
+
     @staticmethod
     def capture_photo(
         camera_id: int = 0,
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        trigger_ts: Optional[float] = None,
     ) -> Tuple[str, Path]:
         """
-        Captura UNA foto y libera recursos inmediatamente.
-        
-        Optimización: No mantiene la cámara abierta, abre/captura/cierra.
+        Captura UNA foto.
+
+        Si el daemon de captura está corriendo para esta cámara, toma el
+        frame del ring buffer más cercano a ``trigger_ts`` (epoch; None =
+        ahora) sin abrir el dispositivo. Si no, abre/captura/cierra como
+        siempre (sin mantener la cámara abierta).
         """
+        if CaptureDaemon.is_running(camera_id):
+            frame = CaptureDaemon.frame_at(trigger_ts)
+            if frame is not None:
+                try:
+                    return CameraService._persist_frame(frame, session_id)
+                except Exception as e:
+                    logger.error(f"Error crítico en captura de foto: {str(e)}", exc_info=True)
+                    raise RuntimeError(f"Error en captura: {str(e)}")
+            logger.warning("Daemon de captura sin frames; usando captura única")
+
         cap = None
         try:
-            settings = load_settings()
-
             # Abrir cámara
-            cap = cv2.VideoCapture(camera_id)
-            
-            if not cap.isOpened():
-                raise RuntimeError(f"No se puede abrir la cámara {camera_id}")
-            
-            # Configurar resolución (moderada para ahorrar RAM)
-            cap.set(
-                cv2.CAP_PROP_FRAME_WIDTH,
-                settings.camera_width or CAMERA_CONFIG["width"],
-            )
-            cap.set(
-                cv2.CAP_PROP_FRAME_HEIGHT,
-                settings.camera_height or CAMERA_CONFIG["height"],
-            )
-            cap.set(cv2.CAP_PROP_BUFFERSIZE, CAMERA_CONFIG["buffer_size"])
+            cap = CameraService._open_device(camera_id)
             
             # Descartar primeros frames (a veces salen oscuros)
             for _ in range(3):
@@ -61,55 +148,8 @@ class CameraService:
             
             if not ret or frame is None:
                 raise RuntimeError("Error al capturar foto")
-            
-            # Generar nombre de archivo
-            if session_id is None:
-                session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            current_session = SessionService.get_session(session_id)
-            photo_index = len(current_session.photos) + 1 if current_session else 1
-            filename = f"shot-{photo_index}.jpg"
-            
-            # Crear carpeta de sesión
-            session_dir = PHOTOS_DIR / session_id
-            session_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Ruta completa
-            filepath = session_dir / filename
-            
-            # Guardar con compresión JPEG (más ligero)
-            cv2.imwrite(
-                str(filepath),
-                frame,
-                [cv2.IMWRITE_JPEG_QUALITY, 90]  # Calidad 90 = buen balance
-            )
-
-            # Crear thumbnail pequeño para galería
-            thumb_path = session_dir / f"thumb-{photo_index}.jpg"
-            thumb_width = 320
-            height, width = frame.shape[:2]
-            scale = thumb_width / width
-            thumb_height = int(height * scale)
-            thumbnail = cv2.resize(frame, (thumb_width, thumb_height))
-            cv2.imwrite(str(thumb_path), thumbnail, [cv2.IMWRITE_JPEG_QUALITY, 80])
-            
-            # Liberar frame de memoria
-            del frame
-            
-            # Registrar metadata de sesión (fail fast si algo falla)
-            photo_url = get_photo_url(filepath)
-            thumb_url = get_photo_url(thumb_path)
-            SessionService.append_photo(
-                session_id,
-                SessionPhoto(
-                    filename=filename,
-                    path=photo_url,
-                    url=photo_url,
-                    thumbnail_url=thumb_url,
-                ),
-            )
 
-            return session_id, filepath
+            return CameraService._persist_frame(frame, session_id)
             
         except Exception as e:
             logger.error(f"Error crítico en captura de foto: {str(e)}", exc_info=True)
@@ -122,15 +162,158 @@ class CameraService:
             
             # Forzar garbage collection
             gc.collect()
+
+    @staticmethod
+    def capture_burst(
+        camera_id: int = 0,
+        session_id: Optional[str] = None,
+        count: int = 3,
+        interval_s: float = 0.0,
+        warmup_frames: int = 3,
+    ) -> Tuple[str, List[Path]]:
+        """
+        Captura ``count`` fotos con una sola apertura de la cámara.
+
+        Los frames se toman cada ``interval_s`` segundos (la cuenta regresiva
+        la muestra el frontend); mientras tanto un hilo escritor guarda cada
+        JPEG original. Retorna cuando todos los originales están en disco;
+        thumbnails y el registro en la sesión (una sola transacción) los
+        completa el PhotoPipeline en segundo plano, igual que en
+        ``capture_photo``. Con el daemon de captura activo, los frames salen
+        de su ring buffer sin abrir el dispositivo.
+        """
+        if count < 1:
+            raise ValueError("count debe ser >= 1")
+
+        if session_id is None:
+            session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        session_dir = PHOTOS_DIR / session_id
+        session_dir.mkdir(parents=True, exist_ok=True)
+        indices = PhotoPipeline.reserve_indices(session_id, count)
+
+        use_daemon = CaptureDaemon.is_running(camera_id)
+        cap = None
+        futures = []
+        submitted = False
+        try:
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="burst-writer") as writer:
+                if not use_daemon:
+                    cap = CameraService._open_device(camera_id)
+                    # Descartar primeros frames (a veces salen oscuros)
+                    for _ in range(warmup_frames):
+                        cap.read()
+
+                next_shot = time.monotonic()
+                for shot, photo_index in enumerate(indices):
+                    if shot > 0:
+                        next_shot += interval_s
+                        if use_daemon:
+                            time.sleep(max(0.0, next_shot - time.monotonic()))
+                        else:
+                            # grab() sin decodificar mantiene el buffer del driver fresco
+                            while time.monotonic() < next_shot:
+                                cap.grab()
+
+                    if use_daemon:
+                        frame = CaptureDaemon.frame_at()
+                        ret = frame is not None
+                    else:
+                        ret, frame = cap.read()
+                    if not ret or frame is None:
+                        raise RuntimeError(f"Error al capturar foto {shot + 1} de {count}")
+
+                    filepath = session_dir / f"shot-{photo_index}.jpg"
+                    futures.append(
+                        (photo_index, filepath, frame, writer.submit(CameraService._write_frame, frame, filepath))
+                    )
+                    del frame
+
+                if cap is not None:
+                    # El dispositivo queda libre mientras se terminan de escribir archivos
+                    cap.release()
+                    cap = None
+
+                pending = []
+                for photo_index, filepath, frame, future in futures:
+                    future.result()
+                    # JPEG crudo: el thumbnail se decodifica a escala reducida desde el archivo
+                    pending.append((photo_index, filepath, None if CameraService.is_jpeg_buffer(frame) else frame))
+
+            # Thumbnails + una sola actualización de sesión en el writer de fondo
+            PhotoPipeline.submit(session_id, pending)
+            submitted = True
+            return session_id, [filepath for _, filepath, _ in pending]
+
+        except Exception as e:
+            logger.error(f"Error crítico en ráfaga de captura: {str(e)}", exc_info=True)
+            raise RuntimeError(f"Error en ráfaga: {str(e)}")
+
+        finally:
+            if not submitted:
+                PhotoPipeline.cancel(session_id, indices)
+            if cap is not None:
+                cap.release()
+            gc.collect()
+
+    @staticmethod
+    def _persist_frame(frame, session_id: Optional[str]) -> Tuple[str, Path]:
+        """Guarda un frame BGR como shot-N.jpg; thumbnail y registro van al pipeline.
+
+        Retorna cuando el JPEG original está en disco (fsync).
+        """
+        # Generar nombre de archivo
+        if session_id is None:
+            session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        # Crear carpeta de sesión
+        session_dir = PHOTOS_DIR / session_id
+        session_dir.mkdir(parents=True, exist_ok=True)
+
+        (photo_index,) = PhotoPipeline.reserve_indices(session_id)
+        filepath = session_dir / f"shot-{photo_index}.jpg"
+        try:
+            CameraService._write_frame(frame, filepath)
+        except Exception:
+            PhotoPipeline.cancel(session_id, [photo_index])
+            raise
+
+        # JPEG crudo: el thumbnail se decodifica a escala reducida desde el archivo
+        thumb_frame = None if CameraService.is_jpeg_buffer(frame) else frame
+        PhotoPipeline.submit(session_id, [(photo_index, filepath, thumb_frame)])
+        return session_id, filepath
+
+    @staticmethod
+    def _write_frame(frame, filepath: Path) -> Path:
+        """Codifica un frame BGR a JPEG y lo escribe de forma durable.
+
+        En modo MJPEG el frame ya es el JPEG de la cámara: se escribe tal cual.
+        """
+        if CameraService.is_jpeg_buffer(frame):
+            return PhotoPipeline.write_original(filepath, frame.tobytes())
+
+        # Guardar con compresión JPEG (más ligero)
+        ok, encoded = cv2.imencode(
+            ".jpg",
+            frame,
+            [cv2.IMWRITE_JPEG_QUALITY, 90]  # Calidad 90 = buen balance
+        )
+        if not ok:
+            raise RuntimeError("Error al codificar foto")
+        return PhotoPipeline.write_original(filepath, encoded.tobytes())
     
     @staticmethod
     def save_uploaded_bytes(
         data: bytes,
         session_id: Optional[str] = None,
+        photo_index: Optional[int] = None,
     ) -> Tuple[str, Path]:
         """Guarda una imagen subida por el renderer y la asocia a una sesión.
 
-        Mantiene el mismo contrato que capture_photo: devuelve (session_id, filepath).
+        Mantiene el mismo contrato que capture_photo: devuelve (session_id, filepath)
+        en cuanto el original está en disco; thumbnail y registro en la sesión
+        los completa el PhotoPipeline. Con ``photo_index`` se guarda como
+        ``shot-{photo_index}.jpg`` (error si ese shot ya existe).
         """
         try:
             if not data:
@@ -141,43 +324,27 @@ class CameraService:
             if len(data) > max_bytes:
                 raise RuntimeError(f"Imagen demasiado grande (> {max_mb} MB)")
 
+            # Validar cabecera antes de aceptar (sin decodificar píxeles)
+            CameraService._validate_image_header(io.BytesIO(data))
+
             if session_id is None:
                 session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-            current_session = SessionService.get_session(session_id)
-            photo_index = len(current_session.photos) + 1 if current_session else 1
-            filename = f"shot-{photo_index}.jpg"
-
             session_dir = PHOTOS_DIR / session_id
             session_dir.mkdir(parents=True, exist_ok=True)
 
-            filepath = session_dir / filename
-            filepath.write_bytes(data)
-
-            thumb_path = session_dir / f"thumb-{photo_index}.jpg"
-
-            with Image.open(filepath) as img:
-                thumb_width = 320
-                width, height = img.size
-                if width == 0 or height == 0:
-                    raise RuntimeError("Imagen inválida al generar thumbnail")
-                scale = thumb_width / width
-                thumb_height = int(height * scale)
-                thumbnail = img.resize((thumb_width, thumb_height), Image.Resampling.LANCZOS)
-                thumbnail.save(thumb_path, format="JPEG", quality=80)
-
-            photo_url = get_photo_url(filepath)
-            thumb_url = get_photo_url(thumb_path)
-            SessionService.append_photo(
-                session_id,
-                SessionPhoto(
-                    filename=filename,
-                    path=photo_url,
-                    url=photo_url,
-                    thumbnail_url=thumb_url,
-                ),
-            )
+            if photo_index is None:
+                (photo_index,) = PhotoPipeline.reserve_indices(session_id)
+            else:
+                PhotoPipeline.claim_index(session_id, photo_index)
+            filepath = session_dir / f"shot-{photo_index}.jpg"
+            try:
+                PhotoPipeline.write_original(filepath, data)
+            except Exception:
+                PhotoPipeline.cancel(session_id, [photo_index])
+                raise
 
+            PhotoPipeline.submit(session_id, [(photo_index, filepath, None)])
             return session_id, filepath
 
         except Exception as e:
@@ -187,23 +354,68 @@ class CameraService:
             gc.collect()
     
     @staticmethod
-    def get_available_cameras() -> list[int]:
+    def save_uploaded_stream(
+        source: BinaryIO,
+        session_id: Optional[str] = None,
+    ) -> Tuple[str, Path]:
+        """Guarda un upload copiándolo por bloques (mismo contrato que save_uploaded_bytes).
+
+        El límite de tamaño se aplica mientras se copia y la imagen se valida
+        por su cabecera sobre el mismo archivo, sin decodificarla: la memoria
+        por upload queda en un bloque (``upload_chunk_bytes``) sin importar el
+        tamaño de la foto. El thumbnail lo genera el PhotoPipeline con un
+        decode a escala reducida.
+        """
+        try:
+            max_mb = RESOURCE_LIMITS.get("max_photo_size_mb", 10)
+
+            if session_id is None:
+                session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+            session_dir = PHOTOS_DIR / session_id
+            session_dir.mkdir(parents=True, exist_ok=True)
+
+            (photo_index,) = PhotoPipeline.reserve_indices(session_id)
+            filepath = session_dir / f"shot-{photo_index}.jpg"
+            try:
+                PhotoPipeline.write_original_stream(
+                    filepath,
+                    source,
+                    max_bytes=max_mb * 1024 * 1024,
+                    chunk_size=RESOURCE_LIMITS.get("upload_chunk_bytes", 256 * 1024),
+                    validate=CameraService._validate_image_header,
+                )
+            except Exception:
+                PhotoPipeline.cancel(session_id, [photo_index])
+                raise
+
+            PhotoPipeline.submit(session_id, [(photo_index, filepath, None)])
+            return session_id, filepath
+
+        except Exception as e:
+            logger.error(f"Error guardando foto subida: {str(e)}", exc_info=True)
+            raise RuntimeError(f"Error en guardado de foto: {str(e)}")
+
+    @staticmethod
+    def _validate_image_header(handle: BinaryIO) -> None:
+        """Valida formato y dimensiones leyendo solo la cabecera."""
+        with Image.open(handle) as img:
+            width, height = img.size
+            image_format = img.format
+        if image_format not in UPLOAD_FORMATS:
+            raise RuntimeError(f"Formato de imagen no soportado: {image_format}")
+        if width == 0 or height == 0:
+            raise RuntimeError("Imagen inválida (dimensiones 0)")
+    
+    @staticmethod
+    def get_available_cameras(refresh: bool = False) -> list[int]:
         """
-        Detecta cámaras disponibles sin mantenerlas abiertas.
+        Índices de cámaras disponibles, desde el registro en memoria.
+
+        No abre dispositivos salvo al refrescar el registro (y en Linux ni
+        siquiera entonces).
         """
-        available = []
-        
-        # Escanear índices 0, 1, 2.
-        # NOTA: Es normal ver logs "OpenCV: out device of bound" en la consola
-        # cuando se verifica un índice que no tiene cámara conectada.
-        for camera_id in range(3):
-            cap = cv2.VideoCapture(camera_id)
-            if cap.isOpened():
-                available.append(camera_id)
-                cap.release()
-        
-        gc.collect()
-        return available
+        return CameraRegistry.indices(refresh=refresh)
     
     @staticmethod
     def test_camera(camera_id: int = 0) -> bool:
@@ -212,7 +424,7 @@ class CameraService:
         """
         cap = None
         try:
-            cap = cv2.VideoCapture(camera_id)
+            cap = FrameSources.open(camera_id)
             if not cap.isOpened():
                 return False
             
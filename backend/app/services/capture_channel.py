@@ -0,0 +1,211 @@
+"""
+Canal WebSocket binario de capturas (renderer -> backend)
+
+Cada foto del renderer viajaba como un POST multipart a
+``/api/camera/upload``: parseo HTTP, decodificación del formulario y un
+round-trip por shot, y el renderer esperaba la respuesta antes de seguir.
+
+Con ``/api/camera/ws`` el renderer mantiene un WebSocket por cabina y
+empuja frames binarios:
+
+    [uint32 big-endian: largo del header][header JSON UTF-8][bytes JPEG]
+
+    header = {"session_id": "20250101_120000" | null, "shot_index": 1}
+
+Por cada frame el backend responde (texto JSON) cuando el original ya está
+en disco de forma durable (el mismo punto en que responde ``/upload``):
+
+    {"type": "ack", "shot_index": 1, "session_id": "...", "file_path": "/data/photos/..."}
+    {"type": "error", "shot_index": 1, "detail": "..."}
+
+- Pipelining: el renderer no espera el ack para enviar el siguiente shot.
+  Un lector recibe frames y un escritor por conexión los persiste en orden
+  de llegada (así ``shot-N`` y el registro en la sesión respetan el orden).
+- Backpressure: con ``max_in_flight`` shots sin ack el lector deja de leer
+  el socket hasta que el escritor avance.
+- Sesión: sin ``session_id``, ``shot_index`` 1 crea una sesión nueva y los
+  siguientes shots usan la última sesión de la conexión.
+- Nombre: el shot se guarda como ``shot-{shot_index}.jpg``; si ese shot ya
+  existe en la sesión se responde error (nunca se sobrescribe). Sin
+  ``shot_index`` se usa el siguiente índice libre.
+- Si el renderer se desconecta, los shots ya recibidos se persisten igual.
+  Si el escritor falla, el lector no queda esperando cola: cierra el socket
+  con 1011.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import WebSocket
+from starlette.concurrency import run_in_threadpool
+
+from app.config import CAPTURE_CHANNEL_CONFIG, get_photo_url
+from app.logging_config import logger
+from app.services.camera_service import CameraService
+
+HEADER_PREFIX = struct.Struct(">I")
+MAX_HEADER_BYTES = 4096
+
+# (header, bytes JPEG) o (header, error de parseo)
+Shot = Tuple[Dict[str, Any], Optional[bytes], Optional[str]]
+
+
+def parse_frame(message: bytes) -> Tuple[Dict[str, Any], bytes]:
+    """Separa header JSON y bytes JPEG de un frame binario."""
+    if len(message) < HEADER_PREFIX.size:
+        raise ValueError("Frame incompleto")
+    (header_len,) = HEADER_PREFIX.unpack_from(message)
+    end = HEADER_PREFIX.size + header_len
+    if header_len > MAX_HEADER_BYTES or end > len(message):
+        raise ValueError("Header de frame inválido")
+
+    header = json.loads(message[HEADER_PREFIX.size:end].decode("utf-8"))
+    if not isinstance(header, dict):
+        raise ValueError("El header debe ser un objeto JSON")
+    return header, message[end:]
+
+
+def build_frame(payload: bytes, session_id: Optional[str] = None, shot_index: Optional[int] = None) -> bytes:
+    """Arma un frame binario (lo usa el renderer; útil para pruebas)."""
+    header = json.dumps({"session_id": session_id, "shot_index": shot_index}).encode("utf-8")
+    return HEADER_PREFIX.pack(len(header)) + header + payload
+
+
+class CaptureChannel:
+    """Lector + escritor por conexión WebSocket del renderer."""
+
+    MAX_IN_FLIGHT: int = max(1, CAPTURE_CHANNEL_CONFIG["max_in_flight"])
+
+    _lock = threading.Lock()
+    _connections: int = 0
+    _shots: int = 0
+    _failed: int = 0
+    _persist_seconds: float = 0.0
+
+    @classmethod
+    async def serve(cls, websocket: WebSocket) -> None:
+        await websocket.accept()
+        shots: "asyncio.Queue[Optional[Shot]]" = asyncio.Queue(maxsize=cls.MAX_IN_FLIGHT)
+        writer = asyncio.create_task(cls._persist_loop(websocket, shots))
+        with cls._lock:
+            cls._connections += 1
+
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+
+                data = message.get("bytes")
+                if data is None:
+                    shot: Shot = ({}, None, "Se esperaban frames binarios")
+                else:
+                    try:
+                        header, payload = parse_frame(data)
+                        shot = (header, payload, None)
+                    except (ValueError, UnicodeDecodeError) as exc:
+                        shot = ({}, None, str(exc))
+
+                if not await cls._enqueue(shots, writer, shot):
+                    logger.error(f"Canal de captura: el escritor terminó con error: {writer.exception()!r}")
+                    await websocket.close(code=1011, reason="Error persistiendo capturas")
+                    break
+        finally:
+            if not writer.done():
+                await shots.put(None)
+            await asyncio.gather(writer, return_exceptions=True)
+            with cls._lock:
+                cls._connections -= 1
+            logger.info("Canal de captura desconectado")
+
+    @staticmethod
+    async def _enqueue(shots: "asyncio.Queue[Optional[Shot]]", writer: "asyncio.Task[None]", shot: Shot) -> bool:
+        """Encola un shot; espera si hay MAX_IN_FLIGHT sin ack (backpressure).
+
+        Returns:
+            False si el escritor murió mientras se esperaba lugar en la cola.
+        """
+        if writer.done():
+            return False
+        put = asyncio.ensure_future(shots.put(shot))
+        done, _ = await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+        if put in done:
+            return True
+        put.cancel()
+        return False
+
+    @classmethod
+    async def _persist_loop(cls, websocket: WebSocket, shots: "asyncio.Queue[Optional[Shot]]") -> None:
+        current_session: Optional[str] = None
+        connected = True
+
+        while True:
+            shot = await shots.get()
+            if shot is None:
+                return
+
+            header, payload, error = shot
+            shot_index = header.get("shot_index")
+            session_id = header.get("session_id")
+            photo_index = shot_index if isinstance(shot_index, int) and not isinstance(shot_index, bool) else None
+            if session_id is None and current_session is not None and shot_index != 1:
+                session_id = current_session
+
+            reply: Dict[str, Any]
+            if error is not None:
+                reply = {"type": "error", "shot_index": shot_index, "detail": error}
+            else:
+                started = time.perf_counter()
+                try:
+                    session_value, filepath = await run_in_threadpool(
+                        CameraService.save_uploaded_bytes,
+                        payload,
+                        session_id=session_id,
+                        photo_index=photo_index,
+                    )
+                except Exception as exc:
+                    with cls._lock:
+                        cls._failed += 1
+                    reply = {"type": "error", "shot_index": shot_index, "detail": str(exc)}
+                else:
+                    current_session = session_value
+                    with cls._lock:
+                        cls._shots += 1
+                        cls._persist_seconds += time.perf_counter() - started
+                    reply = {
+                        "type": "ack",
+                        "shot_index": shot_index,
+                        "session_id": session_value,
+                        "file_path": get_photo_url(filepath),
+                    }
+
+            if connected:
+                try:
+                    await websocket.send_json(reply)
+                except Exception:
+                    # El renderer se fue: se siguen persistiendo los shots recibidos
+                    connected = False
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            shots = cls._shots
+            return {
+                "connections": cls._connections,
+                "shots": shots,
+                "failed": cls._failed,
+                "avg_persist_ms": round(cls._persist_seconds / shots * 1000, 2) if shots else None,
+                "max_in_flight": cls.MAX_IN_FLIGHT,
+            }
+
+
+__all__ = [
+    "CaptureChannel",
+    "build_frame",
+    "parse_frame",
+]
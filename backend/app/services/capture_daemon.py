@@ -0,0 +1,235 @@
+"""
+Daemon de captura con la cámara abierta
+
+``CameraService.capture_photo`` abre el dispositivo, lo configura, descarta
+frames de calentamiento y lo libera en cada foto: en webcams USB eso suma
+0.5-2 s justo cuando la cuenta regresiva llega a cero.
+
+Este daemon (opcional) mantiene el ``VideoCapture`` abierto en un hilo que
+lee frames continuamente hacia un ring buffer pequeño de frames con marca de
+tiempo. Una captura devuelve el frame más cercano al instante del disparo.
+
+- Control explícito: ``start`` / ``stop`` / ``status`` (endpoints en
+  ``/api/camera/daemon``) y arranque automático opcional por config.
+- Idle timeout: sin capturas durante ``idle_timeout_s`` el hilo libera la
+  cámara y termina; el modo de captura única de bajo consumo sigue siendo
+  el default cuando el daemon no corre.
+- Memoria acotada: ``ring_size`` frames (1280x720 BGR = 2.7 MB cada uno).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Optional, Tuple
+
+from app.config import CAPTURE_DAEMON_CONFIG
+from app.logging_config import logger
+
+# (timestamp epoch, frame BGR)
+TimedFrame = Tuple[float, Any]
+
+
+class CaptureDaemon:
+    """Hilo único que mantiene la cámara caliente y un ring buffer de frames."""
+
+    RING_SIZE: int = max(1, CAPTURE_DAEMON_CONFIG["ring_size"])
+    IDLE_TIMEOUT_S: float = CAPTURE_DAEMON_CONFIG["idle_timeout_s"]
+    READ_FAILURES_BEFORE_STOP = 30
+
+    _thread: Optional[threading.Thread] = None
+    _stop_event = threading.Event()
+    _frames: Deque[TimedFrame] = deque(maxlen=RING_SIZE)
+    _new_frame = threading.Condition()
+    _lock = threading.Lock()
+    # Un solo arranque a la vez (incluye esperar al hilo anterior)
+    _state_changed = threading.Condition(_lock)
+    _starting: bool = False
+    _camera_id: Optional[int] = None
+    _idle_timeout_s: float = IDLE_TIMEOUT_S
+    _last_used: float = 0.0
+    _started_at: Optional[float] = None
+    _frames_read: int = 0
+    _captures: int = 0
+    _last_error: Optional[str] = None
+
+    @classmethod
+    def start(cls, camera_id: int = 0, idle_timeout_s: Optional[float] = None) -> bool:
+        """Abre la cámara en segundo plano. Devuelve False si ya corría con esa cámara.
+
+        Si corría con otra cámara, se detiene y se reinicia con la nueva. Los
+        arranques son atómicos: mientras uno espera al hilo anterior, los
+        demás ``start``/``stop`` esperan a que termine.
+        """
+        with cls._lock:
+            while cls._starting:
+                cls._state_changed.wait()
+            if cls.is_running():
+                if cls._camera_id == camera_id:
+                    cls._last_used = time.time()
+                    return False
+                cls._stop_event.set()
+            # Hilo anterior (corriendo u ocupado liberando la cámara): se espera fuera del lock
+            previous = cls._thread
+            cls._starting = True
+
+        try:
+            if previous is not None:
+                previous.join(timeout=5.0)
+            with cls._new_frame:
+                cls._frames.clear()
+                cls._new_frame.notify_all()
+
+            with cls._lock:
+                cls._stop_event = threading.Event()
+                cls._camera_id = camera_id
+                cls._idle_timeout_s = cls.IDLE_TIMEOUT_S if idle_timeout_s is None else idle_timeout_s
+                cls._last_used = time.time()
+                cls._started_at = time.time()
+                cls._frames_read = 0
+                cls._last_error = None
+                cls._thread = threading.Thread(
+                    target=cls._run,
+                    args=(camera_id, cls._stop_event),
+                    name=f"capture-daemon-{camera_id}",
+                    daemon=True,
+                )
+                cls._thread.start()
+        finally:
+            with cls._lock:
+                cls._starting = False
+                cls._state_changed.notify_all()
+
+        logger.info(f"Daemon de captura iniciado (cámara {camera_id}, ring de {cls.RING_SIZE} frames)")
+        return True
+
+    @classmethod
+    def stop(cls, timeout: float = 5.0) -> bool:
+        """Detiene el hilo y libera la cámara. Devuelve False si no corría."""
+        with cls._lock:
+            while cls._starting:
+                cls._state_changed.wait()
+            thread = cls._thread
+            if thread is None:
+                return False
+            cls._stop_event.set()
+
+        thread.join(timeout=timeout)
+        with cls._lock:
+            if cls._thread is thread:
+                cls._thread = None
+        with cls._new_frame:
+            cls._frames.clear()
+            cls._new_frame.notify_all()
+        return True
+
+    @classmethod
+    def is_running(cls, camera_id: Optional[int] = None) -> bool:
+        thread = cls._thread
+        running = thread is not None and thread.is_alive() and not cls._stop_event.is_set()
+        if running and camera_id is not None:
+            return cls._camera_id == camera_id
+        return running
+
+    @classmethod
+    def frame_at(cls, trigger_ts: Optional[float] = None, timeout: float = 1.0) -> Optional[Any]:
+        """Devuelve el frame más cercano a ``trigger_ts`` (epoch; None = ahora).
+
+        Si el disparo es posterior al último frame, espera hasta ``timeout``
+        a que llegue uno nuevo. None si el daemon no tiene frames.
+        """
+        trigger = time.time() if trigger_ts is None else trigger_ts
+        deadline = time.monotonic() + timeout
+        cls._last_used = time.time()
+
+        with cls._new_frame:
+            while not cls._frames or cls._frames[-1][0] < trigger:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not cls.is_running():
+                    break
+                cls._new_frame.wait(remaining)
+
+            if not cls._frames:
+                return None
+            _, frame = min(cls._frames, key=lambda item: abs(item[0] - trigger))
+            cls._captures += 1
+            # El hilo nunca escribe sobre un frame ya publicado (read() asigna uno nuevo)
+            return frame
+
+    @classmethod
+    def touch(cls) -> None:
+        """Marca uso (p. ej. un cliente de live view) para no caer en idle timeout."""
+        cls._last_used = time.time()
+
+    @classmethod
+    def wait_next_frame(cls, after_ts: float, timeout: float = 1.0) -> Optional[TimedFrame]:
+        """Espera un frame posterior a ``after_ts``; None si no llega a tiempo."""
+        deadline = time.monotonic() + timeout
+        with cls._new_frame:
+            while not cls._frames or cls._frames[-1][0] <= after_ts:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not cls.is_running():
+                    return None
+                cls._new_frame.wait(remaining)
+            return cls._frames[-1]
+
+    @classmethod
+    def _run(cls, camera_id: int, stop_event: threading.Event) -> None:
+        from app.services.camera_service import CameraService  # lazy import to avoid cycles
+
+        cap = None
+        failures = 0
+        try:
+            cap = CameraService._open_device(camera_id)
+            while not stop_event.is_set():
+                if cls._idle_timeout_s > 0 and time.time() - cls._last_used > cls._idle_timeout_s:
+                    logger.info(f"Daemon de captura inactivo {cls._idle_timeout_s:.0f}s; liberando cámara {camera_id}")
+                    break
+
+                ret, frame = cap.read()
+                if not ret or frame is None:
+                    failures += 1
+                    if failures >= cls.READ_FAILURES_BEFORE_STOP:
+                        raise RuntimeError(f"La cámara {camera_id} dejó de entregar frames")
+                    time.sleep(0.05)
+                    continue
+
+                failures = 0
+                with cls._new_frame:
+                    cls._frames.append((time.time(), frame))
+                    cls._frames_read += 1
+                    cls._new_frame.notify_all()
+        except Exception as exc:
+            cls._last_error = str(exc)
+            logger.error(f"Daemon de captura detenido por error: {exc}")
+        finally:
+            if cap is not None:
+                cap.release()
+            stop_event.set()
+            with cls._new_frame:
+                cls._frames.clear()
+                cls._new_frame.notify_all()
+
+    @classmethod
+    def status(cls) -> dict:
+        with cls._new_frame:
+            latest = cls._frames[-1][0] if cls._frames else None
+            buffered = len(cls._frames)
+        running = cls.is_running()
+        return {
+            "running": running,
+            "camera_id": cls._camera_id if running else None,
+            "ring_size": cls.RING_SIZE,
+            "buffered_frames": buffered,
+            "latest_frame_age_ms": round((time.time() - latest) * 1000) if latest else None,
+            "idle_timeout_s": cls._idle_timeout_s,
+            "frames_read": cls._frames_read,
+            "captures": cls._captures,
+            "started_at": cls._started_at if running else None,
+            "last_error": cls._last_error,
+        }
+
+
+__all__ = [
+    "CaptureDaemon",
+]
@@ -0,0 +1,189 @@
+"""
+Gestión de color para impresión (ICC)
+
+Las impresoras dye-sub necesitan convertir el sRGB del strip al perfil ICC
+de la impresora; sin esto los operadores ajustan los diseños a mano. La
+conversión es opcional y se aplica al final de la composición, sobre el
+canvas ya armado (strip y página dual), nunca a los previews.
+
+- Perfil por impresora: ``Settings.printer_icc_profiles`` (nombre de
+  impresora -> ruta .icc/.icm; "*" aplica a cualquier impresora) y el
+  intent de ``Settings.icc_rendering_intent``.
+- Compilar un transform de littleCMS cuesta decenas de ms: se compila una
+  vez por (perfil de entrada, perfil de salida, intent, modo) en cada
+  proceso y se reutiliza desde un cache LRU. La clave incluye el mtime del
+  archivo ICC, así que reemplazar el perfil invalida el transform.
+
+ImageCms es opcional (Pillow sin littleCMS): sin él la conversión se omite
+con un aviso y el strip sale en sRGB como siempre.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+from app.config import COLOR_MANAGEMENT_CONFIG, DATA_DIR
+from app.logging_config import logger
+
+try:
+    from PIL import ImageCms
+except ImportError:  # pragma: no cover - depende del build de Pillow
+    ImageCms = None
+
+SRGB_PROFILE = "sRGB"
+
+RENDERING_INTENTS = {
+    "perceptual": 0,
+    "relative_colorimetric": 1,
+    "saturation": 2,
+    "absolute_colorimetric": 3,
+}
+
+# (perfil de entrada, (perfil de salida, mtime), intent, modo)
+TransformKey = Tuple[str, Tuple[str, int], int, str]
+
+
+class ColorManagement:
+    """Conversión sRGB -> perfil de impresora con transforms cacheados."""
+
+    ENABLED: bool = COLOR_MANAGEMENT_CONFIG["enabled"]
+    MAX_TRANSFORMS: int = COLOR_MANAGEMENT_CONFIG["transform_cache_entries"]
+
+    _transforms: "OrderedDict[TransformKey, Any]" = OrderedDict()
+    _builds: int = 0
+    _hits: int = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        return ImageCms is not None
+
+    @staticmethod
+    def resolve_profile_path(profile: str) -> Path:
+        """Rutas relativas se interpretan dentro de DATA_DIR."""
+        path = Path(profile).expanduser()
+        return path if path.is_absolute() else DATA_DIR / path
+
+    @staticmethod
+    def resolve(settings: Any, printer_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Conversión a aplicar para una impresora (corre en el proceso principal).
+
+        Args:
+            settings: Settings actuales
+            printer_name: Impresora destino (None = ``settings.default_printer``)
+
+        Returns:
+            Dict serializable para los workers (``output_profile``, ``intent``)
+            o None si no hay perfil configurado o no se puede usar.
+        """
+        if not ColorManagement.ENABLED:
+            return None
+
+        profiles = getattr(settings, "printer_icc_profiles", None) or {}
+        if not profiles:
+            return None
+
+        printer = printer_name or getattr(settings, "default_printer", None)
+        profile = profiles.get(printer) if printer else None
+        profile = profile or profiles.get("*")
+        if not profile:
+            return None
+
+        if not ColorManagement.available():
+            print("⚠️ Pillow sin soporte ImageCms (littleCMS); se omite la conversión ICC.")
+            return None
+
+        profile_path = ColorManagement.resolve_profile_path(profile)
+        if not profile_path.is_file():
+            print(f"⚠️ Perfil ICC no encontrado para '{printer or '*'}': {profile_path}")
+            return None
+
+        intent = getattr(settings, "icc_rendering_intent", "perceptual")
+        return {
+            "output_profile": str(profile_path),
+            "intent": RENDERING_INTENTS.get(intent, RENDERING_INTENTS["perceptual"]),
+        }
+
+    @classmethod
+    def _get_transform(cls, output_profile: str, intent: int, mode: str) -> Any:
+        """Devuelve el transform compilado (del cache o recién compilado)."""
+        profile_path = Path(output_profile)
+        key: TransformKey = (
+            SRGB_PROFILE,
+            (str(profile_path), profile_path.stat().st_mtime_ns),
+            intent,
+            mode,
+        )
+
+        with cls._lock:
+            cached = cls._transforms.get(key)
+            if cached is not None:
+                cls._transforms.move_to_end(key)
+                cls._hits += 1
+                return cached
+
+        output = ImageCms.getOpenProfile(str(profile_path))
+        color_space = output.profile.xcolor_space.strip()
+        if color_space != "RGB":
+            raise ValueError(f"Perfil ICC {profile_path.name} no es RGB ({color_space})")
+
+        transform = ImageCms.buildTransform(
+            ImageCms.createProfile(SRGB_PROFILE),
+            output,
+            mode,
+            mode,
+            renderingIntent=intent,
+        )
+
+        with cls._lock:
+            existing = cls._transforms.get(key)
+            if existing is not None:
+                return existing
+            cls._transforms[key] = transform
+            cls._builds += 1
+            while len(cls._transforms) > cls.MAX_TRANSFORMS:
+                cls._transforms.popitem(last=False)
+        return transform
+
+    @classmethod
+    def apply(cls, image: Image.Image, color: Optional[Dict[str, Any]]) -> Image.Image:
+        """Convierte ``image`` al perfil de impresora, en sitio (corre en el worker).
+
+        Si la conversión falla se registra y el strip sigue en sRGB: un perfil
+        roto no debe dejar la sesión sin strip.
+        """
+        if not color or ImageCms is None:
+            return image
+
+        try:
+            transform = cls._get_transform(color["output_profile"], int(color["intent"]), image.mode)
+            ImageCms.applyTransform(image, transform, inPlace=True)
+        except Exception as exc:
+            logger.error(f"Error aplicando perfil ICC {color.get('output_profile')}: {exc}")
+        return image
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._transforms.clear()
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "available": cls.available(),
+                "enabled": cls.ENABLED,
+                "transforms": len(cls._transforms),
+                "builds": cls._builds,
+                "hits": cls._hits,
+            }
+
+
+__all__ = [
+    "ColorManagement",
+    "RENDERING_INTENTS",
+]
@@ -0,0 +1,267 @@
+"""
+Cache de resultados de composición direccionado por contenido
+
+Un mismo ComposeStripRequest (mismas fotos, mismo diseño, mismos parámetros
+del template) se recompone en reimpresiones, jobs reintentados y previews
+repetidos. Aquí se guarda cada artefacto generado (strip, página completa,
+previews) bajo un nombre derivado del contenido de la petición:
+
+- Clave: sha256 de los parámetros normalizados + (ruta, tamaño, mtime) de
+  cada foto y del diseño. Si un archivo cambia, la clave cambia.
+- Archivos: ``STRIPS_DIR/cache/<clave>.<artefacto>``, solo para resultados
+  de composición completos (strip y página)
+- Eviction LRU acotada por bytes totales (``COMPOSE_CACHE_CONFIG["max_mb"]``)
+- Previews (borrador o inline): LRU en memoria con la misma clave, acotado
+  por ``preview_memory_mb``; no escriben en disco
+- Contadores de hits/misses/stores/evictions en ``stats()``
+
+Solo el proceso principal usa este cache (los workers de composición no lo
+tocan). Los artefactos se copian, nunca se enlazan: el strip de una sesión
+puede sobrescribirse después sin corromper la entrada cacheada.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+from app.config import COMPOSE_CACHE_CONFIG, STRIPS_DIR
+from app.logging_config import logger
+
+
+class ComposeResultCache:
+    """Cache LRU en disco de strips y páginas ya compuestas (+ previews en memoria)."""
+
+    CACHE_DIR: Path = STRIPS_DIR / "cache"
+    ENABLED: bool = COMPOSE_CACHE_CONFIG["enabled"]
+    MAX_BYTES: int = COMPOSE_CACHE_CONFIG["max_mb"] * 1024 * 1024
+
+    # nombre de archivo -> bytes, en orden de uso (el más antiguo primero)
+    _index: Optional["OrderedDict[str, int]"] = None
+    _total_bytes: int = 0
+    _hits: int = 0
+    _misses: int = 0
+    _stores: int = 0
+    _evictions: int = 0
+    _lock = threading.Lock()
+
+    PREVIEW_MAX_BYTES: int = COMPOSE_CACHE_CONFIG["preview_memory_mb"] * 1024 * 1024
+    # "<clave>.<artefacto>" -> bytes del preview, en orden de uso
+    _previews: "OrderedDict[str, bytes]" = OrderedDict()
+    _preview_bytes: int = 0
+    _preview_hits: int = 0
+    _preview_misses: int = 0
+
+    @staticmethod
+    def make_key(params: Dict[str, Any], input_paths: Iterable[Path]) -> Optional[str]:
+        """Calcula la clave de una composición.
+
+        Args:
+            params: Parámetros de composición ya normalizados (sin rutas)
+            input_paths: Fotos y diseño, en el orden en que se usan
+
+        Returns:
+            Hex sha256, o None si algún archivo de entrada no existe
+        """
+        if not ComposeResultCache.ENABLED:
+            return None
+
+        digest = hashlib.sha256()
+        normalized = {key: value for key, value in params.items() if value is not None}
+        digest.update(json.dumps(normalized, sort_keys=True, default=str).encode("utf-8"))
+
+        for path in input_paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                return None
+            digest.update(f"\n{path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8"))
+
+        return digest.hexdigest()
+
+    @classmethod
+    def _ensure_index_locked(cls) -> "OrderedDict[str, int]":
+        if cls._index is not None:
+            return cls._index
+
+        cls.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for entry in cls.CACHE_DIR.iterdir():
+            if not entry.is_file() or entry.name.startswith("."):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        # mtime = último uso (se actualiza en cada hit)
+        entries.sort()
+        cls._index = OrderedDict((name, size) for _, name, size in entries)
+        cls._total_bytes = sum(cls._index.values())
+        return cls._index
+
+    @classmethod
+    def lookup(cls, key: Optional[str], artifact: str) -> Optional[Path]:
+        """Devuelve la ruta cacheada del artefacto o None (miss)."""
+        if key is None:
+            return None
+
+        name = f"{key}.{artifact}"
+        with cls._lock:
+            index = cls._ensure_index_locked()
+            if name not in index:
+                cls._misses += 1
+                return None
+
+            path = cls.CACHE_DIR / name
+            if not path.exists():
+                # Borrado desde fuera: olvidar la entrada
+                cls._total_bytes -= index.pop(name)
+                cls._misses += 1
+                return None
+
+            index.move_to_end(name)
+            cls._hits += 1
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    @classmethod
+    def store(cls, key: Optional[str], artifact: str, source: Union[Path, bytes]) -> Optional[Path]:
+        """Guarda un artefacto (copia de archivo o bytes) bajo su nombre de contenido."""
+        if key is None:
+            return None
+
+        name = f"{key}.{artifact}"
+        target = cls.CACHE_DIR / name
+        try:
+            cls.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            if isinstance(source, bytes):
+                tmp = cls.CACHE_DIR / f".{name}.{uuid.uuid4().hex[:8]}.tmp"
+                tmp.write_bytes(source)
+                os.replace(tmp, target)
+            else:
+                cls.copy_atomic(source, target)
+            size = target.stat().st_size
+        except OSError as exc:
+            logger.warning(f"No se pudo guardar {artifact} en cache de composición: {exc}")
+            return None
+
+        with cls._lock:
+            index = cls._ensure_index_locked()
+            cls._total_bytes -= index.pop(name, 0)
+            index[name] = size
+            cls._total_bytes += size
+            cls._stores += 1
+            cls._evict_locked()
+        return target
+
+    @classmethod
+    def _evict_locked(cls) -> None:
+        """Elimina los artefactos menos usados hasta respetar MAX_BYTES."""
+        index = cls._index
+        if index is None:
+            return
+        while index and cls._total_bytes > cls.MAX_BYTES and len(index) > 1:
+            name, size = index.popitem(last=False)
+            cls._total_bytes -= size
+            cls._evictions += 1
+            try:
+                (cls.CACHE_DIR / name).unlink()
+            except OSError:
+                pass
+
+    @classmethod
+    def lookup_preview(cls, key: Optional[str], artifact: str) -> Optional[bytes]:
+        """Bytes de un preview cacheado en memoria, o None (miss)."""
+        if key is None:
+            return None
+        name = f"{key}.{artifact}"
+        with cls._lock:
+            content = cls._previews.get(name)
+            if content is None:
+                cls._preview_misses += 1
+                return None
+            cls._previews.move_to_end(name)
+            cls._preview_hits += 1
+            return content
+
+    @classmethod
+    def store_preview(cls, key: Optional[str], artifact: str, content: bytes) -> None:
+        """Guarda un preview en el LRU en memoria (nunca en disco)."""
+        if key is None or len(content) > cls.PREVIEW_MAX_BYTES:
+            return
+        name = f"{key}.{artifact}"
+        with cls._lock:
+            previous = cls._previews.pop(name, None)
+            if previous is not None:
+                cls._preview_bytes -= len(previous)
+            cls._previews[name] = content
+            cls._preview_bytes += len(content)
+            while cls._preview_bytes > cls.PREVIEW_MAX_BYTES:
+                _, evicted = cls._previews.popitem(last=False)
+                cls._preview_bytes -= len(evicted)
+
+    @staticmethod
+    def copy_atomic(source: Path, destination: Path) -> Path:
+        """Copia ``source`` a ``destination`` sin exponer un archivo a medias."""
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destination.with_name(f".{destination.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            shutil.copyfile(source, tmp)
+            os.replace(tmp, destination)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return destination
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            index = cls._ensure_index_locked()
+            for name in list(index):
+                try:
+                    (cls.CACHE_DIR / name).unlink()
+                except OSError:
+                    pass
+            index.clear()
+            cls._total_bytes = 0
+            cls._previews.clear()
+            cls._preview_bytes = 0
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            index = cls._ensure_index_locked() if cls.ENABLED else OrderedDict()
+            lookups = cls._hits + cls._misses
+            return {
+                "enabled": cls.ENABLED,
+                "entries": len(index),
+                "bytes": cls._total_bytes,
+                "max_bytes": cls.MAX_BYTES,
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "hit_ratio": round(cls._hits / lookups, 3) if lookups else None,
+                "stores": cls._stores,
+                "evictions": cls._evictions,
+                "preview_entries": len(cls._previews),
+                "preview_bytes": cls._preview_bytes,
+                "preview_max_bytes": cls.PREVIEW_MAX_BYTES,
+                "preview_hits": cls._preview_hits,
+                "preview_misses": cls._preview_misses,
+            }
+
+
+__all__ = [
+    "ComposeResultCache",
+]
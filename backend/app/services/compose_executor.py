@@ -0,0 +1,147 @@
+"""
+Executor de composición en procesos
+
+PIL libera el GIL solo en partes del trabajo; componer varias tiras a la vez
+en hilos termina serializado en un solo núcleo. Este executor envía cada
+composición a un ProcessPoolExecutor compartido por los endpoints síncronos,
+los previews y el worker de ImageJobQueueService.
+
+- ``workers``: número de procesos (0 = componer en el mismo proceso, modo
+  de bajo consumo)
+- ``max_tasks_per_child``: recicla cada proceso tras N tareas para acotar
+  la memoria (fragmentación de PIL, caches por proceso)
+- Proceso caído (p. ej. OOM) durante una tarea: ``run`` recrea el pool y
+  lanza ``ComposeWorkerCrashed``; solo ``run_idempotent`` la reintenta una
+  vez, para tareas que pueden repetirse sin efectos a medias (escriben con
+  archivo temporal + rename o no escriben)
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, TypeVar
+
+from app.config import COMPOSE_EXECUTOR_CONFIG
+
+# Mismo logger "app" que logging_config, sin importarlo: los procesos hijos
+# importan este módulo y no deben abrir su propio handler de archivo rotativo.
+logger = logging.getLogger("app")
+
+T = TypeVar("T")
+
+
+class ComposeWorkerCrashed(RuntimeError):
+    """El proceso que corría la composición terminó inesperadamente."""
+
+
+class ComposeExecutor:
+    """Pool de procesos perezoso y compartido para composiciones."""
+
+    WORKERS: int = COMPOSE_EXECUTOR_CONFIG["workers"]
+    MAX_TASKS_PER_CHILD: int = COMPOSE_EXECUTOR_CONFIG["max_tasks_per_child"]
+
+    _pool: Optional[ProcessPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def worker_count(cls) -> int:
+        """Número de composiciones que pueden correr en paralelo."""
+        return max(1, cls.WORKERS)
+
+    @classmethod
+    def _get_pool(cls) -> Optional[ProcessPoolExecutor]:
+        if cls.WORKERS <= 0:
+            return None
+
+        with cls._lock:
+            if cls._pool is None:
+                # spawn en todas las plataformas: mismo comportamiento que en
+                # Windows y sin heredar hilos/locks del servidor con fork
+                cls._pool = ProcessPoolExecutor(
+                    max_workers=cls.WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=cls.MAX_TASKS_PER_CHILD or None,
+                )
+                logger.info(
+                    f"Compose executor iniciado: {cls.WORKERS} proceso(s), "
+                    f"reciclado cada {cls.MAX_TASKS_PER_CHILD} tareas"
+                )
+            return cls._pool
+
+    @classmethod
+    def submit(cls, fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        """Envía ``fn`` al pool. Sin pool, se ejecuta inline y se devuelve un Future resuelto."""
+        pool = cls._get_pool()
+        if pool is not None:
+            try:
+                return pool.submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                # Un proceso murió (p. ej. OOM): recrear el pool una vez
+                logger.warning("Compose executor roto, recreando pool")
+                cls._reset_pool()
+                pool = cls._get_pool()
+                if pool is not None:
+                    return pool.submit(fn, *args, **kwargs)
+
+        future: "Future[T]" = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    @classmethod
+    def run(cls, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Envía ``fn`` al pool y espera su resultado (bloqueante).
+
+        Raises:
+            ComposeWorkerCrashed: si el proceso murió durante la tarea (el pool
+                queda recreado para la próxima)
+        """
+        future = cls.submit(fn, *args, **kwargs)
+        try:
+            return future.result()
+        except BrokenProcessPool as exc:
+            cls._reset_pool()
+            raise ComposeWorkerCrashed("El proceso de composición terminó inesperadamente") from exc
+
+    @classmethod
+    def run_idempotent(cls, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Como ``run``, pero reintenta una vez si el proceso murió.
+
+        Solo para tareas idempotentes: sus salidas se escriben con archivo
+        temporal + rename, así un intento cortado no deja archivos a medias.
+        """
+        try:
+            return cls.run(fn, *args, **kwargs)
+        except ComposeWorkerCrashed:
+            logger.warning("Proceso de composición terminó inesperadamente, reintentando una vez")
+            return cls.run(fn, *args, **kwargs)
+
+    @classmethod
+    def start(cls) -> None:
+        """Crea el pool por adelantado para no pagar el arranque en la primera tira."""
+        cls._get_pool()
+
+    @classmethod
+    def _reset_pool(cls) -> None:
+        with cls._lock:
+            pool, cls._pool = cls._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        with cls._lock:
+            pool, cls._pool = cls._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+__all__ = [
+    "ComposeExecutor",
+    "ComposeWorkerCrashed",
+]
@@ -0,0 +1,213 @@
+"""
+Cache en memoria de overlays de diseño
+
+Cada strip de un evento usa el mismo PNG del template. Decodificarlo y
+redimensionarlo con LANCZOS en cada composición es trabajo repetido, así que
+aquí se guarda el overlay ya decodificado y redimensionado.
+
+Los diseños con transparencia (marcos de Canva) se guardan como capa RGB +
+máscara de alfa: se redimensionan en alfa premultiplicado (sin halos oscuros
+en los bordes) y se pegan con máscara, así las fotos se ven a través de las
+zonas transparentes. Diseños opacos no llevan máscara.
+
+- Clave: (ruta, mtime, tamaño objetivo, modo de ajuste, resampler)
+- Eviction LRU acotada por número de entradas y por píxeles totales
+- Tamaños originales (solo cabecera): una entrada por ruta, LRU con el mismo
+  límite de entradas; un diseño editado reemplaza su entrada anterior
+- Thread-safe (el worker de jobs y los endpoints comparten proceso)
+
+Las imágenes devueltas son compartidas: los llamadores solo deben leerlas
+(``canvas.paste(layer, box, mask)``), nunca cerrarlas ni modificarlas.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from app.config import IMAGE_CONFIG
+
+CacheKey = Tuple[str, int, Tuple[int, int], str, int]
+# (capa RGB, máscara L o None si el diseño es opaco)
+OverlayLayer = Tuple[Image.Image, Optional[Image.Image]]
+
+
+class DesignOverlayCache:
+    """Cache LRU de overlays listos para pegar en el canvas."""
+
+    MAX_ENTRIES: int = IMAGE_CONFIG["design_cache_entries"]
+    MAX_PIXELS: int = IMAGE_CONFIG["design_cache_max_pixels"]
+
+    _entries: "OrderedDict[CacheKey, OverlayLayer]" = OrderedDict()
+    # ruta -> (mtime, (ancho, alto)), en orden de uso
+    _source_sizes: "OrderedDict[str, Tuple[int, Tuple[int, int]]]" = OrderedDict()
+    _total_pixels: int = 0
+    _hits: int = 0
+    _misses: int = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _mtime_ns(design_path: Path) -> int:
+        return design_path.stat().st_mtime_ns
+
+    @classmethod
+    def get_source_size(cls, design_path: Path) -> Tuple[int, int]:
+        """Devuelve (ancho, alto) original del diseño sin decodificar píxeles."""
+        path_key = str(design_path)
+        mtime_ns = cls._mtime_ns(design_path)
+        with cls._lock:
+            cached = cls._source_sizes.get(path_key)
+            if cached is not None and cached[0] == mtime_ns:
+                cls._source_sizes.move_to_end(path_key)
+                return cached[1]
+
+        # Image.open solo lee la cabecera; no decodifica el PNG completo
+        with Image.open(design_path) as design:
+            size = design.size
+
+        if size[0] <= 0 or size[1] <= 0:
+            raise ValueError("Design image has invalid dimensions")
+
+        with cls._lock:
+            cls._source_sizes[path_key] = (mtime_ns, size)
+            cls._source_sizes.move_to_end(path_key)
+            while len(cls._source_sizes) > max(1, cls.MAX_ENTRIES):
+                cls._source_sizes.popitem(last=False)
+        return size
+
+    @classmethod
+    def get_overlay(
+        cls,
+        design_path: Path,
+        target_size: Tuple[int, int],
+        fit_mode: str = "fit",
+        resample: Image.Resampling = Image.Resampling.LANCZOS,
+    ) -> OverlayLayer:
+        """Devuelve el diseño decodificado y redimensionado como (capa RGB, máscara).
+
+        La máscara es None cuando el diseño no tiene píxeles transparentes.
+
+        Args:
+            design_path: Ruta del PNG/JPG del diseño
+            target_size: (ancho, alto) final en el canvas
+            fit_mode: "band", "fit" o "stretch"; forma parte de la clave
+            resample: filtro de redimensionado (BILINEAR para previews borrador)
+        """
+        key: CacheKey = (
+            str(design_path),
+            cls._mtime_ns(design_path),
+            (int(target_size[0]), int(target_size[1])),
+            fit_mode,
+            int(resample),
+        )
+
+        with cls._lock:
+            cached = cls._entries.get(key)
+            if cached is not None:
+                cls._entries.move_to_end(key)
+                cls._hits += 1
+                return cached
+            cls._misses += 1
+
+        overlay = cls._render_overlay(design_path, key[2], resample)
+
+        with cls._lock:
+            # Otro hilo pudo haberlo insertado mientras renderizábamos
+            existing = cls._entries.get(key)
+            if existing is not None:
+                cls._entries.move_to_end(key)
+                return existing
+
+            cls._entries[key] = overlay
+            cls._total_pixels += cls._layer_pixels(overlay)
+            cls._evict_locked()
+        return overlay
+
+    @staticmethod
+    def _layer_pixels(overlay: OverlayLayer) -> int:
+        layer, mask = overlay
+        pixels = layer.width * layer.height
+        # La máscara L pesa 1/4 de una capa RGB(X)
+        if mask is not None:
+            pixels += (mask.width * mask.height) // 4
+        return pixels
+
+    @staticmethod
+    def _render_overlay(
+        design_path: Path,
+        target_size: Tuple[int, int],
+        resample: Image.Resampling,
+    ) -> OverlayLayer:
+        with Image.open(design_path) as design:
+            has_alpha = design.mode in ("RGBA", "LA", "PA") or (
+                design.mode == "P" and "transparency" in design.info
+            )
+            if has_alpha:
+                # Redimensionar en alfa premultiplicado: el color de los píxeles
+                # transparentes no se mezcla en los bordes
+                working = design.convert("RGBa")
+            elif design.mode != "RGB":
+                working = design.convert("RGB")
+            else:
+                working = design.copy()
+
+        if working.size != target_size:
+            resized = working.resize(target_size, resample)
+            working.close()
+        else:
+            resized = working
+
+        if resized.mode != "RGBa":
+            return resized, None
+
+        straight = resized.convert("RGBA")
+        resized.close()
+        alpha = straight.getchannel("A")
+        low, _ = alpha.getextrema()
+        layer = straight.convert("RGB")
+        straight.close()
+
+        if low == 255:
+            # Totalmente opaco: pegar sin máscara
+            alpha.close()
+            return layer, None
+        return layer, alpha
+
+    @classmethod
+    def _evict_locked(cls) -> None:
+        """Elimina las entradas menos usadas hasta respetar los límites."""
+        while cls._entries and (
+            len(cls._entries) > cls.MAX_ENTRIES or cls._total_pixels > cls.MAX_PIXELS
+        ):
+            # Conservar siempre la entrada recién insertada
+            if len(cls._entries) == 1:
+                break
+            _, evicted = cls._entries.popitem(last=False)
+            cls._total_pixels -= cls._layer_pixels(evicted)
+            # No cerramos la imagen: un hilo podría estar pegándola todavía
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._entries.clear()
+            cls._source_sizes.clear()
+            cls._total_pixels = 0
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "entries": len(cls._entries),
+                "source_sizes": len(cls._source_sizes),
+                "pixels": cls._total_pixels,
+                "hits": cls._hits,
+                "misses": cls._misses,
+            }
+
+
+__all__ = [
+    "DesignOverlayCache",
+]
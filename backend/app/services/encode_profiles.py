@@ -0,0 +1,96 @@
+"""
+Perfiles de codificación JPEG
+
+Cada artefacto (strip, full_strip, preview, draft_preview, design) se guarda
+con un perfil con nombre de ``ENCODE_PROFILES``: calidad, subsampling,
+optimize (segunda pasada de Huffman) y progressive. El mapeo artefacto ->
+perfil sale de ``ARTIFACT_ENCODE_PROFILES`` y el preset activo puede
+sobrescribirlo con su campo ``encode_profiles``.
+
+Los perfiles se resuelven en el proceso principal y viajan como dicts a los
+workers de composición (no leen presets).
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from app.config import ARTIFACT_ENCODE_PROFILES, ENCODE_PROFILES
+
+DEFAULT_PROFILE = "print"
+
+
+class EncodeProfiles:
+    """Resolución de perfiles de codificación por artefacto."""
+
+    @staticmethod
+    def get(name: Optional[str]) -> Dict[str, Any]:
+        """Devuelve la configuración de un perfil (``print`` si no existe)."""
+        profile = ENCODE_PROFILES.get((name or "").strip().lower())
+        if profile is None:
+            if name:
+                print(f"⚠️ Perfil de codificación '{name}' desconocido. Usando '{DEFAULT_PROFILE}'.")
+            profile = ENCODE_PROFILES[DEFAULT_PROFILE]
+        return dict(profile)
+
+    @staticmethod
+    def _preset_overrides() -> Dict[str, str]:
+        try:
+            from app.api.presets import get_active_preset  # lazy import to avoid cycles
+
+            preset = get_active_preset()
+        except Exception as exc:
+            print(f"⚠️ No se pudo leer el preset activo para perfiles de codificación: {exc}")
+            return {}
+        return dict(preset.encode_profiles or {}) if preset else {}
+
+    @staticmethod
+    def profile_name(artifact: str, overrides: Optional[Dict[str, str]] = None) -> str:
+        """Nombre del perfil de un artefacto (preset activo > config)."""
+        if overrides is None:
+            overrides = EncodeProfiles._preset_overrides()
+        name = overrides.get(artifact) or ARTIFACT_ENCODE_PROFILES.get(artifact, DEFAULT_PROFILE)
+        return name if name in ENCODE_PROFILES else DEFAULT_PROFILE
+
+    @staticmethod
+    def for_artifact(artifact: str, profiles: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Configuración de codificación para un artefacto.
+
+        ``profiles`` es el mapeo de ``resolved()``: quien codifica varios
+        artefactos lo resuelve una vez y no relee el preset por cada uno.
+        """
+        if profiles is None:
+            return EncodeProfiles.get(EncodeProfiles.profile_name(artifact))
+        return EncodeProfiles.get(profiles.get(artifact) or EncodeProfiles.profile_name(artifact, {}))
+
+    @staticmethod
+    def resolved() -> Dict[str, str]:
+        """Mapeo artefacto -> perfil efectivo (para claves de cache y diagnóstico)."""
+        overrides = EncodeProfiles._preset_overrides()
+        return {
+            artifact: EncodeProfiles.profile_name(artifact, overrides)
+            for artifact in ARTIFACT_ENCODE_PROFILES
+        }
+
+    @staticmethod
+    def save_kwargs(profile: Dict[str, Any], image_format: str = "JPEG") -> Dict[str, Any]:
+        """Argumentos para ``Image.save`` según el perfil y el formato."""
+        image_format = image_format.upper()
+        if image_format == "WEBP":
+            # WebP solo usa la calidad; method=0 es el encoder más rápido
+            return {"format": "WEBP", "quality": profile["quality"], "method": 0}
+
+        kwargs: Dict[str, Any] = {
+            "format": "JPEG",
+            "quality": profile["quality"],
+            "subsampling": profile.get("subsampling", "4:2:0"),
+            "optimize": bool(profile.get("optimize", False)),
+            "progressive": bool(profile.get("progressive", False)),
+        }
+        if profile.get("dpi"):
+            kwargs["dpi"] = tuple(profile["dpi"])
+        return kwargs
+
+
+__all__ = [
+    "EncodeProfiles",
+]
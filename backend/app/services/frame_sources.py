@@ -0,0 +1,234 @@
+"""
+Fuentes de frames para CameraService
+
+``CameraService`` solo usa una parte chica de ``cv2.VideoCapture``:
+``isOpened`` / ``read`` / ``grab`` / ``set`` / ``get`` / ``release``. Aquí se
+elige qué objeto cumple esa interfaz según ``CAMERA_CONFIG["source"]``
+(env ``PHOTOBOOTH_CAMERA_SOURCE``):
+
+- ``device`` (default): la cámara real vía OpenCV.
+- ``synthetic[:WxH][@FPS]``: frames generados, sin hardware. Respeta la
+  resolución y el modo MJPEG que negocie ``_open_device`` y entrega frames
+  al ritmo de ``FPS`` como una webcam (``read`` bloquea hasta el próximo).
+- ``file:<ruta>``: reproduce un video en loop al ritmo de su fps.
+
+Sirve para medir latencias de captura (``python -m benchmarks.capture``) y
+correr daemon/ráfaga/live view en máquinas sin cámara.
+"""
+from __future__ import annotations
+
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import CAMERA_CONFIG
+
+_SYNTHETIC_RE = re.compile(r"^synthetic(?::(?P<width>\d+)x(?P<height>\d+))?(?:@(?P<fps>\d+(?:\.\d+)?))?$")
+
+MJPG_FOURCC = cv2.VideoWriter_fourcc(*"MJPG")
+YUYV_FOURCC = cv2.VideoWriter_fourcc(*"YUYV")
+
+
+class _PacedSource:
+    """Entrega frames como una cámara: como máximo ``fps`` por segundo."""
+
+    def __init__(self, fps: float):
+        self.fps = fps
+        self._next_frame_at = 0.0
+
+    def _wait_next_frame(self) -> None:
+        if self.fps <= 0:
+            return
+        now = time.monotonic()
+        if self._next_frame_at > now:
+            time.sleep(self._next_frame_at - now)
+            now = self._next_frame_at
+        # Si el lector se atrasó, el "sensor" no acumula frames viejos
+        self._next_frame_at = max(self._next_frame_at + 1.0 / self.fps, now)
+
+
+class SyntheticSource(_PacedSource):
+    """Frames generados con ruido y un patrón que se desplaza (cambian entre frames).
+
+    Los frames se generan una vez por resolución y formato (``PATTERN_FRAMES``
+    variantes, compartidas entre aperturas) y ``read`` entrega una copia, así
+    el costo de leer se parece al de copiar el buffer del driver y no al de
+    dibujar. En modo MJPEG las variantes se codifican a JPEG antes del primer
+    frame, como haría el hardware de la webcam.
+    """
+
+    PATTERN_FRAMES = 8
+
+    # (ancho, alto, mjpeg) -> variantes; la fuente se abre en cada captura única
+    _patterns: Dict[Tuple[int, int, bool], list] = {}
+
+    def __init__(self, width: int = 1280, height: int = 720, fps: float = 30.0):
+        super().__init__(fps)
+        self.width = width
+        self.height = height
+        self.fourcc = YUYV_FOURCC
+        self.convert_rgb = True
+        self._frames: list = []
+        self._index = 0
+        self._opened = True
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def set(self, prop: int, value: float) -> bool:
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = int(value)
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = float(value)
+        elif prop == cv2.CAP_PROP_FOURCC:
+            if int(value) not in (MJPG_FOURCC, YUYV_FOURCC):
+                return False
+            self.fourcc = int(value)
+        elif prop == cv2.CAP_PROP_CONVERT_RGB:
+            self.convert_rgb = bool(value)
+        elif prop != cv2.CAP_PROP_BUFFERSIZE:
+            return False
+        self._frames = []
+        return True
+
+    def get(self, prop: int) -> float:
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FOURCC: self.fourcc,
+            cv2.CAP_PROP_CONVERT_RGB: 1 if self.convert_rgb else 0,
+        }.get(prop, 0)
+
+    def _generate(self) -> list:
+        mjpeg = self.fourcc == MJPG_FOURCC and not self.convert_rgb
+        key = (self.width, self.height, mjpeg)
+        if key in self._patterns:
+            return self._patterns[key]
+
+        rng = np.random.default_rng(0)
+        base = np.zeros((self.height, self.width, 3), np.uint8)
+        base[..., 0] = np.linspace(40, 220, self.width, dtype=np.uint8)
+        base[..., 1] = np.linspace(60, 200, self.height, dtype=np.uint8)[:, None]
+        base[..., 2] = 128
+        frames = []
+        for index in range(self.PATTERN_FRAMES):
+            frame = base.copy()
+            offset = index * max(1, self.width // (4 * self.PATTERN_FRAMES))
+            cv2.circle(frame, (self.width // 4 + offset, self.height // 2), self.height // 5, (30, 200, 240), -1)
+            cv2.putText(frame, f"SmileBooth {index}", (40, self.height - 40), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+            # Ruido de sensor: sin él el JPEG sale irrealmente chico
+            frame = cv2.add(frame, rng.integers(0, 24, frame.shape, dtype=np.uint8))
+            if mjpeg:
+                frame = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].reshape(1, -1)
+            frames.append(frame)
+
+        self._patterns[key] = frames
+        return frames
+
+    def grab(self) -> bool:
+        self._wait_next_frame()
+        self._index = (self._index + 1) % self.PATTERN_FRAMES
+        return self._opened
+
+    def retrieve(self) -> Tuple[bool, Optional[Any]]:
+        if not self._opened:
+            return False, None
+        if not self._frames:
+            self._frames = self._generate()
+        # Copia: cada read() entrega un buffer nuevo, igual que OpenCV
+        return True, self._frames[self._index].copy()
+
+    def read(self) -> Tuple[bool, Optional[Any]]:
+        self.grab()
+        return self.retrieve()
+
+    def release(self) -> None:
+        self._opened = False
+        self._frames = []
+
+
+class VideoFileSource(_PacedSource):
+    """Reproduce un archivo de video en loop, al ritmo de su fps."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._cap = cv2.VideoCapture(str(path))
+        super().__init__(self._cap.get(cv2.CAP_PROP_FPS) or CAMERA_CONFIG["fps"])
+
+    def isOpened(self) -> bool:
+        return self._cap.isOpened()
+
+    def set(self, prop: int, value: float) -> bool:
+        # La resolución y el formato los fija el archivo
+        return False
+
+    def get(self, prop: int) -> float:
+        return self._cap.get(prop)
+
+    def grab(self) -> bool:
+        self._wait_next_frame()
+        if self._cap.grab():
+            return True
+        self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self._cap.grab()
+
+    def retrieve(self) -> Tuple[bool, Optional[Any]]:
+        return self._cap.retrieve()
+
+    def read(self) -> Tuple[bool, Optional[Any]]:
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self) -> None:
+        self._cap.release()
+
+
+class FrameSources:
+    """Abre la fuente configurada para un ``camera_id``."""
+
+    SPEC: str = CAMERA_CONFIG["source"]
+
+    @classmethod
+    def is_virtual(cls) -> bool:
+        return cls.SPEC != "device"
+
+    @classmethod
+    def open(cls, camera_id: int) -> Any:
+        """Objeto con la interfaz de ``cv2.VideoCapture`` (no configurado)."""
+        spec = cls.SPEC
+        if spec == "device":
+            return cv2.VideoCapture(camera_id)
+        if spec.startswith("file:"):
+            return VideoFileSource(Path(spec[len("file:"):]))
+
+        match = _SYNTHETIC_RE.match(spec)
+        if match is None:
+            raise ValueError(f"Fuente de cámara inválida: {spec!r}")
+        return SyntheticSource(
+            width=int(match.group("width") or CAMERA_CONFIG["width"]),
+            height=int(match.group("height") or CAMERA_CONFIG["height"]),
+            fps=float(match.group("fps") or CAMERA_CONFIG["fps"]),
+        )
+
+    @classmethod
+    def describe(cls) -> Tuple[str, str]:
+        """(path, nombre) de la fuente virtual para el registro de cámaras."""
+        if cls.SPEC.startswith("file:"):
+            return cls.SPEC[len("file:"):], "Video file replay"
+        return cls.SPEC, "Synthetic camera"
+
+
+__all__ = [
+    "MJPG_FOURCC",
+    "FrameSources",
+    "SyntheticSource",
+    "VideoFileSource",
+]
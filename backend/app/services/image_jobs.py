@@ -6,6 +6,7 @@ Inspired by PrintQueueService but scoped to image operations.
 from __future__ import annotations
 
 import json
+import threading
 import uuid
 from datetime import datetime
 from pathlib import Path
@@ -66,6 +67,8 @@ class ImageJobQueueService:
     MAX_JOBS = 200
     CLEANUP_DAYS = 7
     _worker_started = False
+    # Serializa lectura-modificación-escritura del JSON entre hilos
+    _lock = threading.RLock()
 
     @classmethod
     def _load(cls) -> Dict[str, ImageJobRecord]:
@@ -88,15 +91,16 @@ class ImageJobQueueService:
 
     @classmethod
     def add_compose_job(cls, payload: Dict[str, Any]) -> ImageJobRecord:
-        jobs = cls._load()
-        job = ImageJobRecord(job_type="compose-strip", payload=payload, status="pending")
-        jobs[job.job_id] = job
+        with cls._lock:
+            jobs = cls._load()
+            job = ImageJobRecord(job_type="compose-strip", payload=payload, status="pending")
+            jobs[job.job_id] = job
 
-        # Mantener tamaño acotado desde la creación
-        jobs = cls._bounded_jobs(jobs)
+            # Mantener tamaño acotado desde la creación
+            jobs = cls._bounded_jobs(jobs)
 
-        cls._save(jobs)
-        return job
+            cls._save(jobs)
+            return job
 
     @classmethod
     def get_job(cls, job_id: str) -> Optional[ImageJobRecord]:
@@ -111,20 +115,21 @@ class ImageJobQueueService:
         result: Optional[Dict[str, Any]] = None,
         error: Optional[str] = None,
     ) -> Optional[ImageJobRecord]:
-        jobs = cls._load()
-        job = jobs.get(job_id)
-        if not job:
-            return None
-        job.status = status
-        job.result = result
-        job.error = error
-        job.updated_at = datetime.now().isoformat()
+        with cls._lock:
+            jobs = cls._load()
+            job = jobs.get(job_id)
+            if not job:
+                return None
+            job.status = status
+            job.result = result
+            job.error = error
+            job.updated_at = datetime.now().isoformat()
 
-        # Aplicar límites al guardar
-        jobs = cls._bounded_jobs(jobs)
+            # Aplicar límites al guardar
+            jobs = cls._bounded_jobs(jobs)
 
-        cls._save(jobs)
-        return job
+            cls._save(jobs)
+            return job
 
     @classmethod
     def _bounded_jobs(cls, jobs: Dict[str, ImageJobRecord]) -> Dict[str, ImageJobRecord]:
@@ -153,73 +158,82 @@ class ImageJobQueueService:
     @classmethod
     def cleanup_old_jobs(cls) -> None:
         """Limpia jobs antiguos y mantiene el archivo ligero."""
-        jobs = cls._load()
-        if not jobs:
-            return
-        bounded = cls._bounded_jobs(jobs)
-        cls._save(bounded)
+        with cls._lock:
+            jobs = cls._load()
+            if not jobs:
+                return
+            bounded = cls._bounded_jobs(jobs)
+            cls._save(bounded)
 
     @classmethod
-    def process_pending_jobs(cls) -> None:
-        """Procesa un job pending si existe, actualizando su estado."""
-        jobs = cls._load()
-        if not jobs:
-            return
-
-        pending = [job for job in jobs.values() if job.status == "pending"]
-        if not pending:
-            return
+    def _claim_next_pending(cls) -> Optional[ImageJobRecord]:
+        """Marca como processing el job pending más antiguo y lo devuelve."""
+        with cls._lock:
+            jobs = cls._load()
+            pending = [job for job in jobs.values() if job.status == "pending"]
+            if not pending:
+                return None
+
+            pending.sort(key=lambda j: j.created_at)
+            job = pending[0]
+
+            job.status = "processing"
+            job.updated_at = datetime.now().isoformat()
+            jobs[job.job_id] = job
+            cls._save(cls._bounded_jobs(jobs))
+            return job
 
-        pending.sort(key=lambda j: j.created_at)
-        job = pending[0]
+    @classmethod
+    def process_pending_jobs(cls) -> bool:
+        """Procesa un job pending si existe, actualizando su estado.
 
-        job.status = "processing"
-        job.updated_at = datetime.now().isoformat()
-        jobs[job.job_id] = job
-        jobs = cls._bounded_jobs(jobs)
-        cls._save(jobs)
+        Returns:
+            True si se procesó un job (puede haber más en cola)
+        """
+        job = cls._claim_next_pending()
+        if job is None:
+            return False
 
         # Ejecutar composición con la misma lógica que el endpoint
         from app.api.image import ComposeStripRequest, _compose_strip_core  # lazy import to avoid cycles
         try:
             request_model = ComposeStripRequest(**job.payload)
         except Exception as exc:
-            job.status = "failed"
-            job.error = f"Payload inválido: {exc}"
-            job.updated_at = datetime.now().isoformat()
-            jobs[job.job_id] = job
-            cls._save(cls._bounded_jobs(jobs))
-            return
+            cls.update_status(job.job_id, "failed", error=f"Payload inválido: {exc}")
+            return True
 
+        # La composición corre fuera del lock: varios workers comparten el pool
         try:
             result = _compose_strip_core(request_model)
-            job.status = "completed"
-            job.result = result.model_dump()
-            job.error = None
+            cls.update_status(job.job_id, "completed", result=result.model_dump())
         except Exception as exc:
-            job.status = "failed"
-            job.error = str(exc)
-        finally:
-            job.updated_at = datetime.now().isoformat()
-            jobs[job.job_id] = job
-            cls._save(cls._bounded_jobs(jobs))
+            cls.update_status(job.job_id, "failed", error=str(exc))
+        return True
 
     @classmethod
     def start_worker(cls, interval_seconds: int = 1) -> None:
-        """Lanza un hilo en segundo plano que procesa jobs pending."""
+        """Lanza hilos en segundo plano que procesan jobs pending.
+
+        Se lanza un hilo por proceso del ComposeExecutor para que varios jobs
+        se compongan en paralelo.
+        """
         if cls._worker_started:
             return
         cls._worker_started = True
 
+        from app.services.compose_executor import ComposeExecutor
+
         def _loop():
             import time
             while True:
                 try:
-                    cls.process_pending_jobs()
+                    # Vaciar la cola sin dormir entre jobs
+                    if cls.process_pending_jobs():
+                        continue
                 except Exception as exc:  # pragma: no cover - defensivo
                     print(f"Error en worker de image jobs: {exc}")
                 time.sleep(interval_seconds)
 
-        import threading
-        thread = threading.Thread(target=_loop, name="image-jobs-worker", daemon=True)
-        thread.start()
+        for index in range(ComposeExecutor.worker_count()):
+            thread = threading.Thread(target=_loop, name=f"image-jobs-worker-{index}", daemon=True)
+            thread.start()
@@ -9,6 +9,8 @@ Características:
 - Sin magic numbers (todos los valores tienen nombres descriptivos)
 - Cálculo automático de altura del canvas
 - DRY: reutilización de constantes
+- Geometría compilada y memoizada en un LayoutPlan (ver layout_plan.py)
+- Decodificación paralela de las fotos de un strip (pool de hilos acotado)
 
 Clean Code Principles Applied:
 - Avoid magic numbers: todas las constantes con nombres claros
@@ -17,62 +19,48 @@ Clean Code Principles Applied:
 - One purpose per variable: cada variable tiene un propósito claro
 - Functions return results: no side effects, retorna Path
 """
-import gc
+import io
+import math
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
-from PIL import Image, ImageDraw, ImageFont, ImageOps, ImageEnhance
+from typing import Any, Dict, List, Optional, Tuple
+from PIL import Image
 
 from app.config import IMAGE_CONFIG, STRIPS_DIR, PHOTOS_DIR, get_photo_url
 from app.services.session_service import SessionService
-from app.models.template import (
-    DESIGN_POSITION_TOP,
-    DESIGN_POSITION_BOTTOM,
-    LAYOUT_VERTICAL_3,
-    LAYOUT_VERTICAL_4,
-    LAYOUT_VERTICAL_6,
-    LAYOUT_GRID_2X2,
-    OVERLAY_MODE_FREE,
-    OVERLAY_MODE_FOOTER,
-    get_layout_dimensions,
-)
-
-SUPPORTED_VERTICAL_LAYOUTS = {
-    LAYOUT_VERTICAL_3,
-    LAYOUT_VERTICAL_4,
-    LAYOUT_VERTICAL_6,
-}
-
-FOOTER_HEIGHT_RATIO = 0.18
-DEFAULT_TOP_MARGIN = 30
-DEFAULT_BOTTOM_MARGIN = 30
-DEFAULT_PHOTO_SPACING = 20  # Alineado con Template.photo_spacing y Settings.photo_spacing
-FOOTER_GAP_BELOW_LAST_PHOTO = 20  # Separación entre la última foto y el inicio del footer en modo footer
-HORIZONTAL_PHOTO_MARGIN = 25  # Margen lateral por lado para las fotos
-
-
-def hex_to_rgb(hex_color: str) -> tuple:
-    """
-    Convierte color hexadecimal a tupla RGB.
-    
-    Args:
-        hex_color: Color en formato hex (#RRGGBB o RRGGBB)
-        
-    Returns:
-        Tupla (R, G, B) con valores 0-255
-        
-    Example:
-        hex_to_rgb("#c60c0c") -> (198, 12, 12)
-        hex_to_rgb("ffffff") -> (255, 255, 255)
-    """
-    # Remover '#' si existe
-    hex_color = hex_color.lstrip('#')
-    
-    # Convertir a RGB
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+from app.services.color_management import ColorManagement
+from app.services.compose_executor import ComposeExecutor
+from app.services.design_cache import DesignOverlayCache
+from app.services.encode_profiles import EncodeProfiles
+from app.services.photo_filters import get_photo_filter
+from app.services.layout_plan import LayoutPlan, compile_layout_plan
+from app.services.page_canvas import new_canvas
+
+
+# Formatos aceptados para previews en memoria
+PREVIEW_FORMATS = ("JPEG", "WEBP")
+
+# Línea de corte entre las dos tiras de la página dual
+CUT_LINE_COLOR = (200, 200, 200)
+CUT_LINE_DASH_LENGTH = 10
+CUT_LINE_GAP = 20
 
 
 class ImageService:
     """Servicio ligero de composición de tiras"""
+
+    # Pool de hilos para decodificar/redimensionar las fotos de un mismo strip.
+    # PIL libera el GIL al decodificar y al remuestrear, así que N fotos se
+    # procesan en paralelo. Se crea perezosamente en cada proceso.
+    DECODE_THREADS: int = IMAGE_CONFIG["photo_decode_threads"]
+    _decode_pool: Optional[ThreadPoolExecutor] = None
+    _decode_pool_lock = threading.Lock()
+    # Guard de memoria: máximo de decodificaciones completas simultáneas
+    _decode_slots = threading.BoundedSemaphore(max(1, IMAGE_CONFIG["photo_decode_max_inflight"]))
     
     @staticmethod
     def compose_strip(
@@ -92,11 +80,20 @@ class ImageService:
         design_offset_y: Optional[float] = None,
         design_stretch: bool = False,
         photo_aspect_ratio: Optional[str] = None,
+        preview_scale: Optional[float] = None,
+        dual_strip: bool = False,
+        target_size: Optional[Tuple[int, int]] = None,
+        target_dpi: Optional[int] = None,
+        color: Optional[Dict[str, Any]] = None,
     ) -> Path:
         """
         Compone una tira de fotos + diseño personalizado.
         Soporta de 1 a 6 fotos dependiendo del layout.
         Optimizado para liberar memoria progresivamente.
+
+        La composición corre en el ComposeExecutor (pool de procesos); esta
+        llamada bloquea hasta que el strip está en disco y luego lo registra
+        en la sesión desde el proceso principal.
         
         Args:
             photo_paths: Lista de rutas de fotos
@@ -106,274 +103,440 @@ class ImageService:
             design_position: Posición del diseño ("top", "bottom")
             background_color: Color de fondo en hex (ej: "#ffffff")
             photo_spacing: Espaciado entre fotos en px
+            preview_scale: Si se indica (0-1), modo borrador: misma geometría
+                escalada, resampler BILINEAR y perfil de codificación "preview".
+            dual_strip: Si True, también guarda la página con 2 tiras
+                (``full_page_output_path``) en la misma pasada.
+            target_size: Render a resolución de impresora: tamaño exacto del
+                strip en píxeles de dispositivo (ver ``print_target_size``).
+                Las fotos se remuestrean una sola vez al tamaño final y el
+                spooler recibe el raster sin escalar.
+            target_dpi: DPI de la impresora, se escribe en el JPEG.
+            color: Conversión ICC resuelta por ``ColorManagement.resolve``;
+                se aplica al canvas final (strip y página dual).
         
         Returns:
             Path del strip generado
         """
-        # Fail fast: validar número de fotos
+        # Fail fast antes de cruzar al proceso worker
         if not photo_paths or len(photo_paths) > 6:
             raise ValueError(f"Se requieren entre 1 y 6 fotos, recibido: {len(photo_paths)}")
-        
-        # Configuración base (evitar magic numbers, usar defaults si no se proveen)
-        base_strip_width = IMAGE_CONFIG["strip_width"]
-        base_photo_height = IMAGE_CONFIG["photo_height"]
-        DESIGN_HEIGHT = IMAGE_CONFIG["design_height"]
-        TOP_MARGIN = DEFAULT_TOP_MARGIN
-        BOTTOM_MARGIN = DEFAULT_BOTTOM_MARGIN
-        PHOTO_SPACING = photo_spacing if photo_spacing is not None else DEFAULT_PHOTO_SPACING
 
-        
-        # Convertir color de fondo de hex a RGB (PIL requiere tupla RGB)
-        if background_color and background_color.startswith('#'):
-            BACKGROUND_COLOR = hex_to_rgb(background_color)
-            print(f"🎨 Color de fondo: {background_color} -> RGB{BACKGROUND_COLOR}")
-        elif background_color:
-            BACKGROUND_COLOR = background_color  # Ya es nombre de color o tupla
-            print(f"🎨 Color de fondo: {BACKGROUND_COLOR}")
+        # Perfiles de codificación: se resuelven aquí (preset activo) y viajan al worker
+        is_draft = preview_scale is not None and 0 < preview_scale < 1
+        if is_draft:
+            strip_artifact = "draft_preview"
+        elif session_id == "preview":
+            strip_artifact = "preview"
         else:
-            BACKGROUND_COLOR = 'white'  # Default
-            print(f"🎨 Color de fondo: white (default)")
-        
-        # Normalizar filtro de fotos
-        photo_filter_normalized = (photo_filter or "none").strip().lower()
+            strip_artifact = "strip"
+
+        profiles = EncodeProfiles.resolved()
+        encode = EncodeProfiles.for_artifact(strip_artifact, profiles)
+        full_page_encode = EncodeProfiles.for_artifact("full_strip", profiles) if dual_strip else None
+        if target_size is not None and target_dpi:
+            # El DPI del JPEG debe coincidir con la geometría de dispositivo
+            encode["dpi"] = (target_dpi, target_dpi)
+            if full_page_encode is not None:
+                full_page_encode["dpi"] = (target_dpi, target_dpi)
+
+        # Reintentable: el worker escribe strip y página con temporal + rename
+        output_path = ComposeExecutor.run_idempotent(
+            ImageService._compose_strip_local,
+            photo_paths=list(photo_paths),
+            design_path=design_path,
+            session_id=session_id,
+            layout=layout,
+            design_position=design_position,
+            background_color=background_color,
+            photo_spacing=photo_spacing,
+            photo_filter=photo_filter,
+            overlay_mode=overlay_mode,
+            design_scale=design_scale,
+            design_offset_x=design_offset_x,
+            design_offset_y=design_offset_y,
+            design_stretch=design_stretch,
+            photo_aspect_ratio=photo_aspect_ratio,
+            preview_scale=preview_scale,
+            dual_strip=dual_strip,
+            target_size=target_size,
+            color=color,
+            encode=encode,
+            full_page_encode=full_page_encode,
+        )
 
-        # Normalizar aspecto de foto solicitado (delegado al template)
-        aspect_clean = (photo_aspect_ratio or "auto").strip().lower()
-        aspect_ratio_value: Optional[float] = None
-        if aspect_clean in {"1:1", "1x1", "square"}:
-            aspect_ratio_value = 1.0
-        elif aspect_clean in {"3:4", "3x4"}:
-            aspect_ratio_value = 3.0 / 4.0
-
-        # Determinar layout soportado (solo verticales por ahora)
-        layout_clean = (layout or '').strip().lower()
-        layout_supported = layout_clean if layout_clean in SUPPORTED_VERTICAL_LAYOUTS else None
-        if layout_clean and not layout_supported and layout_clean != LAYOUT_GRID_2X2:
-            print(f"⚠️ layout '{layout}' no soportado aún. Usando layout dinámico por defecto.")
-
-        # Determinar posición válida del diseño (solo soportamos top/bottom por ahora)
-        design_position_normalized = (design_position or DESIGN_POSITION_BOTTOM).lower()
-        if design_position_normalized not in {DESIGN_POSITION_TOP, DESIGN_POSITION_BOTTOM}:
-            print(f"⚠️ design_position '{design_position}' no soportado. Usando 'bottom'.")
-            design_position_normalized = DESIGN_POSITION_BOTTOM
+        # Registrar strip en metadata de sesión (solo para sesiones reales)
+        if session_id and session_id != "preview":
+            strip_url = get_photo_url(output_path)
+            SessionService.set_strip(session_id, strip_url)
 
-        design_exists = bool(design_path and design_path.exists())
+        return output_path
 
-        overlay_mode_clean = (overlay_mode or OVERLAY_MODE_FREE).strip().lower()
-        if overlay_mode_clean not in {OVERLAY_MODE_FREE, OVERLAY_MODE_FOOTER}:
-            print(f"⚠️ overlay_mode '{overlay_mode}' no soportado. Usando 'free'.")
-            overlay_mode_clean = OVERLAY_MODE_FREE
-
-        # Modo overlay libre a pantalla completa: solo cuando overlay_mode es 'free'
-        # y al menos uno de los controles viene definido. Templates antiguos sin
-        # escala/offsets siguen usando la banda fija arriba/abajo.
-        use_free_overlay = bool(
-            design_exists
-            and overlay_mode_clean == OVERLAY_MODE_FREE
-            and (
-                design_scale is not None
-                or design_offset_x is not None
-                or design_offset_y is not None
-                or design_stretch  # Stretch también activa modo overlay
-            )
+    @staticmethod
+    def strip_output_path(session_id: Optional[str]) -> Path:
+        """Ruta final del strip: carpeta de sesión para nomenclatura consistente."""
+        output_dir = PHOTOS_DIR / session_id if session_id else STRIPS_DIR
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        output_filename = "strip.jpg" if session_id else "strip_preview.jpg"
+        return output_dir / output_filename
+
+    @staticmethod
+    def full_page_output_path(strip_path: Path) -> Path:
+        """Ruta de la página con dos tiras, junto al strip."""
+        return strip_path.parent / "full_strip.jpg"
+
+    @staticmethod
+    def restore_strip(cached_path: Path, session_id: Optional[str]) -> Path:
+        """Publica un strip ya compuesto (cache) como si se acabara de componer."""
+        from app.services.compose_cache import ComposeResultCache
+
+        output_path = ComposeResultCache.copy_atomic(
+            cached_path, ImageService.strip_output_path(session_id)
         )
-        is_footer_mode = bool(design_exists and overlay_mode_clean == OVERLAY_MODE_FOOTER)
-        use_legacy_band = bool(design_exists and not is_footer_mode and not use_free_overlay)
-
-        # Calcular dimensiones objetivo basadas en layout
-        strip_width = base_strip_width
-        target_strip_height = None
-        if layout_supported:
-            strip_width, target_strip_height = get_layout_dimensions(layout_supported)  # type: ignore[arg-type]
-
-        # Calcular altura total del canvas dinámicamente
-        num_photos = len(photo_paths)
-        # Reservar espacio vertical para el diseño cuando se usa banda fija
-        # legacy o el modo footer. En modo overlay libre no reservamos banda.
-        footer_height = 0
-        if design_exists:
-            if is_footer_mode:
-                if target_strip_height:
-                    footer_height = int(target_strip_height * FOOTER_HEIGHT_RATIO)
-                else:
-                    footer_height = DESIGN_HEIGHT
-                # Reservar siempre una pequeña banda de respiración entre fotos y footer
-                design_section_height = footer_height + FOOTER_GAP_BELOW_LAST_PHOTO
-            elif use_legacy_band:
-                # Mantener compat con banda legacy: diseño + pequeño espacio configurable
-                design_section_height = DESIGN_HEIGHT + PHOTO_SPACING
-            else:
-                design_section_height = 0
-        else:
-            design_section_height = 0
-
-        if target_strip_height:
-            available_height = target_strip_height - TOP_MARGIN - BOTTOM_MARGIN - design_section_height
-            available_for_photos = available_height - (PHOTO_SPACING * (num_photos - 1))
-            if available_for_photos <= 0:
-                print("⚠️ Altura insuficiente para fotos con layout fijo. Usando altura base.")
-                target_photo_height = base_photo_height
-                strip_height = TOP_MARGIN + (base_photo_height * num_photos) + (PHOTO_SPACING * (num_photos - 1)) + design_section_height + BOTTOM_MARGIN
-            else:
-                target_photo_height = int(available_for_photos / num_photos)
-                strip_height = target_strip_height
-        else:
-            target_photo_height = base_photo_height
-            total_photos_height = (target_photo_height * num_photos) + (PHOTO_SPACING * (num_photos - 1))
-            strip_height = TOP_MARGIN + total_photos_height + design_section_height + BOTTOM_MARGIN
+        if session_id and session_id != "preview":
+            SessionService.set_strip(session_id, get_photo_url(output_path))
+        return output_path
 
-        # Crear canvas con color de fondo personalizado
-        strip = Image.new('RGB', (strip_width, strip_height), BACKGROUND_COLOR)
+    @staticmethod
+    def _compose_strip_local(
+        photo_paths: List[Path],
+        design_path: Optional[Path] = None,
+        session_id: Optional[str] = None,
+        layout: Optional[str] = None,
+        design_position: Optional[str] = None,
+        background_color: Optional[str] = None,
+        photo_spacing: Optional[int] = None,
+        photo_filter: Optional[str] = None,
+        overlay_mode: Optional[str] = None,
+        design_scale: Optional[float] = None,
+        design_offset_x: Optional[float] = None,
+        design_offset_y: Optional[float] = None,
+        design_stretch: bool = False,
+        photo_aspect_ratio: Optional[str] = None,
+        preview_scale: Optional[float] = None,
+        dual_strip: bool = False,
+        target_size: Optional[Tuple[int, int]] = None,
+        color: Optional[Dict[str, Any]] = None,
+        encode: Optional[Dict[str, Any]] = None,
+        full_page_encode: Optional[Dict[str, Any]] = None,
+    ) -> Path:
+        """Renderiza y guarda el strip (corre en el proceso worker).
+
+        ``encode``/``full_page_encode`` son perfiles ya resueltos por
+        EncodeProfiles (por defecto "print").
+        """
+        strip = ImageService._build_strip(
+            photo_paths,
+            design_path,
+            photo_filter,
+            preview_scale,
+            target_size,
+            layout=layout,
+            design_position=design_position,
+            background_color=background_color,
+            photo_spacing=photo_spacing,
+            overlay_mode=overlay_mode,
+            design_scale=design_scale,
+            design_offset_x=design_offset_x,
+            design_offset_y=design_offset_y,
+            design_stretch=design_stretch,
+            photo_aspect_ratio=photo_aspect_ratio,
+        )
         
         try:
-            # Y offset inicial
-            y_offset = TOP_MARGIN
-
-            # 0. Agregar diseño arriba si aplica (modo banda fija legacy)
-            if design_exists and use_legacy_band and design_position_normalized == DESIGN_POSITION_TOP:
-                y_offset = ImageService._paste_design(
-                    strip,
-                    design_path,
-                    strip_width,
-                    DESIGN_HEIGHT,
-                    y_offset,
-                    add_spacing=True,
-                    spacing=PHOTO_SPACING
-                )
-            
-            # 1. Procesar y agregar las fotos UNA POR UNA
-            # Calcular dimensiones objetivo efectivas para cada foto dentro del strip
-            photo_box_width = strip_width - (HORIZONTAL_PHOTO_MARGIN * 2)
-            crop_width = photo_box_width
-            crop_height = target_photo_height
-
-            if aspect_ratio_value is not None and target_photo_height > 0:
-                # Partimos de la altura vertical disponible y ajustamos ancho segn el aspecto
-                eff_height = target_photo_height
-                eff_width = int(eff_height * aspect_ratio_value)
-
-                # Si el ancho excede el espacio lateral disponible, re-ajustar desde el ancho
-                if eff_width > photo_box_width and aspect_ratio_value > 0:
-                    eff_width = photo_box_width
-                    eff_height = int(eff_width / aspect_ratio_value)
-
-                crop_width = max(1, eff_width)
-                crop_height = max(1, eff_height)
-            for i, photo_path in enumerate(photo_paths):
-                photo = Image.open(photo_path)
-                filtered: Optional[Image.Image] = None
+            # Perfil de impresora al final: la página dual reutiliza el canvas ya convertido
+            ColorManagement.apply(strip, color)
+
+            output_path = ImageService.strip_output_path(session_id)
+            ImageService._save_encoded(strip, output_path, encode)
 
+            if dual_strip:
+                # Página dual desde el canvas en memoria: sin re-decodificar
+                # el JPEG recién guardado ni una segunda generación de pérdida
+                full_page = ImageService._impose_dual_strip(strip)
                 try:
-                  if photo_filter_normalized and photo_filter_normalized != "none":
-                      filtered = ImageService._apply_filter(photo, photo_filter_normalized)
-                  source = filtered or photo
+                    ImageService._save_encoded(
+                        full_page, ImageService.full_page_output_path(output_path), full_page_encode
+                    )
+                finally:
+                    full_page.close()
 
-                  photo_processed = ImageService._process_photo(
-                      source,
-                      crop_width,
-                      crop_height,
-                  )
+            return output_path
+            
+        finally:
+            # Liberar strip
+            strip.close()
+            del strip
+            # Python's generational GC handles cleanup efficiently
 
-                  # Calcular posición centrada
-                  x_pos = (strip_width - photo_processed.width) // 2
+    @staticmethod
+    def render_preview_bytes(
+        photo_paths: List[Path],
+        design_path: Optional[Path] = None,
+        layout: Optional[str] = None,
+        design_position: Optional[str] = None,
+        background_color: Optional[str] = None,
+        photo_spacing: Optional[int] = None,
+        photo_filter: Optional[str] = None,
+        overlay_mode: Optional[str] = None,
+        design_scale: Optional[float] = None,
+        design_offset_x: Optional[float] = None,
+        design_offset_y: Optional[float] = None,
+        design_stretch: bool = False,
+        photo_aspect_ratio: Optional[str] = None,
+        preview_scale: Optional[float] = None,
+        image_format: str = "JPEG",
+    ) -> bytes:
+        """
+        Compone un preview y lo devuelve codificado en memoria (JPEG o WEBP).
 
-                  # Pegar en strip
-                  strip.paste(photo_processed, (x_pos, y_offset))
+        No escribe nada en disco: pensado para responder el preview en la
+        misma petición HTTP.
+        """
+        if not photo_paths or len(photo_paths) > 6:
+            raise ValueError(f"Se requieren entre 1 y 6 fotos, recibido: {len(photo_paths)}")
 
-                  # Liberar foto procesada
-                  photo_processed.close()
-                  del photo_processed
+        image_format = image_format.upper()
+        if image_format not in PREVIEW_FORMATS:
+            raise ValueError(f"Formato de preview no soportado: {image_format}")
+
+        is_draft = preview_scale is not None and 0 < preview_scale < 1
+        encode = EncodeProfiles.for_artifact("draft_preview" if is_draft else "preview")
+
+        # Reintentable: el worker no escribe en disco
+        return ComposeExecutor.run_idempotent(
+            ImageService._render_preview_bytes_local,
+            list(photo_paths),
+            design_path,
+            photo_filter,
+            preview_scale,
+            EncodeProfiles.save_kwargs(encode, image_format),
+            layout=layout,
+            design_position=design_position,
+            background_color=background_color,
+            photo_spacing=photo_spacing,
+            overlay_mode=overlay_mode,
+            design_scale=design_scale,
+            design_offset_x=design_offset_x,
+            design_offset_y=design_offset_y,
+            design_stretch=design_stretch,
+            photo_aspect_ratio=photo_aspect_ratio,
+        )
 
-                  # Siguiente posición
-                  y_offset += target_photo_height + PHOTO_SPACING
-                finally:
-                  if filtered is not None:
-                      filtered.close()
-                      del filtered
+    @staticmethod
+    def _render_preview_bytes_local(
+        photo_paths: List[Path],
+        design_path: Optional[Path],
+        photo_filter: Optional[str],
+        preview_scale: Optional[float],
+        save_kwargs: Dict[str, Any],
+        **layout_options,
+    ) -> bytes:
+        """Renderiza el preview y lo codifica a un buffer (corre en el proceso worker)."""
+        strip = ImageService._build_strip(
+            photo_paths, design_path, photo_filter, preview_scale, **layout_options
+        )
+        try:
+            buffer = io.BytesIO()
+            strip.save(buffer, **save_kwargs)
+            return buffer.getvalue()
+        finally:
+            strip.close()
 
-                  # Liberar foto original
-                  photo.close()
-                  del photo
-            
-            # 2. Agregar diseño abajo si aplica (modo banda fija legacy)
-            if design_exists and use_legacy_band and design_position_normalized == DESIGN_POSITION_BOTTOM:
-                ImageService._paste_design(
-                    strip,
-                    design_path,
-                    strip_width,
-                    DESIGN_HEIGHT,
-                    y_offset,
-                    add_spacing=False,
-                    spacing=PHOTO_SPACING
-                )
+    @staticmethod
+    def _build_strip(
+        photo_paths: List[Path],
+        design_path: Optional[Path],
+        photo_filter: Optional[str],
+        preview_scale: Optional[float],
+        target_size: Optional[Tuple[int, int]] = None,
+        **layout_options,
+    ) -> Image.Image:
+        """Compila el LayoutPlan (memoizado) y lo ejecuta; devuelve el canvas RGB.
+
+        Con ``target_size`` el plan se ajusta al tamaño exacto de impresión
+        antes de renderizar (un solo remuestreo por foto).
+        """
+        design_exists = bool(design_path and design_path.exists())
+        design_size = DesignOverlayCache.get_source_size(design_path) if design_exists else None
 
-            # 2b. Overlay libre (escala + offsets normalizados) en todo el strip
-            if design_exists and use_free_overlay and design_path is not None:
-                ImageService._paste_design_free_overlay(
-                    canvas=strip,
-                    design_path=design_path,
-                    strip_width=strip_width,
-                    strip_height=strip_height,
-                    design_scale=design_scale,
-                    design_offset_x=design_offset_x,
-                    design_offset_y=design_offset_y,
-                    design_position=design_position_normalized,
-                    design_stretch=design_stretch,
+        plan = compile_layout_plan(
+            num_photos=len(photo_paths),
+            design_size=design_size,
+            **layout_options,
+        )
+
+        # Modo borrador: geometría proporcional a la de impresión, menos píxeles
+        is_draft = preview_scale is not None and 0 < preview_scale < 1
+        if is_draft:
+            plan = plan.scaled(preview_scale)
+        elif target_size is not None:
+            plan = plan.fitted(target_size)
+
+        return ImageService._render_plan(
+            plan,
+            photo_paths,
+            design_path if design_exists else None,
+            photo_filter,
+            resample=Image.Resampling.BILINEAR if is_draft else Image.Resampling.LANCZOS,
+        )
+
+    @staticmethod
+    def _render_plan(
+        plan: LayoutPlan,
+        photo_paths: List[Path],
+        design_path: Optional[Path],
+        photo_filter: Optional[str],
+        resample: Image.Resampling = Image.Resampling.LANCZOS,
+    ) -> Image.Image:
+        """Ejecuta un LayoutPlan y devuelve el canvas RGB del strip."""
+        photo_filter_normalized = (photo_filter or "none").strip().lower()
+        crop_width, crop_height = plan.crop_size
+
+        # Crear canvas con color de fondo personalizado
+        # (respaldado en disco si es grande, ver page_canvas.py)
+        strip = new_canvas(plan.canvas_size, plan.background_color)
+
+        try:
+            # 1. Decodificar + recortar + filtrar (en paralelo si hay pool) y
+            #    pegar en orden
+            if ImageService._get_decode_pool() is not None and len(photo_paths) > 1:
+                ImageService._paste_photos_parallel(
+                    strip, plan, photo_paths, photo_filter_normalized, resample
+                )
+            else:
+                for photo_path, position in zip(photo_paths, plan.photo_positions):
+                    photo_processed = ImageService._load_photo(
+                        photo_path, crop_width, crop_height, photo_filter_normalized, resample
+                    )
+                    strip.paste(photo_processed, position)
+
+                    # Liberar foto procesada
+                    photo_processed.close()
+                    del photo_processed
+
+            # 2. Diseño (banda legacy, overlay libre o footer) según el plan
+            if design_path is not None and plan.overlay_box is not None:
+                ImageService._paste_overlay(strip, design_path, plan, resample)
+
+            return strip
+        except Exception:
+            strip.close()
+            raise
+
+    @classmethod
+    def _get_decode_pool(cls) -> Optional[ThreadPoolExecutor]:
+        """Devuelve el pool de decodificación (None = modo secuencial)."""
+        if cls.DECODE_THREADS <= 1:
+            return None
+        with cls._decode_pool_lock:
+            if cls._decode_pool is None:
+                cls._decode_pool = ThreadPoolExecutor(
+                    max_workers=cls.DECODE_THREADS,
+                    thread_name_prefix="photo-decode",
                 )
+            return cls._decode_pool
+
+    @staticmethod
+    def _paste_photos_parallel(
+        strip: Image.Image,
+        plan: LayoutPlan,
+        photo_paths: List[Path],
+        photo_filter: str,
+        resample: Image.Resampling,
+    ) -> None:
+        """Procesa todas las fotos en el pool y las pega en el orden del plan."""
+        pool = ImageService._get_decode_pool()
+        crop_width, crop_height = plan.crop_size
+        futures: List[Future] = [
+            pool.submit(
+                ImageService._load_photo, photo_path, crop_width, crop_height, photo_filter, resample
+            )
+            for photo_path in photo_paths
+        ]
 
-            # 2c. Overlay en modo footer: reservar banda inferior y limitar el movimiento
-            if design_exists and is_footer_mode and design_path is not None and footer_height > 0:
-                footer_top = strip_height - BOTTOM_MARGIN - footer_height
-                if footer_top < TOP_MARGIN:
-                    footer_top = TOP_MARGIN
-
-                ImageService._paste_design_footer_overlay(
-                    canvas=strip,
-                    design_path=design_path,
-                    strip_width=strip_width,
-                    footer_top=footer_top,
-                    footer_height=footer_height,
-                    design_scale=design_scale,
-                    design_offset_x=design_offset_x,
-                    design_offset_y=design_offset_y,
-                    design_stretch=design_stretch,
+        try:
+            for future, position in zip(futures, plan.photo_positions):
+                photo_processed = future.result()
+                try:
+                    strip.paste(photo_processed, position)
+                finally:
+                    photo_processed.close()
+        except Exception:
+            # No dejar fotos decodificadas colgando si una falla
+            for future in futures:
+                if future.cancel():
+                    continue
+                try:
+                    future.result().close()
+                except Exception:
+                    pass
+            raise
+
+    @staticmethod
+    def _load_photo(
+        photo_path: Path,
+        crop_width: int,
+        crop_height: int,
+        photo_filter: str,
+        resample: Image.Resampling = Image.Resampling.LANCZOS,
+    ) -> Image.Image:
+        """Abre, redimensiona, recorta y filtra una foto (thread-safe)."""
+        # Solo la decodificación + remuestreo ocupa un slot: es el pico de memoria
+        with ImageService._decode_slots:
+            photo = ImageService._open_photo(photo_path, crop_width, crop_height)
+            try:
+                photo_processed = ImageService._process_photo(
+                    photo,
+                    crop_width,
+                    crop_height,
+                    resample,
                 )
-            
-            # 3. Guardar strip en carpeta de sesión para nomenclatura consistente
-            output_dir = PHOTOS_DIR / session_id if session_id else STRIPS_DIR
-            output_dir.mkdir(parents=True, exist_ok=True)
-            
-            output_filename = "strip.jpg" if session_id else "strip_preview.jpg"
-            output_path = output_dir / output_filename
-            
-            # Guardar con compresión optimizada
-            strip.save(
-                output_path,
-                format=IMAGE_CONFIG["format"],
-                quality=IMAGE_CONFIG["quality"],
-                dpi=IMAGE_CONFIG["dpi"],
-                optimize=True  # Optimizar tamaño de archivo
+            finally:
+                # Liberar foto original
+                photo.close()
+                del photo
+
+        # Filtro después del recorte: una pasada sobre ~1/5 de los píxeles
+        if photo_filter != "none":
+            filtered = ImageService._apply_filter(photo_processed, photo_filter)
+            if filtered is not photo_processed:
+                photo_processed.close()
+                photo_processed = filtered
+
+        return photo_processed
+
+    @staticmethod
+    def _open_photo(photo_path: Path, target_width: int, target_height: int) -> Image.Image:
+        """
+        Abre una foto pidiendo al decoder JPEG una escala reducida (DCT scaling).
+
+        El decoder puede entregar 1/2, 1/4 o 1/8 del tamaño original sin
+        decodificar todos los píxeles. Se pide el menor tamaño que todavía
+        cubre la caja destino, así el resample LANCZOS final sigue partiendo
+        de más píxeles de los que se imprimen. Para formatos que no son JPEG
+        ``draft`` no hace nada y se decodifica completo.
+        """
+        photo = Image.open(photo_path)
+
+        if photo.format == "JPEG" and photo.width > 0 and photo.height > 0:
+            # Escala necesaria para cubrir la caja (mismo criterio que _process_photo)
+            cover_scale = max(target_width / photo.width, target_height / photo.height)
+            requested = (
+                max(1, math.ceil(photo.width * cover_scale)),
+                max(1, math.ceil(photo.height * cover_scale)),
             )
+            photo.draft("RGB", requested)
 
-            # Registrar strip en metadata de sesión (solo para sesiones reales)
-            if session_id and session_id != "preview":
-                strip_url = get_photo_url(output_path)
-                SessionService.set_strip(session_id, strip_url)
+        return photo
 
-            return output_path
-            
-        finally:
-            # Liberar strip
-            if strip:
-                strip.close()
-                del strip
-            # Python's generational GC handles cleanup efficiently
-    
     @staticmethod
     def _process_photo(
         photo: Image.Image,
         target_width: int,
-        target_height: int
+        target_height: int,
+        resample: Image.Resampling = Image.Resampling.LANCZOS,
     ) -> Image.Image:
         """
         Redimensiona y recorta foto para llenar espacio exacto.
@@ -391,10 +554,12 @@ class ImageService:
             new_width = target_width
             new_height = int(new_width / img_ratio)
         
-        # Redimensionar
+        # Redimensionar (reducing_gap reduce primero por un factor entero
+        # cuando la fuente es mucho más grande y luego aplica LANCZOS)
         resized = photo.resize(
             (new_width, new_height),
-            Image.Resampling.LANCZOS
+            resample,
+            reducing_gap=IMAGE_CONFIG["resize_reducing_gap"],
         )
         
         # Recortar al centro
@@ -413,332 +578,121 @@ class ImageService:
 
     @staticmethod
     def _apply_filter(photo: Image.Image, photo_filter: str) -> Image.Image:
-        """Aplica un filtro sencillo a la foto y devuelve una nueva imagen.
+        """Aplica un filtro compilado (ver photo_filters) y devuelve una nueva imagen.
 
         photo_filter soporta: "bw", "sepia", "glam". Cualquier otro valor devuelve
-        una copia sin cambios.
-        """
-        base = photo.convert("RGB")
-        name = (photo_filter or "none").strip().lower()
-
-        if name == "bw":
-            gray = ImageOps.grayscale(base)
-            return gray.convert("RGB")
-
-        if name == "sepia":
-            gray = ImageOps.grayscale(base)
-            # Tonos cálidos para efecto sepia suave
-            sepia = ImageOps.colorize(gray, "#2b1b0f", "#f5e0c7")
-            return sepia.convert("RGB")
-
-        if name == "glam":
-            glam = base.copy()
-            # Ligero realce de brillo y contraste en color, consistente con el preview CSS
-            glam = ImageEnhance.Brightness(glam).enhance(1.08)
-            glam = ImageEnhance.Contrast(glam).enhance(1.12)
-            glam = ImageEnhance.Color(glam).enhance(1.2)
-            return glam
-
-        # Filtro desconocido: devolver copia directa
-        return base
-
-    @staticmethod
-    def _paste_design(
-        canvas: Image.Image,
-        design_path: Path,
-        target_width: int,
-        target_height: int,
-        y_offset: int,
-        add_spacing: bool,
-        spacing: int
-    ) -> int:
-        """Coloca el diseño en el canvas y devuelve el nuevo offset."""
-        design = Image.open(design_path)
-
-        try:
-            if design.size != (target_width, target_height):
-                design = design.resize(
-                    (target_width, target_height),
-                    Image.Resampling.LANCZOS
-                )
-
-            # Manejar transparencia
-            if design.mode == 'RGBA':
-                bg = Image.new('RGB', design.size, 'white')
-                bg.paste(design, (0, 0), design)
-                canvas.paste(bg, (0, y_offset))
-                bg.close()
-            else:
-                canvas.paste(design, (0, y_offset))
-
-            new_offset = y_offset + target_height
-            if add_spacing:
-                new_offset += spacing
-
-            return new_offset
-        finally:
-            design.close()
-            del design
-            # Python's GC handles cleanup efficiently
-
-    @staticmethod
-    def _paste_design_footer_overlay(
-        canvas: Image.Image,
-        design_path: Path,
-        strip_width: int,
-        footer_top: int,
-        footer_height: int,
-        design_scale: Optional[float],
-        design_offset_x: Optional[float],
-        design_offset_y: Optional[float],
-        design_stretch: bool = False,
-    ) -> None:
-        """Coloca el diseño dentro de una banda inferior reservada (footer).
-
-        - design_scale controla el ancho relativo al strip (0-1).
-        - design_offset_x controla la posición horizontal del centro (0-1) en todo el strip.
-        - design_offset_y controla la posición vertical del centro normalizada dentro del footer (0-1).
-        - design_stretch: si True, estira el diseño para llenar el footer completamente.
+        la misma foto sin cambios.
         """
-        MIN_SCALE = 0.3
-        MAX_SCALE = 1.0
-        DEFAULT_SCALE = 1.0
-        DEFAULT_FOOTER_Y = 0.85  # Cerca de la parte baja de la banda
-
-        design = Image.open(design_path)
-
-        try:
-            if design.width <= 0 or design.height <= 0:
-                raise ValueError("Design image has invalid dimensions")
-
-            if design_stretch:
-                # MODO STRETCH: Llenar el footer completamente
-                # Ignoramos scale y offsets, forzamos ajuste exacto al footer
-                target_width = strip_width
-                target_height = footer_height
-                
-                # Posición fija (todo el footer)
-                left = 0
-                top = footer_top
-                
-                resized = design.resize(
-                    (target_width, target_height),
-                    Image.Resampling.LANCZOS,
-                )
-            else:
-                # MODO NORMAL: Respetar aspecto y usar controles
-                # Normalizar escala
-                scale = design_scale if design_scale is not None else DEFAULT_SCALE
-                if scale <= 0:
-                    scale = DEFAULT_SCALE
-                scale = max(MIN_SCALE, min(MAX_SCALE, scale))
-
-                # --- SAFETY CLAMP: Ensure design fits within footer height ---
-                # Calculate max scale allowed by footer height
-                # target_height = (strip_width * scale) / aspect_ratio
-                # We want target_height <= footer_height
-                # So: scale <= (footer_height * aspect_ratio) / strip_width
-                aspect_ratio = design.width / design.height
-                max_height_scale = (footer_height * aspect_ratio) / strip_width
-                
-                # Apply clamp: effective scale is min(requested, max_allowed)
-                scale = min(scale, max_height_scale)
-                # -----------------------------------------------------------
-
-                target_width = int(strip_width * scale)
-                target_height = max(1, int(target_width / aspect_ratio))
-
-                # Posición horizontal normalizada en todo el strip
-                center_x_norm = design_offset_x if design_offset_x is not None else 0.5
-                center_x_norm = max(0.0, min(1.0, center_x_norm))
-                center_x = center_x_norm * strip_width
-
-                # Posición vertical normalizada dentro del footer (0-1)
-                center_y_footer_norm = design_offset_y if design_offset_y is not None else DEFAULT_FOOTER_Y
-                center_y_footer_norm = max(0.0, min(1.0, center_y_footer_norm))
-                center_y = footer_top + center_y_footer_norm * footer_height
-
-                half_w = target_width / 2
-                half_h = target_height / 2
-
-                # Clamp horizontal dentro del canvas completo
-                center_x = max(half_w, min(strip_width - half_w, center_x))
-
-                # Clamp vertical dentro de la banda de footer
-                min_center_y = footer_top + half_h
-                max_center_y = footer_top + footer_height - half_h
-                if max_center_y < min_center_y:
-                    max_center_y = min_center_y
-                center_y = max(min_center_y, min(max_center_y, center_y))
-
-                left = int(center_x - half_w)
-                top = int(center_y - half_h)
-
-                resized = design.resize(
-                    (target_width, target_height),
-                    Image.Resampling.LANCZOS,
-                )
-
-            if resized.mode == "RGBA":
-                bg = Image.new("RGB", resized.size, "white")
-                bg.paste(resized, (0, 0), resized)
-                canvas.paste(bg, (left, top))
-                bg.close()
-            else:
-                canvas.paste(resized, (left, top))
-
-            resized.close()
-        finally:
-            design.close()
-            del design
-            # Python's GC handles cleanup efficiently
+        compiled = get_photo_filter(photo_filter)
+        if compiled is None:
+            # Filtro desconocido: devolver la foto tal cual
+            return photo
+        return compiled.apply(photo)
 
     @staticmethod
-    def _paste_design_free_overlay(
+    def _paste_overlay(
         canvas: Image.Image,
         design_path: Path,
-        strip_width: int,
-        strip_height: int,
-        design_scale: Optional[float],
-        design_offset_x: Optional[float],
-        design_offset_y: Optional[float],
-        design_position: str,
-        design_stretch: bool = False,
+        plan: LayoutPlan,
+        resample: Image.Resampling = Image.Resampling.LANCZOS,
     ) -> None:
-        """Coloca el diseño como overlay libre usando escala y offsets normalizados.
-
-        - design_scale controla el ancho relativo al strip (0-1).
-        - design_offset_x/y controlan la posición del centro en coordenadas normalizadas (0-1).
-        - design_stretch: si True, estira el diseño para llenar todo el strip.
-        """
-        # Usar rangos razonables para evitar valores extremos sin propagar magia por el código.
-        MIN_SCALE = 0.3
-        MAX_SCALE = 1.0
-        DEFAULT_SCALE = 1.0
-        DEFAULT_TOP_Y = 0.2
-        DEFAULT_BOTTOM_Y = 0.8
-
-        design = Image.open(design_path)
-
-        try:
-            if design.width <= 0 or design.height <= 0:
-                raise ValueError("Design image has invalid dimensions")
-
-            if design_stretch:
-                # MODO STRETCH: Llenar todo el strip
-                target_width = strip_width
-                target_height = strip_height
-                left = 0
-                top = 0
-                
-                resized = design.resize(
-                    (target_width, target_height),
-                    Image.Resampling.LANCZOS,
-                )
-            else:
-                # MODO NORMAL
-                # Normalizar escala
-                scale = design_scale if design_scale is not None else DEFAULT_SCALE
-                if scale <= 0:
-                    scale = DEFAULT_SCALE
-                scale = max(MIN_SCALE, min(MAX_SCALE, scale))
-
-                target_width = int(strip_width * scale)
-                # Mantener proporción original
-                aspect_ratio = design.width / design.height
-                target_height = max(1, int(target_width / aspect_ratio))
-
-                # Posición normalizada (0-1)
-                center_x_norm = design_offset_x if design_offset_x is not None else 0.5
-                if design_offset_y is not None:
-                    center_y_norm = design_offset_y
-                else:
-                    center_y_norm = DEFAULT_TOP_Y if design_position == DESIGN_POSITION_TOP else DEFAULT_BOTTOM_Y
-
-                center_x_norm = max(0.0, min(1.0, center_x_norm))
-                center_y_norm = max(0.0, min(1.0, center_y_norm))
-
-                center_x = center_x_norm * strip_width
-                center_y = center_y_norm * strip_height
-
-                half_w = target_width / 2
-                half_h = target_height / 2
-
-                # Clamp para que el diseño no se salga completamente del canvas
-                center_x = max(half_w, min(strip_width - half_w, center_x))
-                center_y = max(half_h, min(strip_height - half_h, center_y))
-
-                left = int(center_x - half_w)
-                top = int(center_y - half_h)
-
-                resized = design.resize(
-                    (target_width, target_height),
-                    Image.Resampling.LANCZOS,
-                )
-
-            if resized.mode == "RGBA":
-                bg = Image.new("RGB", resized.size, "white")
-                bg.paste(resized, (0, 0), resized)
-                canvas.paste(bg, (left, top))
-                bg.close()
-            else:
-                canvas.paste(resized, (left, top))
-
-            resized.close()
-        finally:
-            design.close()
-            del design
-            # Python's GC handles cleanup efficiently
+        """Pega el diseño en el rectángulo calculado por el plan."""
+        left, top, width, height = plan.overlay_box  # type: ignore[misc]
+        # Overlay cacheado: ya viene redimensionado; con máscara si tiene
+        # transparencia (las fotos se ven a través de las zonas transparentes)
+        layer, mask = DesignOverlayCache.get_overlay(
+            design_path,
+            (width, height),
+            fit_mode=plan.overlay_fit or "fit",
+            resample=resample,
+        )
+        canvas.paste(layer, (left, top), mask)
     
     @staticmethod
     def create_duplicate_strip(strip_path: Path) -> Path:
         """
         Crea imagen con 2 tiras idénticas lado a lado.
         Se ajusta dinámicamente a la altura del strip original.
+
+        Solo para strips que ya están en disco (p. ej. impresión de un strip
+        antiguo); compose_strip(dual_strip=True) arma la página en la misma
+        pasada sin volver a decodificar el JPEG.
         """
         strip = Image.open(strip_path)
         
         try:
-            # Dimensiones dinámicas basadas en el strip original
-            STRIP_WIDTH = strip.width
-            STRIP_HEIGHT = strip.height
-            FULL_PAGE_WIDTH = STRIP_WIDTH * 2  # Dos tiras lado a lado
-            FULL_PAGE_HEIGHT = STRIP_HEIGHT
-            CUT_LINE_COLOR = (200, 200, 200)
-            CUT_LINE_DASH_LENGTH = 10
-            CUT_LINE_GAP = 20
-            
-            # Crear canvas con altura dinámica
-            full_page = Image.new('RGB', (FULL_PAGE_WIDTH, FULL_PAGE_HEIGHT), 'white')
-            
-            # Pegar ambas copias
-            full_page.paste(strip, (0, 0))
-            full_page.paste(strip, (STRIP_WIDTH, 0))
-            
-            # Agregar línea de corte sutil en el centro
-            draw = ImageDraw.Draw(full_page)
-            center_x = STRIP_WIDTH - 2  # Línea ligeramente a la izquierda del centro
-            for y in range(0, FULL_PAGE_HEIGHT, CUT_LINE_GAP):
-                draw.line(
-                    [(center_x, y), (center_x, y + CUT_LINE_DASH_LENGTH)],
-                    fill=CUT_LINE_COLOR,
-                    width=1
-                )
-            
-            # Guardar
-            output_path = strip_path.parent / "full_strip.jpg"
-            full_page.save(
-                output_path,
-                format=IMAGE_CONFIG["format"],
-                quality=IMAGE_CONFIG["quality"],
-                dpi=IMAGE_CONFIG["dpi"],
-                optimize=True
-            )
-            
-            return output_path
-            
+            full_page = ImageService._impose_dual_strip(strip)
+            try:
+                output_path = ImageService.full_page_output_path(strip_path)
+                encode = EncodeProfiles.for_artifact("full_strip")
+                if strip.info.get("dpi") and encode.get("dpi"):
+                    # Strips a resolución de impresora: conservar su DPI
+                    encode["dpi"] = tuple(int(round(value)) for value in strip.info["dpi"])
+                ImageService._save_encoded(full_page, output_path, encode)
+                return output_path
+            finally:
+                full_page.close()
         finally:
             strip.close()
-            full_page.close()
-            del strip, full_page
+            del strip
             # Python's GC handles cleanup efficiently
+
+    @staticmethod
+    def _impose_dual_strip(strip: Image.Image) -> Image.Image:
+        """Arma la página con 2 tiras lado a lado y la línea de corte."""
+        # Dimensiones dinámicas basadas en el strip original
+        STRIP_WIDTH = strip.width
+        STRIP_HEIGHT = strip.height
+        FULL_PAGE_WIDTH = STRIP_WIDTH * 2  # Dos tiras lado a lado
+        FULL_PAGE_HEIGHT = STRIP_HEIGHT
+
+        # Crear canvas con altura dinámica
+        full_page = new_canvas((FULL_PAGE_WIDTH, FULL_PAGE_HEIGHT), 'white')
+        
+        # Pegar ambas copias
+        full_page.paste(strip, (0, 0))
+        full_page.paste(strip, (STRIP_WIDTH, 0))
+        
+        # Agregar línea de corte sutil (ligeramente a la izquierda del centro)
+        # con una máscara precalculada: un solo paste en vez de N segmentos
+        center_x = STRIP_WIDTH - 2
+        full_page.paste(
+            CUT_LINE_COLOR,
+            (center_x, 0, center_x + 1, FULL_PAGE_HEIGHT),
+            _cut_line_mask(FULL_PAGE_HEIGHT),
+        )
+        return full_page
+
+    @staticmethod
+    def _save_encoded(
+        image: Image.Image,
+        output_path: Path,
+        encode: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Guarda un artefacto con su perfil de codificación (``print`` por defecto).
+
+        Temporal + rename: un worker que muere a mitad del encode no deja un
+        JPEG truncado y la composición puede reintentarse.
+        """
+        profile = encode if encode is not None else EncodeProfiles.get("print")
+        tmp_path = output_path.with_name(f".{output_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            image.save(tmp_path, **EncodeProfiles.save_kwargs(profile))
+            os.replace(tmp_path, output_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+
+@lru_cache(maxsize=8)
+def _cut_line_mask(height: int) -> Image.Image:
+    """Máscara (1 px de ancho) de la línea de corte punteada para una altura.
+
+    Equivale a dibujar con ImageDraw un segmento de CUT_LINE_DASH_LENGTH px
+    cada CUT_LINE_GAP px (extremos incluidos).
+    """
+    column = bytes(
+        255 if (y % CUT_LINE_GAP) <= CUT_LINE_DASH_LENGTH else 0
+        for y in range(height)
+    )
+    return Image.frombytes("L", (1, height), column)
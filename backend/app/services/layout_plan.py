@@ -0,0 +1,497 @@
+"""
+Plan de layout para compose_strip
+
+Compila los metadatos de un template + número de fotos a geometría inmutable:
+tamaño del canvas, rectángulos donde pegar cada foto, tamaño de recorte y
+rectángulo del overlay de diseño. El renderer (ImageService) solo ejecuta el
+plan, así que la geometría se puede probar sin tocar píxeles y el preview y
+la tira final comparten exactamente el mismo cálculo.
+
+Los planes se memoizan: la clave son los parámetros normalizados que definen
+la geometría (incluido el tamaño original del diseño), de modo que editar
+cualquier campo del template produce un plan nuevo automáticamente.
+"""
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import Optional, Tuple, Union
+
+from pydantic import BaseModel, ConfigDict
+
+from app.config import IMAGE_CONFIG, PAPER_SIZES_INCHES
+from app.models.template import (
+    DESIGN_POSITION_TOP,
+    DESIGN_POSITION_BOTTOM,
+    LAYOUT_VERTICAL_3,
+    LAYOUT_VERTICAL_4,
+    LAYOUT_VERTICAL_6,
+    LAYOUT_GRID_2X2,
+    OVERLAY_MODE_FREE,
+    OVERLAY_MODE_FOOTER,
+    get_layout_dimensions,
+)
+
+SUPPORTED_VERTICAL_LAYOUTS = {
+    LAYOUT_VERTICAL_3,
+    LAYOUT_VERTICAL_4,
+    LAYOUT_VERTICAL_6,
+}
+
+FOOTER_HEIGHT_RATIO = 0.18
+DEFAULT_TOP_MARGIN = 30
+DEFAULT_BOTTOM_MARGIN = 30
+DEFAULT_PHOTO_SPACING = 20  # Alineado con Template.photo_spacing y Settings.photo_spacing
+FOOTER_GAP_BELOW_LAST_PHOTO = 20  # Separación entre la última foto y el inicio del footer en modo footer
+HORIZONTAL_PHOTO_MARGIN = 25  # Margen lateral por lado para las fotos
+
+# Límites de los controles de overlay (evitar valores extremos)
+OVERLAY_MIN_SCALE = 0.3
+OVERLAY_MAX_SCALE = 1.0
+OVERLAY_DEFAULT_SCALE = 1.0
+FREE_OVERLAY_DEFAULT_TOP_Y = 0.2
+FREE_OVERLAY_DEFAULT_BOTTOM_Y = 0.8
+FOOTER_OVERLAY_DEFAULT_Y = 0.85  # Cerca de la parte baja de la banda
+
+LAYOUT_PLAN_CACHE_SIZE = 64
+
+# Logger "app" sin importar logging_config: los planes también se compilan en
+# los procesos del ComposeExecutor. Con el lru_cache cada aviso sale una vez por plan.
+logger = logging.getLogger("app")
+
+Box = Tuple[int, int, int, int]  # (left, top, width, height)
+ColorValue = Union[str, Tuple[int, int, int]]
+
+
+class LayoutPlan(BaseModel):
+    """Geometría inmutable de un strip ya resuelta."""
+
+    model_config = ConfigDict(frozen=True)
+
+    canvas_size: Tuple[int, int]
+    background_color: ColorValue
+    crop_size: Tuple[int, int]
+    photo_positions: Tuple[Tuple[int, int], ...]
+    # Overlay de diseño (None si no hay diseño)
+    overlay_box: Optional[Box] = None
+    overlay_fit: Optional[str] = None  # "band" | "fit" | "stretch"
+
+    @property
+    def photo_rects(self) -> Tuple[Box, ...]:
+        """Rectángulos (left, top, width, height) de cada foto."""
+        crop_width, crop_height = self.crop_size
+        return tuple((x, y, crop_width, crop_height) for x, y in self.photo_positions)
+
+    def scaled(self, factor: float) -> "LayoutPlan":
+        """Devuelve el mismo plan escalado proporcionalmente (previews de baja resolución)."""
+        if factor == 1.0:
+            return self
+
+        def _px(value: int) -> int:
+            return max(1, int(round(value * factor)))
+
+        overlay_box = None
+        if self.overlay_box is not None:
+            left, top, width, height = self.overlay_box
+            overlay_box = (int(round(left * factor)), int(round(top * factor)), _px(width), _px(height))
+
+        return self.model_copy(
+            update={
+                "canvas_size": (_px(self.canvas_size[0]), _px(self.canvas_size[1])),
+                "crop_size": (_px(self.crop_size[0]), _px(self.crop_size[1])),
+                "photo_positions": tuple(
+                    (int(round(x * factor)), int(round(y * factor))) for x, y in self.photo_positions
+                ),
+                "overlay_box": overlay_box,
+            }
+        )
+
+    def fitted(self, size: Tuple[int, int]) -> "LayoutPlan":
+        """Ajusta el plan a un canvas de tamaño exacto (render a resolución de impresora).
+
+        Escala proporcionalmente hasta el mayor tamaño que cabe en ``size`` y
+        centra el resultado; el sobrante queda con el color de fondo. Las fotos
+        y el diseño se remuestrean una sola vez, desde el original, al tamaño
+        final.
+        """
+        width, height = self.canvas_size
+        if (width, height) == tuple(size):
+            return self
+
+        plan = self.scaled(min(size[0] / width, size[1] / height))
+        offset_x = max(0, (size[0] - plan.canvas_size[0]) // 2)
+        offset_y = max(0, (size[1] - plan.canvas_size[1]) // 2)
+
+        overlay_box = None
+        if plan.overlay_box is not None:
+            left, top, box_width, box_height = plan.overlay_box
+            overlay_box = (left + offset_x, top + offset_y, box_width, box_height)
+
+        return plan.model_copy(
+            update={
+                "canvas_size": (int(size[0]), int(size[1])),
+                "photo_positions": tuple((x + offset_x, y + offset_y) for x, y in plan.photo_positions),
+                "overlay_box": overlay_box,
+            }
+        )
+
+
+def print_target_size(paper_size: str, dpi: int, strips_per_page: int = 1) -> Tuple[int, int]:
+    """Tamaño en píxeles de dispositivo de un strip para el papel y DPI dados.
+
+    Con ``strips_per_page`` = 2 (modo dual-strip) cada strip ocupa media
+    página, de modo que la imposición lado a lado da el papel exacto.
+    """
+    width_in, height_in = PAPER_SIZES_INCHES.get(paper_size, PAPER_SIZES_INCHES["4x6"])
+    return (int(round(width_in * dpi)) // max(1, strips_per_page), int(round(height_in * dpi)))
+
+
+def hex_to_rgb(hex_color: str) -> tuple:
+    """
+    Convierte color hexadecimal a tupla RGB.
+
+    Args:
+        hex_color: Color en formato hex (#RRGGBB o RRGGBB)
+
+    Returns:
+        Tupla (R, G, B) con valores 0-255
+
+    Example:
+        hex_to_rgb("#c60c0c") -> (198, 12, 12)
+        hex_to_rgb("ffffff") -> (255, 255, 255)
+    """
+    # Remover '#' si existe
+    hex_color = hex_color.lstrip('#')
+
+    # Convertir a RGB
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+def _clamp_scale(design_scale: Optional[float]) -> float:
+    scale = design_scale if design_scale is not None else OVERLAY_DEFAULT_SCALE
+    if scale <= 0:
+        scale = OVERLAY_DEFAULT_SCALE
+    return max(OVERLAY_MIN_SCALE, min(OVERLAY_MAX_SCALE, scale))
+
+
+def _footer_overlay_box(
+    design_size: Tuple[int, int],
+    strip_width: int,
+    footer_top: int,
+    footer_height: int,
+    design_scale: Optional[float],
+    design_offset_x: Optional[float],
+    design_offset_y: Optional[float],
+    design_stretch: bool,
+) -> Box:
+    """Coloca el diseño dentro de una banda inferior reservada (footer).
+
+    - design_scale controla el ancho relativo al strip (0-1).
+    - design_offset_x controla la posición horizontal del centro (0-1) en todo el strip.
+    - design_offset_y controla la posición vertical del centro normalizada dentro del footer (0-1).
+    - design_stretch: si True, estira el diseño para llenar el footer completamente.
+    """
+    if design_stretch:
+        # MODO STRETCH: ignoramos scale y offsets, ajuste exacto al footer
+        return (0, footer_top, strip_width, footer_height)
+
+    # MODO NORMAL: Respetar aspecto y usar controles
+    scale = _clamp_scale(design_scale)
+
+    # --- SAFETY CLAMP: Ensure design fits within footer height ---
+    # target_height = (strip_width * scale) / aspect_ratio <= footer_height
+    # So: scale <= (footer_height * aspect_ratio) / strip_width
+    aspect_ratio = design_size[0] / design_size[1]
+    max_height_scale = (footer_height * aspect_ratio) / strip_width
+    scale = min(scale, max_height_scale)
+
+    target_width = int(strip_width * scale)
+    target_height = max(1, int(target_width / aspect_ratio))
+
+    # Posición horizontal normalizada en todo el strip
+    center_x_norm = design_offset_x if design_offset_x is not None else 0.5
+    center_x_norm = max(0.0, min(1.0, center_x_norm))
+    center_x = center_x_norm * strip_width
+
+    # Posición vertical normalizada dentro del footer (0-1)
+    center_y_footer_norm = design_offset_y if design_offset_y is not None else FOOTER_OVERLAY_DEFAULT_Y
+    center_y_footer_norm = max(0.0, min(1.0, center_y_footer_norm))
+    center_y = footer_top + center_y_footer_norm * footer_height
+
+    half_w = target_width / 2
+    half_h = target_height / 2
+
+    # Clamp horizontal dentro del canvas completo
+    center_x = max(half_w, min(strip_width - half_w, center_x))
+
+    # Clamp vertical dentro de la banda de footer
+    min_center_y = footer_top + half_h
+    max_center_y = footer_top + footer_height - half_h
+    if max_center_y < min_center_y:
+        max_center_y = min_center_y
+    center_y = max(min_center_y, min(max_center_y, center_y))
+
+    return (int(center_x - half_w), int(center_y - half_h), target_width, target_height)
+
+
+def _free_overlay_box(
+    design_size: Tuple[int, int],
+    strip_width: int,
+    strip_height: int,
+    design_scale: Optional[float],
+    design_offset_x: Optional[float],
+    design_offset_y: Optional[float],
+    design_position: str,
+    design_stretch: bool,
+) -> Box:
+    """Coloca el diseño como overlay libre usando escala y offsets normalizados.
+
+    - design_scale controla el ancho relativo al strip (0-1).
+    - design_offset_x/y controlan la posición del centro en coordenadas normalizadas (0-1).
+    - design_stretch: si True, estira el diseño para llenar todo el strip.
+    """
+    if design_stretch:
+        return (0, 0, strip_width, strip_height)
+
+    scale = _clamp_scale(design_scale)
+    target_width = int(strip_width * scale)
+    # Mantener proporción original
+    aspect_ratio = design_size[0] / design_size[1]
+    target_height = max(1, int(target_width / aspect_ratio))
+
+    # Posición normalizada (0-1)
+    center_x_norm = design_offset_x if design_offset_x is not None else 0.5
+    if design_offset_y is not None:
+        center_y_norm = design_offset_y
+    else:
+        center_y_norm = (
+            FREE_OVERLAY_DEFAULT_TOP_Y if design_position == DESIGN_POSITION_TOP else FREE_OVERLAY_DEFAULT_BOTTOM_Y
+        )
+
+    center_x_norm = max(0.0, min(1.0, center_x_norm))
+    center_y_norm = max(0.0, min(1.0, center_y_norm))
+
+    center_x = center_x_norm * strip_width
+    center_y = center_y_norm * strip_height
+
+    half_w = target_width / 2
+    half_h = target_height / 2
+
+    # Clamp para que el diseño no se salga completamente del canvas
+    center_x = max(half_w, min(strip_width - half_w, center_x))
+    center_y = max(half_h, min(strip_height - half_h, center_y))
+
+    return (int(center_x - half_w), int(center_y - half_h), target_width, target_height)
+
+
+@lru_cache(maxsize=LAYOUT_PLAN_CACHE_SIZE)
+def compile_layout_plan(
+    num_photos: int,
+    layout: Optional[str] = None,
+    design_position: Optional[str] = None,
+    background_color: Optional[str] = None,
+    photo_spacing: Optional[int] = None,
+    overlay_mode: Optional[str] = None,
+    design_scale: Optional[float] = None,
+    design_offset_x: Optional[float] = None,
+    design_offset_y: Optional[float] = None,
+    design_stretch: bool = False,
+    photo_aspect_ratio: Optional[str] = None,
+    design_size: Optional[Tuple[int, int]] = None,
+) -> LayoutPlan:
+    """
+    Compila la geometría de un strip. Memoizado por todos sus argumentos.
+
+    Args:
+        num_photos: Número de fotos (1-6)
+        layout: Layout del template (ej: "4x1-vertical")
+        design_size: (ancho, alto) original del diseño, None si no hay diseño
+        (resto): metadatos del template tal como llegan a compose_strip
+
+    Returns:
+        LayoutPlan inmutable
+    """
+    # Fail fast: validar número de fotos
+    if num_photos < 1 or num_photos > 6:
+        raise ValueError(f"Se requieren entre 1 y 6 fotos, recibido: {num_photos}")
+
+    # Configuración base (evitar magic numbers, usar defaults si no se proveen)
+    base_strip_width = IMAGE_CONFIG["strip_width"]
+    base_photo_height = IMAGE_CONFIG["photo_height"]
+    DESIGN_HEIGHT = IMAGE_CONFIG["design_height"]
+    TOP_MARGIN = DEFAULT_TOP_MARGIN
+    BOTTOM_MARGIN = DEFAULT_BOTTOM_MARGIN
+    PHOTO_SPACING = photo_spacing if photo_spacing is not None else DEFAULT_PHOTO_SPACING
+
+    # Convertir color de fondo de hex a RGB (PIL requiere tupla RGB)
+    if background_color and background_color.startswith('#'):
+        BACKGROUND_COLOR = hex_to_rgb(background_color)
+    elif background_color:
+        BACKGROUND_COLOR = background_color  # Ya es nombre de color o tupla
+    else:
+        BACKGROUND_COLOR = 'white'  # Default
+
+    # Normalizar aspecto de foto solicitado (delegado al template)
+    aspect_clean = (photo_aspect_ratio or "auto").strip().lower()
+    aspect_ratio_value: Optional[float] = None
+    if aspect_clean in {"1:1", "1x1", "square"}:
+        aspect_ratio_value = 1.0
+    elif aspect_clean in {"3:4", "3x4"}:
+        aspect_ratio_value = 3.0 / 4.0
+
+    # Determinar layout soportado (solo verticales por ahora)
+    layout_clean = (layout or '').strip().lower()
+    layout_supported = layout_clean if layout_clean in SUPPORTED_VERTICAL_LAYOUTS else None
+    if layout_clean and not layout_supported and layout_clean != LAYOUT_GRID_2X2:
+        logger.warning(f"layout '{layout}' no soportado aún. Usando layout dinámico por defecto.")
+
+    # Determinar posición válida del diseño (solo soportamos top/bottom por ahora)
+    design_position_normalized = (design_position or DESIGN_POSITION_BOTTOM).lower()
+    if design_position_normalized not in {DESIGN_POSITION_TOP, DESIGN_POSITION_BOTTOM}:
+        logger.warning(f"design_position '{design_position}' no soportado. Usando 'bottom'.")
+        design_position_normalized = DESIGN_POSITION_BOTTOM
+
+    design_exists = design_size is not None
+
+    overlay_mode_clean = (overlay_mode or OVERLAY_MODE_FREE).strip().lower()
+    if overlay_mode_clean not in {OVERLAY_MODE_FREE, OVERLAY_MODE_FOOTER}:
+        logger.warning(f"overlay_mode '{overlay_mode}' no soportado. Usando 'free'.")
+        overlay_mode_clean = OVERLAY_MODE_FREE
+
+    # Modo overlay libre a pantalla completa: solo cuando overlay_mode es 'free'
+    # y al menos uno de los controles viene definido. Templates antiguos sin
+    # escala/offsets siguen usando la banda fija arriba/abajo.
+    use_free_overlay = bool(
+        design_exists
+        and overlay_mode_clean == OVERLAY_MODE_FREE
+        and (
+            design_scale is not None
+            or design_offset_x is not None
+            or design_offset_y is not None
+            or design_stretch  # Stretch también activa modo overlay
+        )
+    )
+    is_footer_mode = bool(design_exists and overlay_mode_clean == OVERLAY_MODE_FOOTER)
+    use_legacy_band = bool(design_exists and not is_footer_mode and not use_free_overlay)
+
+    # Calcular dimensiones objetivo basadas en layout
+    strip_width = base_strip_width
+    target_strip_height = None
+    if layout_supported:
+        strip_width, target_strip_height = get_layout_dimensions(layout_supported)  # type: ignore[arg-type]
+
+    # Reservar espacio vertical para el diseño cuando se usa banda fija
+    # legacy o el modo footer. En modo overlay libre no reservamos banda.
+    footer_height = 0
+    if is_footer_mode:
+        if target_strip_height:
+            footer_height = int(target_strip_height * FOOTER_HEIGHT_RATIO)
+        else:
+            footer_height = DESIGN_HEIGHT
+        # Reservar siempre una pequeña banda de respiración entre fotos y footer
+        design_section_height = footer_height + FOOTER_GAP_BELOW_LAST_PHOTO
+    elif use_legacy_band:
+        # Mantener compat con banda legacy: diseño + pequeño espacio configurable
+        design_section_height = DESIGN_HEIGHT + PHOTO_SPACING
+    else:
+        design_section_height = 0
+
+    if target_strip_height:
+        available_height = target_strip_height - TOP_MARGIN - BOTTOM_MARGIN - design_section_height
+        available_for_photos = available_height - (PHOTO_SPACING * (num_photos - 1))
+        if available_for_photos <= 0:
+            logger.warning("Altura insuficiente para fotos con layout fijo. Usando altura base.")
+            target_photo_height = base_photo_height
+            strip_height = TOP_MARGIN + (base_photo_height * num_photos) + (PHOTO_SPACING * (num_photos - 1)) + design_section_height + BOTTOM_MARGIN
+        else:
+            target_photo_height = int(available_for_photos / num_photos)
+            strip_height = target_strip_height
+    else:
+        target_photo_height = base_photo_height
+        total_photos_height = (target_photo_height * num_photos) + (PHOTO_SPACING * (num_photos - 1))
+        strip_height = TOP_MARGIN + total_photos_height + design_section_height + BOTTOM_MARGIN
+
+    # Y offset inicial
+    y_offset = TOP_MARGIN
+    overlay_box: Optional[Box] = None
+    overlay_fit: Optional[str] = None
+
+    # Banda legacy arriba: el diseño ocupa el inicio y empuja las fotos
+    if use_legacy_band and design_position_normalized == DESIGN_POSITION_TOP:
+        overlay_box = (0, y_offset, strip_width, DESIGN_HEIGHT)
+        overlay_fit = "band"
+        y_offset += DESIGN_HEIGHT + PHOTO_SPACING
+
+    # Calcular dimensiones objetivo efectivas para cada foto dentro del strip
+    photo_box_width = strip_width - (HORIZONTAL_PHOTO_MARGIN * 2)
+    crop_width = photo_box_width
+    crop_height = target_photo_height
+
+    if aspect_ratio_value is not None and target_photo_height > 0:
+        # Partimos de la altura vertical disponible y ajustamos ancho según el aspecto
+        eff_height = target_photo_height
+        eff_width = int(eff_height * aspect_ratio_value)
+
+        # Si el ancho excede el espacio lateral disponible, re-ajustar desde el ancho
+        if eff_width > photo_box_width and aspect_ratio_value > 0:
+            eff_width = photo_box_width
+            eff_height = int(eff_width / aspect_ratio_value)
+
+        crop_width = max(1, eff_width)
+        crop_height = max(1, eff_height)
+
+    # Posición centrada de cada foto
+    x_pos = (strip_width - crop_width) // 2
+    photo_positions = []
+    for _ in range(num_photos):
+        photo_positions.append((x_pos, y_offset))
+        y_offset += target_photo_height + PHOTO_SPACING
+
+    if use_legacy_band and design_position_normalized == DESIGN_POSITION_BOTTOM:
+        overlay_box = (0, y_offset, strip_width, DESIGN_HEIGHT)
+        overlay_fit = "band"
+    elif use_free_overlay and design_size is not None:
+        overlay_box = _free_overlay_box(
+            design_size,
+            strip_width,
+            strip_height,
+            design_scale,
+            design_offset_x,
+            design_offset_y,
+            design_position_normalized,
+            design_stretch,
+        )
+        overlay_fit = "stretch" if design_stretch else "fit"
+    elif is_footer_mode and design_size is not None and footer_height > 0:
+        # Overlay en modo footer: banda inferior reservada, movimiento limitado
+        footer_top = strip_height - BOTTOM_MARGIN - footer_height
+        if footer_top < TOP_MARGIN:
+            footer_top = TOP_MARGIN
+        overlay_box = _footer_overlay_box(
+            design_size,
+            strip_width,
+            footer_top,
+            footer_height,
+            design_scale,
+            design_offset_x,
+            design_offset_y,
+            design_stretch,
+        )
+        overlay_fit = "stretch" if design_stretch else "fit"
+
+    return LayoutPlan(
+        canvas_size=(strip_width, strip_height),
+        background_color=BACKGROUND_COLOR,
+        crop_size=(crop_width, crop_height),
+        photo_positions=tuple(photo_positions),
+        overlay_box=overlay_box,
+        overlay_fit=overlay_fit,
+    )
+
+
+__all__ = [
+    "LayoutPlan",
+    "compile_layout_plan",
+    "hex_to_rgb",
+    "print_target_size",
+]
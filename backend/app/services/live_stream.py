@@ -0,0 +1,187 @@
+"""
+Live view MJPEG con fan-out a varios clientes
+
+El renderer es dueño de la cámara, así que el backend no tenía live view
+para una segunda pantalla o la tablet del operador. Este hub (opcional)
+sirve ``/api/camera/stream`` como ``multipart/x-mixed-replace``:
+
+- Una sola fuente: los frames salen del CaptureDaemon (un hilo de captura,
+  cámara abierta una vez); el hub lo arranca si no corre.
+- Un solo encode por frame: un hilo encoder reduce el frame al ancho del
+  stream, lo codifica a JPEG y publica ``(secuencia, bytes)`` como último
+  frame compartido. El costo de CPU no crece con los clientes.
+- Fan-out sin colas: cada cliente tiene un ``asyncio.Event`` que el encoder
+  activa; al despertar envía el último frame. Un cliente lento simplemente
+  se salta los frames intermedios (drop por cliente), nunca acumula.
+- Sin clientes el encoder se detiene; el daemon vuelve a su idle timeout.
+  Un frame que no se puede decodificar/codificar se descarta, el encoder sigue.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Optional, Set, Tuple
+
+import cv2
+from starlette.concurrency import run_in_threadpool
+
+from app.config import LIVE_STREAM_CONFIG
+from app.logging_config import logger
+from app.services.camera_service import CameraService
+from app.services.capture_daemon import CaptureDaemon
+
+BOUNDARY = "frame"
+
+# (loop del cliente, evento de frame nuevo)
+Subscriber = Tuple[asyncio.AbstractEventLoop, asyncio.Event]
+
+
+class LiveStreamHub:
+    """Encoder único + último frame compartido para todos los clientes."""
+
+    ENABLED: bool = LIVE_STREAM_CONFIG["enabled"]
+    FPS: float = LIVE_STREAM_CONFIG["fps"]
+    WIDTH: int = LIVE_STREAM_CONFIG["width"]
+    QUALITY: int = LIVE_STREAM_CONFIG["quality"]
+    STALL_TIMEOUT_S = 5.0
+
+    _subscribers: Set[Subscriber] = set()
+    _latest: Optional[Tuple[int, bytes]] = None
+    _encoder: Optional[threading.Thread] = None
+    _lock = threading.Lock()
+    _frames_encoded: int = 0
+    _encode_seconds: float = 0.0
+
+    @classmethod
+    async def _subscribe(cls, camera_id: int) -> Subscriber:
+        # start() abre la cámara y puede esperar al daemon anterior: fuera del event loop
+        await run_in_threadpool(CaptureDaemon.start, camera_id)
+        subscriber: Subscriber = (asyncio.get_running_loop(), asyncio.Event())
+        with cls._lock:
+            cls._subscribers.add(subscriber)
+        cls._ensure_encoder()
+        return subscriber
+
+    @classmethod
+    def _ensure_encoder(cls) -> None:
+        with cls._lock:
+            if cls._subscribers and (cls._encoder is None or not cls._encoder.is_alive()):
+                cls._encoder = threading.Thread(target=cls._encode_loop, name="live-stream-encoder", daemon=True)
+                cls._encoder.start()
+
+    @classmethod
+    def _unsubscribe(cls, subscriber: Subscriber) -> None:
+        with cls._lock:
+            cls._subscribers.discard(subscriber)
+
+    @classmethod
+    def _encode_loop(cls) -> None:
+        interval = 1.0 / cls.FPS if cls.FPS > 0 else 0.0
+        last_ts = 0.0
+        sequence = 0
+        try:
+            while True:
+                with cls._lock:
+                    if not cls._subscribers:
+                        cls._encoder = None
+                        cls._latest = None
+                        return
+
+                CaptureDaemon.touch()
+                timed = CaptureDaemon.wait_next_frame(last_ts + interval, timeout=1.0)
+                if timed is None:
+                    if not CaptureDaemon.is_running():
+                        time.sleep(0.2)
+                    continue
+
+                last_ts, frame = timed
+                started = time.perf_counter()
+                try:
+                    encoded = cls._encode(frame)
+                except Exception as exc:
+                    # Un JPEG corrupto de la cámara no debe cortar el live view
+                    logger.warning(f"Live view: frame descartado ({exc})")
+                    continue
+                if encoded is None:
+                    continue
+
+                sequence += 1
+                with cls._lock:
+                    cls._latest = (sequence, encoded)
+                    cls._frames_encoded += 1
+                    cls._encode_seconds += time.perf_counter() - started
+                    subscribers = list(cls._subscribers)
+
+                for loop, event in subscribers:
+                    try:
+                        loop.call_soon_threadsafe(event.set)
+                    except RuntimeError:
+                        # Loop cerrado: el cliente ya se fue
+                        cls._unsubscribe((loop, event))
+        finally:
+            with cls._lock:
+                if cls._encoder is threading.current_thread():
+                    cls._encoder = None
+
+    @classmethod
+    def _encode(cls, frame) -> Optional[bytes]:
+        """Frame del daemon a JPEG del ancho del stream (None si el encode falla)."""
+        if CameraService.is_jpeg_buffer(frame):
+            # Daemon en modo MJPEG: decode a escala reducida antes del resize
+            frame = CameraService.decode_frame(frame, min_width=cls.WIDTH or None)
+        height, width = frame.shape[:2]
+        if cls.WIDTH and width > cls.WIDTH:
+            frame = cv2.resize(frame, (cls.WIDTH, int(height * cls.WIDTH / width)), interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, cls.QUALITY])
+        return encoded.tobytes() if ok else None
+
+    @classmethod
+    async def stream(cls, camera_id: int = 0) -> AsyncIterator[bytes]:
+        """Partes multipart con el último frame disponible para un cliente."""
+        subscriber = await cls._subscribe(camera_id)
+        _, event = subscriber
+        last_sequence = 0
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=cls.STALL_TIMEOUT_S)
+                except asyncio.TimeoutError:
+                    if not CaptureDaemon.is_running():
+                        # Cámara no disponible o daemon detenido: cerrar el stream
+                        return
+                    cls._ensure_encoder()
+                    continue
+                event.clear()
+                latest = cls._latest
+                if latest is None or latest[0] == last_sequence:
+                    continue
+                # Si el cliente tardó, last_sequence salta: frames intermedios descartados
+                last_sequence, payload = latest
+                yield (
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n"
+                ).encode("ascii") + payload + b"\r\n"
+        finally:
+            cls._unsubscribe(subscriber)
+            logger.info("Cliente de live view desconectado")
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            frames = cls._frames_encoded
+            return {
+                "enabled": cls.ENABLED,
+                "clients": len(cls._subscribers),
+                "encoding": cls._encoder is not None and cls._encoder.is_alive(),
+                "frames_encoded": frames,
+                "avg_encode_ms": round(cls._encode_seconds / frames * 1000, 2) if frames else None,
+                "fps": cls.FPS,
+                "width": cls.WIDTH,
+            }
+
+
+__all__ = [
+    "BOUNDARY",
+    "LiveStreamHub",
+]
@@ -0,0 +1,84 @@
+"""
+Canvas de página con memoria acotada
+
+Un strip 6x1 o una página 5x7 a 300 dpi son millones de píxeles; con
+``Image.new`` todo el canvas vive en memoria anónima del proceso y, en el
+kiosko de 4 GB compartido con Electron, termina en swap.
+
+Para canvas grandes se usa un archivo temporal mapeado en memoria
+(``mmap``) como buffer de la imagen: PIL pinta las fotos, el overlay y la
+imposición directamente sobre el mapeo y el encoder JPEG lo lee por filas.
+Las páginas del archivo son cache del sistema de archivos, así que el
+kernel puede devolverlas a disco sin swap; la memoria anónima queda acotada
+por las fotos de un strip, no por el tamaño de la página.
+
+PIL no expone un encoder JPEG incremental por bandas, por eso el canvas se
+respalda en disco en vez de renderizar franjas sueltas.
+"""
+from __future__ import annotations
+
+import logging
+import mmap
+import tempfile
+from typing import Tuple, Union
+
+from PIL import Image
+
+from app.config import IMAGE_CONFIG, TEMP_DIR
+
+logger = logging.getLogger("app")
+
+ColorValue = Union[str, Tuple[int, int, int]]
+
+# RGBX: 4 bytes/píxel, el layout interno de PIL para imágenes RGB
+_BYTES_PER_PIXEL = 4
+
+# Píxel de prueba: distinto del mapeo recién creado (todo en cero)
+_PROBE_PIXEL = (1, 2, 3)
+
+
+def uses_mapped_canvas(size: Tuple[int, int]) -> bool:
+    """True si un canvas de este tamaño se respalda en disco."""
+    return size[0] * size[1] >= IMAGE_CONFIG["mapped_canvas_min_pixels"]
+
+
+def new_canvas(size: Tuple[int, int], color: ColorValue = "white") -> Image.Image:
+    """Crea el canvas de un strip o página.
+
+    Pequeño: ``Image.new("RGB")`` de siempre. Grande: imagen RGBX sobre un
+    archivo temporal mapeado en ``TEMP_DIR`` (se borra al cerrar el archivo;
+    el mapeo vive mientras viva la imagen).
+    """
+    if not uses_mapped_canvas(size):
+        return Image.new("RGB", size, color)
+
+    width, height = size
+    nbytes = width * height * _BYTES_PER_PIXEL
+
+    TEMP_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryFile(dir=TEMP_DIR, prefix="canvas_") as backing:
+        backing.truncate(nbytes)
+        # mmap duplica el descriptor: el archivo puede cerrarse ya
+        mapping = mmap.mmap(backing.fileno(), nbytes)
+
+    canvas = Image.frombuffer("RGBX", size, mapping, "raw", "RGBX", 0, 1)
+    # frombuffer marca la imagen como solo lectura y la copiaría en memoria
+    # anónima en el primer paste; escribir directo sobre el mapeo es el objetivo.
+    # ``readonly`` no es API pública de PIL: se comprueba con un píxel de
+    # prueba que la escritura llegue al mapeo y, si no, se usa Image.new.
+    canvas.readonly = 0
+    canvas.paste(_PROBE_PIXEL, (0, 0, 1, 1))
+    if mapping[:3] != bytes(_PROBE_PIXEL):
+        logger.warning("PIL copió el canvas mapeado; usando un canvas en memoria")
+        canvas.close()
+        return Image.new("RGB", size, color)
+
+    fill = Image.new("RGB", (1, 1), color).getpixel((0, 0))
+    canvas.paste(fill, (0, 0, width, height))
+    return canvas
+
+
+__all__ = [
+    "new_canvas",
+    "uses_mapped_canvas",
+]
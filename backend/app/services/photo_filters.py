@@ -0,0 +1,136 @@
+"""
+Motor de filtros de fotos
+
+Cada filtro con nombre (bw, sepia, glam, ...) se compila una sola vez a una
+matriz de color 3x3 + offset y se aplica con ``Image.convert("RGB", matrix)``:
+una única pasada en C sobre la foto ya recortada, sin imágenes intermedias.
+
+- Duotono (bw, sepia): color = oscuro + (claro - oscuro) * luma / 255
+- Ajustes (glam): brillo * contraste * saturación combinados en una matriz;
+  el pivote del contraste depende de la luminancia media de cada foto, así
+  que solo el offset se calcula por imagen (histograma, barato).
+
+Para agregar un filtro nuevo basta con registrarlo en ``PHOTO_FILTERS``.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageStat
+
+# Coeficientes ITU-R 601-2, los mismos que usa PIL para convert("L")
+LUMA_WEIGHTS = (0.299, 0.587, 0.114)
+
+Matrix3 = Tuple[Tuple[float, float, float], ...]
+
+
+def _hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
+    hex_color = hex_color.lstrip("#")
+    return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))  # type: ignore[return-value]
+
+
+class PhotoFilter:
+    """Filtro compilado a una matriz de color RGB -> RGB."""
+
+    def __init__(
+        self,
+        name: str,
+        matrix: Matrix3,
+        offset: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+        contrast: Optional[float] = None,
+        brightness: float = 1.0,
+    ) -> None:
+        self.name = name
+        self.matrix = matrix
+        self.offset = offset
+        # Si hay contraste, el offset final depende de la luma media de la foto
+        self.contrast = contrast
+        self.brightness = brightness
+
+    def _matrix_for(self, photo: Image.Image) -> Tuple[float, ...]:
+        offset = list(self.offset)
+
+        if self.contrast is not None:
+            # Igual que ImageEnhance.Contrast: pivote en la luma media (tras el brillo)
+            means = ImageStat.Stat(photo).mean
+            mean_luma = sum(w * m for w, m in zip(LUMA_WEIGHTS, means[:3]))
+            pivot = min(255.0, mean_luma * self.brightness)
+            shift = pivot * (1.0 - self.contrast)
+            offset = [o + shift for o in offset]
+
+        flat: list[float] = []
+        for row, row_offset in zip(self.matrix, offset):
+            flat.extend(row)
+            flat.append(row_offset)
+        return tuple(flat)
+
+    def apply(self, photo: Image.Image) -> Image.Image:
+        """Devuelve una nueva imagen RGB con el filtro aplicado (una pasada)."""
+        source = photo if photo.mode == "RGB" else photo.convert("RGB")
+        try:
+            return source.convert("RGB", self._matrix_for(source))
+        finally:
+            if source is not photo:
+                source.close()
+
+
+def compile_duotone(name: str, dark: str, light: str) -> PhotoFilter:
+    """Mapea la luminancia a un degradado oscuro -> claro (ImageOps.colorize)."""
+    dark_rgb = _hex_to_rgb(dark)
+    light_rgb = _hex_to_rgb(light)
+    matrix = tuple(
+        tuple(((hi - lo) / 255.0) * w for w in LUMA_WEIGHTS)
+        for lo, hi in zip(dark_rgb, light_rgb)
+    )
+    offset = tuple(float(lo) for lo in dark_rgb)
+    return PhotoFilter(name, matrix, offset)  # type: ignore[arg-type]
+
+
+def compile_adjustments(
+    name: str,
+    brightness: float = 1.0,
+    contrast: float = 1.0,
+    saturation: float = 1.0,
+) -> PhotoFilter:
+    """Combina brillo, contraste y saturación (ImageEnhance) en una matriz.
+
+    out = contraste * brillo * (sat * c + (1 - sat) * luma) + pivote * (1 - contraste)
+    """
+    gain = contrast * brightness
+    matrix = tuple(
+        tuple(
+            gain * ((saturation if col == row else 0.0) + (1.0 - saturation) * LUMA_WEIGHTS[col])
+            for col in range(3)
+        )
+        for row in range(3)
+    )
+    return PhotoFilter(
+        name,
+        matrix,  # type: ignore[arg-type]
+        contrast=contrast if contrast != 1.0 else None,
+        brightness=brightness,
+    )
+
+
+# Registro de filtros compilados (se construyen una sola vez al importar)
+PHOTO_FILTERS: Dict[str, PhotoFilter] = {
+    "bw": compile_duotone("bw", "#000000", "#ffffff"),
+    # Tonos cálidos para efecto sepia suave
+    "sepia": compile_duotone("sepia", "#2b1b0f", "#f5e0c7"),
+    # Ligero realce de brillo, contraste y color, consistente con el preview CSS
+    "glam": compile_adjustments("glam", brightness=1.08, contrast=1.12, saturation=1.2),
+}
+
+
+def get_photo_filter(name: Optional[str]) -> Optional[PhotoFilter]:
+    """Devuelve el filtro compilado o None para "none"/desconocidos."""
+    return PHOTO_FILTERS.get((name or "none").strip().lower())
+
+
+__all__ = [
+    "PhotoFilter",
+    "PHOTO_FILTERS",
+    "compile_adjustments",
+    "compile_duotone",
+    "get_photo_filter",
+]
@@ -0,0 +1,358 @@
+"""
+Pipeline asíncrono de persistencia de fotos
+
+Capturas y uploads bloqueaban la petición mientras escribían el JPEG,
+generaban el thumbnail (el upload además reabría el archivo recién escrito),
+lo guardaban y reescribían sessions.json completo.
+
+Aquí la petición solo espera a que los bytes originales estén en disco de
+forma durable (archivo temporal + fsync + rename). Thumbnail y registro en
+la sesión corren en writers de fondo:
+
+- Orden por sesión: cada sesión cae siempre en el mismo writer (shard por
+  crc32 del session_id), así las fotos se registran en orden de captura.
+- Colas acotadas: si los writers se atrasan, ``submit`` bloquea (backpressure)
+  en vez de acumular frames en memoria.
+- Índices reservados: el número de ``shot-N`` sale de una marca por sesión
+  que solo avanza (sembrada con el mayor ``shot-N`` en disco), así una foto
+  cuyo thumbnail o registro falló nunca se sobrescribe. La sesión guarda el
+  índice de cada foto y las lista en ese orden aunque se registren en otro.
+  ``claim_index`` toma un índice explícito (el ``shot_index`` del renderer)
+  si no está en vuelo ni escrito.
+- ``flush(session_id)`` espera las escrituras pendientes; compose-strip lo
+  llama antes de componer y de registrar el strip.
+
+Con ``PHOTO_PIPELINE_CONFIG["enabled"] = False`` todo corre en línea.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Set, Tuple
+
+import cv2
+from PIL import Image
+
+from app.config import PHOTO_PIPELINE_CONFIG, PHOTOS_DIR, get_photo_url
+from app.logging_config import logger
+from app.schemas.session import SessionPhoto
+from app.services.session_service import SessionService
+
+THUMB_WIDTH = 320
+THUMB_QUALITY = 80
+
+_SHOT_RE = re.compile(r"^shot-(\d+)\.jpg$")
+
+# (índice de foto, ruta del original, frame BGR o None si hay que leer el archivo)
+PendingPhoto = Tuple[int, Path, Optional[Any]]
+
+
+class PhotoPipeline:
+    """Writers de fondo para thumbnails y metadata de sesión."""
+
+    ENABLED: bool = PHOTO_PIPELINE_CONFIG["enabled"]
+    WORKERS: int = max(1, PHOTO_PIPELINE_CONFIG["workers"])
+    QUEUE_SIZE: int = max(1, PHOTO_PIPELINE_CONFIG["queue_size"])
+    FSYNC: bool = PHOTO_PIPELINE_CONFIG["fsync"]
+
+    _queues: List["queue.Queue[Optional[Tuple[str, List[PendingPhoto]]]]"] = []
+    _threads: List[Optional[threading.Thread]] = []
+    _lock = threading.Lock()
+    _idle = threading.Condition(_lock)
+    # session_id -> índices reservados aún no registrados / próximo índice libre
+    # (la marca nunca retrocede: un índice reservado no se vuelve a entregar)
+    _pending: Dict[str, Set[int]] = {}
+    _next_index: Dict[str, int] = {}
+    _completed: int = 0
+    _failed: int = 0
+    _last_error: Optional[str] = None
+
+    # ---------- API para capturas/uploads ----------
+
+    @classmethod
+    def reserve_indices(cls, session_id: str, count: int = 1) -> List[int]:
+        """Reserva ``count`` índices consecutivos de foto para la sesión."""
+        # Fuera del lock: tras un reinicio la marca arranca después del último shot en disco
+        on_disk = cls._next_free_on_disk(session_id)
+        with cls._lock:
+            next_index = max(cls._next_index.get(session_id, 1), on_disk)
+            indices = list(range(next_index, next_index + count))
+            cls._next_index[session_id] = next_index + count
+            cls._pending.setdefault(session_id, set()).update(indices)
+        return indices
+
+    @classmethod
+    def claim_index(cls, session_id: str, photo_index: int) -> None:
+        """Reserva un índice elegido por el cliente.
+
+        Raises:
+            ValueError: si el índice es inválido, está en vuelo o ``shot-N`` ya existe
+        """
+        if photo_index < 1:
+            raise ValueError(f"Índice de foto inválido: {photo_index}")
+        with cls._lock:
+            pending = cls._pending.setdefault(session_id, set())
+            if photo_index in pending or (PHOTOS_DIR / session_id / f"shot-{photo_index}.jpg").exists():
+                if not pending:
+                    cls._pending.pop(session_id, None)
+                raise ValueError(f"La foto {photo_index} de la sesión {session_id} ya existe")
+            pending.add(photo_index)
+            cls._next_index[session_id] = max(cls._next_index.get(session_id, 1), photo_index + 1)
+
+    @staticmethod
+    def _next_free_on_disk(session_id: str) -> int:
+        """Índice siguiente al mayor ``shot-N.jpg`` de la carpeta de la sesión."""
+        session_dir = PHOTOS_DIR / session_id
+        if not session_dir.is_dir():
+            return 1
+        highest = 0
+        for entry in os.scandir(session_dir):
+            match = _SHOT_RE.match(entry.name)
+            if match:
+                highest = max(highest, int(match.group(1)))
+        return highest + 1
+
+    @classmethod
+    def cancel(cls, session_id: str, indices: List[int]) -> None:
+        """Libera reservas que no se van a enviar (captura fallida)."""
+        cls._finish(session_id, indices)
+
+    @classmethod
+    def write_original(cls, path: Path, data: bytes) -> Path:
+        """Escribe los bytes originales de forma durable antes de responder."""
+        return cls._durable_write(path, lambda file: file.write(data))
+
+    @classmethod
+    def write_original_stream(
+        cls,
+        path: Path,
+        source: BinaryIO,
+        max_bytes: int,
+        chunk_size: int = 256 * 1024,
+        validate: Optional[Callable[[BinaryIO], None]] = None,
+    ) -> int:
+        """Copia ``source`` a ``path`` por bloques, de forma durable.
+
+        El límite de tamaño se aplica mientras se copia (nunca hay más de un
+        bloque en memoria). ``validate`` recibe el archivo temporal ya escrito
+        (posicionado al inicio) antes del rename; si lanza, no queda nada.
+
+        Returns:
+            Bytes escritos
+        """
+        written = 0
+
+        def _copy(file: BinaryIO) -> None:
+            nonlocal written
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise ValueError(f"Imagen demasiado grande (> {max_bytes // (1024 * 1024)} MB)")
+                file.write(chunk)
+            if written == 0:
+                raise ValueError("Imagen vacía al subir foto")
+            if validate is not None:
+                file.flush()
+                file.seek(0)
+                validate(file)
+
+        cls._durable_write(path, _copy)
+        return written
+
+    @classmethod
+    def _durable_write(cls, path: Path, write: Callable[[BinaryIO], Any]) -> Path:
+        """Temporal + fsync + rename (+ fsync del directorio)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with tmp.open("w+b") as file:
+                write(file)
+                if cls.FSYNC:
+                    file.flush()
+                    os.fsync(file.fileno())
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+        if cls.FSYNC and hasattr(os, "O_DIRECTORY"):
+            # El rename también debe sobrevivir a un corte de luz
+            dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        return path
+
+    @classmethod
+    def submit(cls, session_id: str, photos: List[PendingPhoto]) -> None:
+        """Encola thumbnails + registro de fotos ya escritas (una actualización de sesión)."""
+        if not photos:
+            return
+        if not cls.ENABLED:
+            cls._process(session_id, photos)
+            return
+
+        cls._ensure_started()
+        shard = zlib.crc32(session_id.encode("utf-8")) % cls.WORKERS
+        # put() bloquea si el writer va atrasado: memoria acotada
+        cls._queues[shard].put((session_id, photos))
+
+    @classmethod
+    def flush(cls, session_id: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Espera a que terminen las escrituras pendientes (de una sesión o todas).
+
+        Returns:
+            True si no queda nada pendiente, False si venció ``timeout``.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with cls._idle:
+            while True:
+                if session_id:
+                    pending = len(cls._pending.get(session_id, ()))
+                else:
+                    pending = sum(len(indices) for indices in cls._pending.values())
+                if pending <= 0:
+                    return True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                cls._idle.wait(remaining)
+
+    # ---------- Writers ----------
+
+    @classmethod
+    def _ensure_started(cls) -> None:
+        with cls._lock:
+            if not cls._queues:
+                cls._queues = [queue.Queue(maxsize=cls.QUEUE_SIZE) for _ in range(cls.WORKERS)]
+                cls._threads = [None] * cls.WORKERS
+            # Un writer caído se reemplaza sobre su misma cola: lo ya encolado no se pierde
+            for shard, thread in enumerate(cls._threads):
+                if thread is not None and thread.is_alive():
+                    continue
+                if thread is not None:
+                    logger.warning(f"Pipeline de fotos: reiniciando photo-writer-{shard}")
+                cls._threads[shard] = threading.Thread(
+                    target=cls._worker_loop,
+                    args=(cls._queues[shard],),
+                    name=f"photo-writer-{shard}",
+                    daemon=True,
+                )
+                cls._threads[shard].start()
+
+    @classmethod
+    def _worker_loop(cls, tasks: "queue.Queue[Optional[Tuple[str, List[PendingPhoto]]]]") -> None:
+        while True:
+            task = tasks.get()
+            try:
+                if task is None:
+                    return
+                cls._process(*task)
+            finally:
+                tasks.task_done()
+
+    @classmethod
+    def _process(cls, session_id: str, photos: List[PendingPhoto]) -> None:
+        records: List[SessionPhoto] = []
+        try:
+            for photo_index, filepath, frame in photos:
+                thumb_path = filepath.with_name(f"thumb-{photo_index}.jpg")
+                if frame is not None:
+                    cls._thumbnail_from_frame(frame, thumb_path)
+                else:
+                    cls._thumbnail_from_file(filepath, thumb_path)
+
+                photo_url = get_photo_url(filepath)
+                records.append(
+                    SessionPhoto(
+                        filename=filepath.name,
+                        path=photo_url,
+                        url=photo_url,
+                        thumbnail_url=get_photo_url(thumb_path),
+                        photo_index=photo_index,
+                    )
+                )
+
+            SessionService.append_photos(session_id, records)
+            with cls._lock:
+                cls._completed += len(photos)
+        except Exception as exc:
+            logger.error(f"Error persistiendo fotos de la sesión {session_id}: {exc}", exc_info=True)
+            with cls._lock:
+                cls._failed += len(photos)
+                cls._last_error = str(exc)
+        finally:
+            cls._finish(session_id, [photo_index for photo_index, _, _ in photos])
+
+    @classmethod
+    def _finish(cls, session_id: str, indices: List[int]) -> None:
+        with cls._idle:
+            pending = cls._pending.get(session_id)
+            if pending is not None:
+                pending.difference_update(indices)
+                if not pending:
+                    del cls._pending[session_id]
+            cls._idle.notify_all()
+
+    @staticmethod
+    def _thumbnail_from_frame(frame: Any, thumb_path: Path) -> None:
+        height, width = frame.shape[:2]
+        thumb_height = int(height * THUMB_WIDTH / width)
+        thumbnail = cv2.resize(frame, (THUMB_WIDTH, thumb_height))
+        cv2.imwrite(str(thumb_path), thumbnail, [cv2.IMWRITE_JPEG_QUALITY, THUMB_QUALITY])
+
+    @staticmethod
+    def _thumbnail_from_file(filepath: Path, thumb_path: Path) -> None:
+        with Image.open(filepath) as img:
+            width, height = img.size
+            if width == 0 or height == 0:
+                raise RuntimeError("Imagen inválida al generar thumbnail")
+            thumb_height = max(1, int(height * THUMB_WIDTH / width))
+            # JPEG: decodificar a escala reducida (1/2..1/8 en el DCT), no la foto completa
+            img.draft("RGB", (THUMB_WIDTH, thumb_height))
+            thumbnail = img.convert("RGB").resize((THUMB_WIDTH, thumb_height), Image.Resampling.LANCZOS)
+            thumbnail.save(thumb_path, format="JPEG", quality=THUMB_QUALITY)
+
+    # ---------- Ciclo de vida ----------
+
+    @classmethod
+    def shutdown(cls, timeout: float = 10.0) -> None:
+        """Drena lo pendiente y detiene los writers."""
+        if not cls.flush(timeout=timeout):
+            logger.warning("Pipeline de fotos: quedaron escrituras pendientes al cerrar")
+        with cls._lock:
+            queues, threads = cls._queues, cls._threads
+            cls._queues, cls._threads = [], []
+        for tasks in queues:
+            tasks.put(None)
+        for thread in threads:
+            if thread is not None:
+                thread.join(timeout=timeout)
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "enabled": cls.ENABLED,
+                "workers": cls.WORKERS,
+                "queued": sum(tasks.qsize() for tasks in cls._queues),
+                "pending_photos": sum(len(indices) for indices in cls._pending.values()),
+                "completed": cls._completed,
+                "failed": cls._failed,
+                "last_error": cls._last_error,
+            }
+
+
+__all__ = [
+    "PhotoPipeline",
+]
@@ -7,16 +7,24 @@ Servicio de Impresión - Optimizado para macOS/Windows
 import json
 import platform
 from pathlib import Path
-from typing import Optional, List
+from typing import Callable, Optional, List
 import subprocess
 import os
 
-from app.config import DATA_DIR
+from app.config import DATA_DIR, PAPER_SIZES_INCHES
 from app.api.settings import load_settings
 from app.logging_config import logger
 
 PRINT_SIMULATION = os.getenv("PRINT_SIMULATION", "0") == "1"
 
+# Índices de GetDeviceCaps (wingdi.h)
+HORZRES = 8
+VERTRES = 10
+LOGPIXELSX = 88
+LOGPIXELSY = 90
+PHYSICALOFFSETX = 112
+PHYSICALOFFSETY = 113
+
 
 class PrintService:
     """Servicio de impresión multiplataforma"""
@@ -81,6 +89,23 @@ class PrintService:
             logger.error(f"Error leyendo default_printer de settings.json: {exc}")
             return None
 
+    @staticmethod
+    def native_resolution_dpi(image_path: Path, paper_size: str, printer_dpi: int) -> Optional[int]:
+        """DPI de la impresora si la imagen ya mide exactamente el papel en
+        píxeles de dispositivo (render_target = "print"); None si hay que escalar.
+        """
+        width_in, height_in = PAPER_SIZES_INCHES.get(paper_size, PAPER_SIZES_INCHES["4x6"])
+        expected = (int(round(width_in * printer_dpi)), int(round(height_in * printer_dpi)))
+        try:
+            from PIL import Image
+
+            with Image.open(image_path) as img:
+                size = img.size
+        except Exception as exc:
+            logger.warning(f"No se pudo leer el tamaño de {image_path}: {exc}")
+            return None
+        return printer_dpi if size == expected else None
+
     @staticmethod
     def get_available_printers() -> List[str]:
         """
@@ -221,12 +246,14 @@ class PrintService:
             "5x7": ("Custom.5x7in", (1270, 1778)),
         }
         media_option, media_size = media_options.get(settings.paper_size, media_options["4x6"])
+        # Raster ya compuesto al tamaño exacto del papel: enviarlo sin escalar
+        native_dpi = PrintService.native_resolution_dpi(image_path, settings.paper_size, settings.printer_dpi)
 
         try:
             if system == "Darwin":  # macOS
-                return PrintService._print_macos(image_path, printer_name, copies, media_option)
+                return PrintService._print_macos(image_path, printer_name, copies, media_option, native_dpi)
             elif system == "Windows":
-                return PrintService._print_windows(image_path, printer_name, copies, media_size)
+                return PrintService._print_windows(image_path, printer_name, copies, media_size, native_dpi)
             else:
                 print(f"Sistema no soportado: {system}")
                 return False
@@ -240,9 +267,14 @@ class PrintService:
         printer_name: Optional[str],
         copies: int,
         media_option: str,
+        native_dpi: Optional[int] = None,
     ) -> bool:
         """
         Imprime en macOS usando lp o lpr.
+
+        Con ``native_dpi`` la imagen ya tiene el tamaño del papel a esa
+        resolución: se imprime a esos ppi en vez de fit-to-page (sin
+        segundo remuestreo en el filtro de CUPS).
         """
         try:
             # Construir comando lp
@@ -257,11 +289,12 @@ class PrintService:
                 cmd.extend(['-n', str(copies)])
             
             # Opciones de impresión para calidad
-            cmd.extend([
-                '-o', f'media={media_option}',
-                '-o', 'fit-to-page',
-                '-o', 'print-quality=5',  # Máxima calidad
-            ])
+            cmd.extend(['-o', f'media={media_option}'])
+            if native_dpi:
+                cmd.extend(['-o', f'ppi={native_dpi}'])
+            else:
+                cmd.extend(['-o', 'fit-to-page'])
+            cmd.extend(['-o', 'print-quality=5'])  # Máxima calidad
             
             # Archivo a imprimir
             cmd.append(str(image_path))
@@ -291,11 +324,19 @@ class PrintService:
         printer_name: Optional[str],
         copies: int,
         media_size: tuple[int, int],
+        native_dpi: Optional[int] = None,
     ) -> bool:
         """
         Imprime en Windows usando win32print.
+
+        Con ``native_dpi`` se pide esa resolución en el DEVMODE (con sus flags
+        en ``Fields``; sin ellos el driver ignora los campos). Si el driver la
+        acepta, la imagen (que ya mide el papel en píxeles de dispositivo) se
+        dibuja 1:1 desde el origen físico de la hoja; si no, o sin
+        ``native_dpi``, se escala al área imprimible manteniendo proporción.
         """
         try:
+            import win32con
             import win32print
             import win32ui
             from PIL import Image, ImageWin
@@ -312,11 +353,16 @@ class PrintService:
                 hdc = win32ui.CreateDC()
                 hdc.CreatePrinterDC(printer_name)
 
-                # Ajustar tamaño de papel en DEVMODE si es posible
+                # Ajustar tamaño de papel (y resolución) en DEVMODE si es posible
                 try:
                     devmode = hdc.GetDevMode()
                     # dmPaperWidth y dmPaperLength están en décimas de mm
                     devmode.PaperWidth, devmode.PaperLength = media_size
+                    devmode.Fields |= win32con.DM_PAPERWIDTH | win32con.DM_PAPERLENGTH
+                    if native_dpi:
+                        devmode.PrintQuality = native_dpi
+                        devmode.YResolution = native_dpi
+                        devmode.Fields |= win32con.DM_PRINTQUALITY | win32con.DM_YRESOLUTION
                     hdc.ResetDC(devmode)
                 except Exception as e:
                     print(f"No se pudo ajustar tamaño de papel: {e}")
@@ -333,25 +379,9 @@ class PrintService:
                     # Preparar imagen
                     dib = ImageWin.Dib(img)
                     
-                    # Obtener dimensiones de la página
-                    printable_width = hdc.GetDeviceCaps(8)  # HORZRES
-                    printable_height = hdc.GetDeviceCaps(10)  # VERTRES
-                    
-                    # Calcular escala manteniendo aspect ratio
-                    img_width, img_height = img.size
-                    scale_w = printable_width / img_width
-                    scale_h = printable_height / img_height
-                    scale = min(scale_w, scale_h)
-                    
-                    scaled_width = int(img_width * scale)
-                    scaled_height = int(img_height * scale)
-                    
-                    # Centrar imagen
-                    x = (printable_width - scaled_width) // 2
-                    y = (printable_height - scaled_height) // 2
-                    
-                    # Dibujar
-                    dib.draw(hdc.GetHandleOutput(), (x, y, x + scaled_width, y + scaled_height))
+                    # Dibujar (1:1 o escalada según lo que aceptó el driver)
+                    rect = PrintService._windows_draw_rect(hdc.GetDeviceCaps, img.size, native_dpi)
+                    dib.draw(hdc.GetHandleOutput(), rect)
                     
                     # Finalizar página
                     hdc.EndPage()
@@ -372,3 +402,31 @@ class PrintService:
         except Exception as e:
             print(f"Error en _print_windows: {e}")
             return False
+
+    @staticmethod
+    def _windows_draw_rect(
+        get_device_caps: Callable[[int], int],
+        image_size: tuple[int, int],
+        native_dpi: Optional[int],
+    ) -> tuple[int, int, int, int]:
+        """Rectángulo de destino del DIB en coordenadas del DC de impresora.
+
+        1:1 cuando el DC quedó en ``native_dpi``: el origen del DC es la esquina
+        del área imprimible, así que la imagen (del tamaño del papel) se
+        desplaza por PHYSICALOFFSETX/Y y el margen no imprimible queda fuera.
+        Si no, se escala al área imprimible (HORZRES/VERTRES) y se centra.
+        """
+        img_width, img_height = image_size
+        if native_dpi and get_device_caps(LOGPIXELSX) == native_dpi and get_device_caps(LOGPIXELSY) == native_dpi:
+            x = -get_device_caps(PHYSICALOFFSETX)
+            y = -get_device_caps(PHYSICALOFFSETY)
+            return (x, y, x + img_width, y + img_height)
+
+        printable_width = get_device_caps(HORZRES)
+        printable_height = get_device_caps(VERTRES)
+        scale = min(printable_width / img_width, printable_height / img_height)
+        scaled_width = int(img_width * scale)
+        scaled_height = int(img_height * scale)
+        x = (printable_width - scaled_width) // 2
+        y = (printable_height - scaled_height) // 2
+        return (x, y, x + scaled_width, y + scaled_height)
@@ -1,51 +1,268 @@
 """Session persistence helpers.
 
-Stores per-session metadata in data/sessions/sessions.json so other
-services (camera, image, print) can enrich records incrementally without
-requiring a full database.
+Stores per-session metadata in data/sessions/sessions.db (SQLite, WAL mode)
+so other services (camera, image, print) can enrich records incrementally
+without requiring a database server.
+
+Sessions, photos and print jobs are rows: appending a photo or a print job
+is one INSERT instead of parsing and rewriting every session, and listing
+uses the indexes on preset_id, status and created_at. The legacy
+data/sessions/sessions.json is imported automatically when the store is
+opened (once; the import is recorded in store_meta) and kept as
+sessions.json.migrated.
 """
 from __future__ import annotations
 
 import json
+import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Iterator, Tuple
 
 from app.config import DATA_DIR
+from app.logging_config import logger
 from app.schemas.session import (
     SessionPhoto,
     SessionPrintJob,
     SessionRecord,
 )
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    preset_id TEXT,
+    preset_name TEXT,
+    template_id TEXT,
+    template_layout TEXT,
+    status TEXT NOT NULL DEFAULT 'capturing',
+    strip_path TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    notes TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_preset_id ON sessions (preset_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions (status);
+CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions (created_at);
+
+CREATE TABLE IF NOT EXISTS photos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL,
+    url TEXT NOT NULL,
+    thumbnail_url TEXT,
+    captured_at TEXT NOT NULL,
+    photo_index INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_photos_session_id ON photos (session_id, id);
+
+CREATE TABLE IF NOT EXISTS print_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    job_id TEXT NOT NULL,
+    printer_name TEXT NOT NULL,
+    copies INTEGER NOT NULL DEFAULT 1,
+    requested_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error_message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_print_jobs_session_id ON print_jobs (session_id, id);
+
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# store_meta key set once sessions.json has been imported
+_LEGACY_MIGRATED_KEY = "legacy_json_migrated_at"
+
+_SESSION_COLUMNS = (
+    "session_id",
+    "preset_id",
+    "preset_name",
+    "template_id",
+    "template_layout",
+    "status",
+    "strip_path",
+    "created_at",
+    "updated_at",
+    "notes",
+)
+_PHOTO_COLUMNS = ("filename", "path", "url", "thumbnail_url", "captured_at", "photo_index")
+_PRINT_JOB_COLUMNS = ("job_id", "printer_name", "copies", "requested_at", "status", "error_message")
+
 
 class SessionService:
     """Utility methods to load/save session metadata safely."""
 
     SESSIONS_DIR: Path = DATA_DIR / "sessions"
-    DB_FILE: Path = SESSIONS_DIR / "sessions.json"
+    DB_FILE: Path = SESSIONS_DIR / "sessions.db"
+    LEGACY_JSON_FILE: Path = SESSIONS_DIR / "sessions.json"
 
-    @classmethod
-    def _load_db(cls) -> Dict[str, SessionRecord]:
-        if not cls.DB_FILE.exists():
-            return {}
+    # One connection per thread (API threadpool, photo pipeline writers);
+    # WAL lets readers proceed while a writer commits.
+    _local = threading.local()
+    _init_lock = threading.Lock()
+    _initialized_file: Path | None = None
 
-        with cls.DB_FILE.open("r", encoding="utf-8") as file:
-            data = json.load(file)
-            return {
-                session_id: SessionRecord(**record)
-                for session_id, record in data.items()
-            }
+    # ---------- Storage ----------
 
     @classmethod
-    def _save_db(cls, sessions: Dict[str, SessionRecord]) -> None:
+    def _connection(cls) -> sqlite3.Connection:
+        conn = getattr(cls._local, "conn", None)
+        if conn is not None and getattr(cls._local, "db_file", None) == cls.DB_FILE:
+            return conn
+
         cls.SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
-        payload = {
-            session_id: record.model_dump()
-            for session_id, record in sessions.items()
-        }
-        with cls.DB_FILE.open("w", encoding="utf-8") as file:
-            json.dump(payload, file, indent=2, ensure_ascii=False)
+        conn = sqlite3.connect(str(cls.DB_FILE), timeout=10.0)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: durable on app crash, one fsync per checkpoint instead of per commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        cls._local.conn = conn
+        cls._local.db_file = cls.DB_FILE
+
+        with cls._init_lock:
+            if cls._initialized_file != cls.DB_FILE:
+                conn.executescript(_SCHEMA)
+                cls._upgrade_schema(conn)
+                cls._migrate_legacy_json(conn)
+                cls._initialized_file = cls.DB_FILE
+        return conn
+
+    @classmethod
+    @contextmanager
+    def _transaction(cls) -> Iterator[sqlite3.Connection]:
+        conn = cls._connection()
+        with conn:
+            yield conn
+
+    @staticmethod
+    def _upgrade_schema(conn: sqlite3.Connection) -> None:
+        """Add columns introduced after a database was created."""
+        photo_columns = {row["name"] for row in conn.execute("PRAGMA table_info(photos)")}
+        if "photo_index" not in photo_columns:
+            with conn:
+                conn.execute("ALTER TABLE photos ADD COLUMN photo_index INTEGER")
+
+    @classmethod
+    def _migrate_legacy_json(cls, conn: sqlite3.Connection) -> None:
+        """Import sessions.json once.
+
+        The import is recorded in store_meta, not inferred from the row count:
+        if the JSON cannot be read the store still opens (new sessions keep
+        working) and the import is retried on the next start, merging the
+        legacy sessions that are not in the store yet.
+        """
+        if conn.execute("SELECT 1 FROM store_meta WHERE key = ?", (_LEGACY_MIGRATED_KEY,)).fetchone():
+            return
+        if not cls.LEGACY_JSON_FILE.exists():
+            return
+
+        try:
+            with cls.LEGACY_JSON_FILE.open("r", encoding="utf-8") as file:
+                data = json.load(file)
+            records = [SessionRecord(**record) for record in data.values()]
+        except Exception as exc:
+            logger.error(
+                f"No se pudo migrar {cls.LEGACY_JSON_FILE} (se reintentará al próximo inicio): {exc}"
+            )
+            return
+
+        with conn:
+            existing = {row[0] for row in conn.execute("SELECT session_id FROM sessions")}
+            imported = [record for record in records if record.session_id not in existing]
+            for record in imported:
+                cls._write_record(conn, record)
+            conn.execute(
+                "INSERT INTO store_meta (key, value) VALUES (?, ?)",
+                (_LEGACY_MIGRATED_KEY, datetime.now().isoformat()),
+            )
+        cls.LEGACY_JSON_FILE.rename(cls.LEGACY_JSON_FILE.with_name("sessions.json.migrated"))
+        logger.info(f"Sesiones migradas de sessions.json a SQLite: {len(imported)}")
+
+    @staticmethod
+    def _upsert_session_row(conn: sqlite3.Connection, record: SessionRecord) -> None:
+        placeholders = ", ".join("?" for _ in _SESSION_COLUMNS)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in _SESSION_COLUMNS[1:])
+        conn.execute(
+            f"INSERT INTO sessions ({', '.join(_SESSION_COLUMNS)}) VALUES ({placeholders}) "
+            f"ON CONFLICT (session_id) DO UPDATE SET {updates}",
+            [getattr(record, column) for column in _SESSION_COLUMNS],
+        )
+
+    @staticmethod
+    def _insert_photos(conn: sqlite3.Connection, session_id: str, photos: list[SessionPhoto]) -> None:
+        conn.executemany(
+            f"INSERT INTO photos (session_id, {', '.join(_PHOTO_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [[session_id, *(getattr(photo, column) for column in _PHOTO_COLUMNS)] for photo in photos],
+        )
+
+    @staticmethod
+    def _insert_print_jobs(conn: sqlite3.Connection, session_id: str, jobs: list[SessionPrintJob]) -> None:
+        conn.executemany(
+            f"INSERT INTO print_jobs (session_id, {', '.join(_PRINT_JOB_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [[session_id, *(getattr(job, column) for column in _PRINT_JOB_COLUMNS)] for job in jobs],
+        )
+
+    @classmethod
+    def _write_record(cls, conn: sqlite3.Connection, record: SessionRecord) -> None:
+        """Replace a whole record (session row + its photos and print jobs)."""
+        cls._upsert_session_row(conn, record)
+        conn.execute("DELETE FROM photos WHERE session_id = ?", (record.session_id,))
+        conn.execute("DELETE FROM print_jobs WHERE session_id = ?", (record.session_id,))
+        cls._insert_photos(conn, record.session_id, record.photos)
+        cls._insert_print_jobs(conn, record.session_id, record.print_jobs)
+
+    @staticmethod
+    def _ensure_session(conn: sqlite3.Connection, session_id: str, now: str) -> None:
+        conn.execute(
+            "INSERT OR IGNORE INTO sessions (session_id, created_at, updated_at) VALUES (?, ?, ?)",
+            (session_id, now, now),
+        )
+
+    @classmethod
+    def _load_records(cls, conn: sqlite3.Connection, rows: list[sqlite3.Row]) -> list[SessionRecord]:
+        """Build SessionRecords for session rows, fetching children in one query each."""
+        if not rows:
+            return []
+        session_ids = [row["session_id"] for row in rows]
+        photos: Dict[str, list[SessionPhoto]] = {session_id: [] for session_id in session_ids}
+        jobs: Dict[str, list[SessionPrintJob]] = {session_id: [] for session_id in session_ids}
+
+        # Chunked to stay below SQLite's bound-parameter limit
+        for start in range(0, len(session_ids), 500):
+            chunk = session_ids[start:start + 500]
+            marks = ", ".join("?" for _ in chunk)
+            for row in conn.execute(
+                # Shot order, not insert order: writers may register shots out of order.
+                # Rows without an index (imported from sessions.json) sort first.
+                f"SELECT session_id, {', '.join(_PHOTO_COLUMNS)} FROM photos "
+                f"WHERE session_id IN ({marks}) ORDER BY photo_index, id",
+                chunk,
+            ):
+                photos[row["session_id"]].append(SessionPhoto(**{column: row[column] for column in _PHOTO_COLUMNS}))
+            for row in conn.execute(
+                f"SELECT session_id, {', '.join(_PRINT_JOB_COLUMNS)} FROM print_jobs "
+                f"WHERE session_id IN ({marks}) ORDER BY id",
+                chunk,
+            ):
+                jobs[row["session_id"]].append(SessionPrintJob(**{column: row[column] for column in _PRINT_JOB_COLUMNS}))
+
+        return [
+            SessionRecord(
+                **{column: row[column] for column in _SESSION_COLUMNS},
+                photos=photos[row["session_id"]],
+                print_jobs=jobs[row["session_id"]],
+            )
+            for row in rows
+        ]
+
+    # ---------- Public API ----------
 
     @classmethod
     def list_sessions(
@@ -54,47 +271,49 @@ class SessionService:
         status: str | None = None,
         limit: int = 50,
     ) -> Tuple[list[SessionRecord], int]:
-        sessions = cls._load_db()
-        records = list(sessions.values())
-
+        conditions, params = [], []
         if preset_id:
-            records = [record for record in records if record.preset_id == preset_id]
-
+            conditions.append("preset_id = ?")
+            params.append(preset_id)
         if status:
-            records = [record for record in records if record.status == status]
+            conditions.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 
+        conn = cls._connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM sessions {where}", params).fetchone()[0]
         # Sort newest first
-        records.sort(key=lambda record: record.created_at, reverse=True)
-        total = len(records)
-        return records[:limit], total
+        rows = conn.execute(
+            f"SELECT * FROM sessions {where} ORDER BY created_at DESC LIMIT ?",
+            [*params, limit],
+        ).fetchall()
+        return cls._load_records(conn, rows), total
 
     @classmethod
     def get_all_sessions(cls) -> list[SessionRecord]:
-        sessions = cls._load_db()
-        records = list(sessions.values())
-        records.sort(key=lambda record: record.created_at, reverse=True)
-        return records
+        conn = cls._connection()
+        rows = conn.execute("SELECT * FROM sessions ORDER BY created_at DESC").fetchall()
+        return cls._load_records(conn, rows)
 
     @classmethod
     def get_session(cls, session_id: str) -> SessionRecord | None:
-        sessions = cls._load_db()
-        return sessions.get(session_id)
+        conn = cls._connection()
+        row = conn.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        return cls._load_records(conn, [row])[0]
 
     @classmethod
     def save_session(cls, record: SessionRecord) -> SessionRecord:
-        sessions = cls._load_db()
-        sessions[record.session_id] = record
-        cls._save_db(sessions)
+        with cls._transaction() as conn:
+            cls._write_record(conn, record)
         return record
 
     @classmethod
     def delete_session(cls, session_id: str) -> bool:
-        sessions = cls._load_db()
-        if session_id not in sessions:
-            return False
-        del sessions[session_id]
-        cls._save_db(sessions)
-        return True
+        with cls._transaction() as conn:
+            cursor = conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
 
     @classmethod
     def create_or_update(
@@ -102,37 +321,69 @@ class SessionService:
         session_id: str,
         **fields,
     ) -> SessionRecord:
-        session = cls.get_session(session_id)
-        if session is None:
-            session = SessionRecord(session_id=session_id)
+        """Create the session if needed and update only the supplied fields.
+
+        Everything happens in one transaction and only the given columns are
+        written, so a concurrent set_strip/add_print_job is never overwritten
+        with stale values. ``photos`` / ``print_jobs`` replace those lists.
+        """
+        values = {field: value for field, value in fields.items() if value is not None}
+        unknown = set(values) - set(_SESSION_COLUMNS[1:]) - {"photos", "print_jobs"}
+        if unknown:
+            raise ValueError(f"Unknown session fields: {', '.join(sorted(unknown))}")
 
-        for field, value in fields.items():
-            if value is not None:
-                setattr(session, field, value)
+        photos = values.pop("photos", None)
+        print_jobs = values.pop("print_jobs", None)
+        now = datetime.now().isoformat()
+        values["updated_at"] = now
 
-        session.updated_at = datetime.now().isoformat()
-        return cls.save_session(session)
+        with cls._transaction() as conn:
+            cls._ensure_session(conn, session_id, now)
+            assignments = ", ".join(f"{column} = ?" for column in values)
+            conn.execute(
+                f"UPDATE sessions SET {assignments} WHERE session_id = ?",
+                [*values.values(), session_id],
+            )
+            if photos is not None:
+                conn.execute("DELETE FROM photos WHERE session_id = ?", (session_id,))
+                cls._insert_photos(
+                    conn,
+                    session_id,
+                    [photo if isinstance(photo, SessionPhoto) else SessionPhoto(**photo) for photo in photos],
+                )
+            if print_jobs is not None:
+                conn.execute("DELETE FROM print_jobs WHERE session_id = ?", (session_id,))
+                cls._insert_print_jobs(
+                    conn,
+                    session_id,
+                    [job if isinstance(job, SessionPrintJob) else SessionPrintJob(**job) for job in print_jobs],
+                )
+        return cls.get_session(session_id)
 
     @classmethod
     def append_photo(cls, session_id: str, photo: SessionPhoto) -> SessionRecord:
-        session = cls.get_session(session_id)
-        if session is None:
-            session = SessionRecord(session_id=session_id)
+        return cls.append_photos(session_id, [photo])
 
-        session.photos.append(photo)
-        session.updated_at = datetime.now().isoformat()
-        return cls.save_session(session)
+    @classmethod
+    def append_photos(cls, session_id: str, photos: list[SessionPhoto]) -> SessionRecord:
+        """Registra varias fotos (ráfaga) en una sola transacción."""
+        now = datetime.now().isoformat()
+        with cls._transaction() as conn:
+            cls._ensure_session(conn, session_id, now)
+            cls._insert_photos(conn, session_id, photos)
+            conn.execute("UPDATE sessions SET updated_at = ? WHERE session_id = ?", (now, session_id))
+        return cls.get_session(session_id)
 
     @classmethod
     def set_strip(cls, session_id: str, strip_path: str) -> SessionRecord:
-        session = cls.get_session(session_id)
-        if session is None:
-            session = SessionRecord(session_id=session_id)
-
-        session.strip_path = strip_path
-        session.status = "composed"
-        session.updated_at = datetime.now().isoformat()
-        return cls.save_session(session)
+        now = datetime.now().isoformat()
+        with cls._transaction() as conn:
+            cls._ensure_session(conn, session_id, now)
+            conn.execute(
+                "UPDATE sessions SET strip_path = ?, status = 'composed', updated_at = ? WHERE session_id = ?",
+                (strip_path, now, session_id),
+            )
+        return cls.get_session(session_id)
 
     @classmethod
     def add_print_job(
@@ -140,14 +391,14 @@ class SessionService:
         session_id: str,
         job: SessionPrintJob,
     ) -> SessionRecord:
-        session = cls.get_session(session_id)
-        if session is None:
-            session = SessionRecord(session_id=session_id)
-
-        session.print_jobs.append(job)
-        session.status = "printed" if job.status == "sent" else session.status
-        session.updated_at = datetime.now().isoformat()
-        return cls.save_session(session)
+        now = datetime.now().isoformat()
+        with cls._transaction() as conn:
+            cls._ensure_session(conn, session_id, now)
+            cls._insert_print_jobs(conn, session_id, [job])
+            if job.status == "sent":
+                conn.execute("UPDATE sessions SET status = 'printed' WHERE session_id = ?", (session_id,))
+            conn.execute("UPDATE sessions SET updated_at = ? WHERE session_id = ?", (now, session_id))
+        return cls.get_session(session_id)
 
 
 __all__ = [
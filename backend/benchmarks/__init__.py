@@ -0,0 +1,8 @@
+"""
+Benchmarks del backend
+
+Scripts independientes (no forman parte de la API) para medir rutas
+calientes en el hardware real del kiosko. Ejecutar desde ``backend/``:
+
+    python -m benchmarks.<nombre>
+"""
@@ -0,0 +1,217 @@
+"""
+Benchmark: latencia de captura
+
+Mide una foto etapa por etapa con la fuente de frames configurada (por
+defecto una cámara sintética, así corre en un Linux sin cámara ni
+pantalla; ``--source device`` usa la cámara real):
+
+- open: abrir y configurar el dispositivo (``_open_device``)
+- warm-up: frames descartados tras abrir
+- read: un frame
+- encode: JPEG del frame (0 en modo MJPEG passthrough)
+- write: escritura durable de shot-N.jpg
+- thumbnail: thumbnail de 320 px
+- metadata: registro de la foto en la sesión
+
+y la latencia de punta a punta de los tres modos de captura: única
+(abrir/leer/cerrar), daemon (cámara caliente) y ráfaga. "respuesta" es lo
+que espera el endpoint; "persistido" incluye thumbnail y sesión.
+
+Todo se escribe en un ``PHOTOBOOTH_DATA_DIR`` temporal.
+
+Uso:
+    python -m benchmarks.capture [--source synthetic:1280x720@30] [--capture-mode decoded|mjpeg]
+                                 [--width 1280 --height 720] [--runs 10] [--burst 4]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+STAGES = ("open", "warm-up", "read", "encode", "write", "thumbnail", "metadata")
+WARMUP_FRAMES = 3  # Igual que CameraService.capture_photo
+
+
+def _row(name: str, timings: list[float]) -> str:
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return f"{name:>22} | {statistics.median(ms):>8.1f} | {p95:>8.1f} | {ms[-1]:>8.1f}"
+
+
+def _print_table(title: str, rows: dict[str, list[float]]) -> None:
+    print(title)
+    print(f"{'':>22} | {'mediana':>8} | {'p95':>8} | {'máx':>8}  (ms)")
+    print("-" * 58)
+    for name, timings in rows.items():
+        if timings:
+            print(_row(name, timings))
+    print()
+
+
+def _bench_stages(settings, runs: int) -> dict[str, list[float]]:
+    import cv2
+
+    from app.config import PHOTOS_DIR, get_photo_url
+    from app.schemas.session import SessionPhoto
+    from app.services.camera_service import CameraService
+    from app.services.photo_pipeline import PhotoPipeline
+    from app.services.session_service import SessionService
+
+    session_id = "bench-stages"
+    timings: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    for run in range(1, runs + 1):
+        start = time.perf_counter()
+        cap = CameraService._open_device(0, settings)
+        timings["open"].append(time.perf_counter() - start)
+        try:
+            start = time.perf_counter()
+            for _ in range(WARMUP_FRAMES):
+                cap.read()
+            timings["warm-up"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            timings["read"].append(time.perf_counter() - start)
+        finally:
+            cap.release()
+        if not ret or frame is None:
+            raise RuntimeError("La fuente no entregó frames")
+
+        raw = CameraService.is_jpeg_buffer(frame)
+        start = time.perf_counter()
+        if raw:
+            data = frame.tobytes()
+        else:
+            data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+        timings["encode"].append(time.perf_counter() - start)
+
+        filepath = PHOTOS_DIR / session_id / f"shot-{run}.jpg"
+        start = time.perf_counter()
+        PhotoPipeline.write_original(filepath, data)
+        timings["write"].append(time.perf_counter() - start)
+
+        thumb_path = filepath.with_name(f"thumb-{run}.jpg")
+        start = time.perf_counter()
+        if raw:
+            PhotoPipeline._thumbnail_from_file(filepath, thumb_path)
+        else:
+            PhotoPipeline._thumbnail_from_frame(frame, thumb_path)
+        timings["thumbnail"].append(time.perf_counter() - start)
+
+        photo_url = get_photo_url(filepath)
+        record = SessionPhoto(
+            filename=filepath.name,
+            path=photo_url,
+            url=photo_url,
+            thumbnail_url=get_photo_url(thumb_path),
+        )
+        start = time.perf_counter()
+        SessionService.append_photos(session_id, [record])
+        timings["metadata"].append(time.perf_counter() - start)
+    return timings
+
+
+def _bench_single(runs: int) -> dict[str, list[float]]:
+    from app.services.camera_service import CameraService
+    from app.services.photo_pipeline import PhotoPipeline
+
+    response, persisted = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        CameraService.capture_photo(0, "bench-single")
+        response.append(time.perf_counter() - start)
+        PhotoPipeline.flush("bench-single")
+        persisted.append(time.perf_counter() - start)
+    return {"respuesta": response, "persistido": persisted}
+
+
+def _bench_daemon(runs: int) -> dict[str, list[float]]:
+    from app.services.camera_service import CameraService
+    from app.services.capture_daemon import CaptureDaemon
+    from app.services.photo_pipeline import PhotoPipeline
+
+    start = time.perf_counter()
+    CaptureDaemon.start(0)
+    if CaptureDaemon.wait_next_frame(0.0, timeout=10.0) is None:
+        CaptureDaemon.stop()
+        raise RuntimeError(f"El daemon no entregó frames: {CaptureDaemon.status()['last_error']}")
+    first_frame = time.perf_counter() - start
+
+    response, persisted = [], []
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            CameraService.capture_photo(0, "bench-daemon")
+            response.append(time.perf_counter() - start)
+            PhotoPipeline.flush("bench-daemon")
+            persisted.append(time.perf_counter() - start)
+    finally:
+        CaptureDaemon.stop()
+    return {"arranque (1er frame)": [first_frame], "respuesta": response, "persistido": persisted}
+
+
+def _bench_burst(runs: int, count: int) -> dict[str, list[float]]:
+    from app.services.camera_service import CameraService
+    from app.services.photo_pipeline import PhotoPipeline
+
+    response, persisted, per_shot = [], [], []
+    for run in range(runs):
+        session_id = f"bench-burst-{run}"
+        start = time.perf_counter()
+        # capture_burst vuelve con los originales en disco; thumbnails y sesión van al pipeline
+        CameraService.capture_burst(0, session_id, count=count)
+        response.append(time.perf_counter() - start)
+        PhotoPipeline.flush(session_id)
+        elapsed = time.perf_counter() - start
+        persisted.append(elapsed)
+        per_shot.append(elapsed / count)
+    return {"respuesta": response, "persistido": persisted, "por foto": per_shot}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default="synthetic", help="device | synthetic[:WxH][@FPS] | file:<video>")
+    parser.add_argument("--capture-mode", choices=("decoded", "mjpeg"), default="decoded")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--burst", type=int, default=4, help="Fotos por ráfaga")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_capture_") as tmp:
+        # Antes de importar app: PHOTOS_DIR y sessions.json salen de aquí
+        os.environ["PHOTOBOOTH_DATA_DIR"] = tmp
+        os.environ["PHOTOBOOTH_CAMERA_SOURCE"] = args.source
+
+        from app.api.settings import load_settings
+        from app.services import camera_service
+        from app.services.photo_pipeline import PhotoPipeline
+
+        settings = load_settings().model_copy(
+            update={
+                "camera_width": args.width,
+                "camera_height": args.height,
+                "camera_capture_mode": args.capture_mode,
+            }
+        )
+        # Los modos de captura leen settings.json; el benchmark usa los de la línea de comandos
+        camera_service.load_settings = lambda: settings
+
+        print(
+            f"Fuente {args.source}, {args.width}x{args.height}, modo {args.capture_mode}, "
+            f"{args.runs} corridas\n"
+        )
+        try:
+            _print_table("Etapas de una captura", _bench_stages(settings, args.runs))
+            _print_table("Captura única (abrir/leer/cerrar)", _bench_single(args.runs))
+            _print_table("Daemon (cámara caliente)", _bench_daemon(args.runs))
+            _print_table(f"Ráfaga de {args.burst} (una apertura)", _bench_burst(max(1, args.runs // 2), args.burst))
+        finally:
+            PhotoPipeline.shutdown()
+
+
+if __name__ == "__main__":
+    main()
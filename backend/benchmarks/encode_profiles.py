@@ -0,0 +1,111 @@
+"""
+Benchmark: perfiles de codificación JPEG
+
+Codifica strips reales con cada perfil de ``ENCODE_PROFILES`` y reporta
+tiempo de encode (mediana) frente a bytes resultantes, para elegir el
+perfil de cada artefacto en el hardware del kiosko.
+
+Por defecto usa los ``strip.jpg`` / ``full_strip.jpg`` de las sesiones en
+``PHOTOS_DIR``; sin sesiones, compone un strip con fotos sintéticas.
+
+Uso:
+    python -m benchmarks.encode_profiles [--runs 5] [--limit 5] [strip.jpg ...]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+
+def _find_session_strips(limit: int) -> list[Path]:
+    from app.config import PHOTOS_DIR
+
+    strips = sorted(
+        (p for pattern in ("*/strip.jpg", "*/full_strip.jpg") for p in PHOTOS_DIR.glob(pattern)),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    return strips[:limit]
+
+
+def _compose_synthetic_strip(tmp_dir: Path) -> Path:
+    """Compone un strip 4x1 con fotos sintéticas (sin pasar por el pool)."""
+    from app.services.image_service import ImageService
+
+    photos = []
+    for index in range(4):
+        path = tmp_dir / f"photo_{index}.jpg"
+        img = Image.new("RGB", (1920, 1080), (60 + index * 30, 120, 200 - index * 30))
+        draw = ImageDraw.Draw(img)
+        for x in range(0, 1920, 24):
+            draw.line([(x, 0), (1920 - x, 1080)], fill=(255, (x * 7) % 255, 40), width=3)
+        img.save(path, format="JPEG", quality=90)
+        photos.append(path)
+
+    strip = ImageService._build_strip(photos, None, None, None, layout="4x1-vertical")
+    output = tmp_dir / "synthetic_strip.png"
+    strip.save(output)  # PNG: sin pérdida previa que favorezca a ningún perfil
+    strip.close()
+    return output
+
+
+def _bench_profile(image: Image.Image, save_kwargs: dict, runs: int) -> tuple[float, int]:
+    timings = []
+    size = 0
+    for _ in range(runs):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        image.save(buffer, **save_kwargs)
+        timings.append(time.perf_counter() - start)
+        size = buffer.tell()
+    return statistics.median(timings), size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("strips", nargs="*", type=Path, help="Strips a codificar (default: sesiones recientes)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=5, help="Máximo de strips de sesiones a usar")
+    args = parser.parse_args()
+
+    from app.config import ARTIFACT_ENCODE_PROFILES, ENCODE_PROFILES
+    from app.services.encode_profiles import EncodeProfiles
+
+    with tempfile.TemporaryDirectory(prefix="bench_encode_") as tmp:
+        strips = list(args.strips) or _find_session_strips(args.limit)
+        if not strips:
+            print("Sin strips en sesiones; usando un strip sintético.\n")
+            strips = [_compose_synthetic_strip(Path(tmp))]
+
+        used_by: dict[str, list[str]] = {}
+        for artifact, profile in ARTIFACT_ENCODE_PROFILES.items():
+            used_by.setdefault(profile, []).append(artifact)
+
+        print(f"Mediana de {args.runs} encodes por perfil\n")
+        for strip_path in strips:
+            with Image.open(strip_path) as source:
+                image = source.convert("RGB")
+
+            print(f"{strip_path} ({image.width}x{image.height})")
+            print(f"{'perfil':>8} | {'ms':>7} | {'KB':>7} | {'q':>3} | {'sub':>5} | {'opt':>3} | {'prog':>4} | artefactos")
+            print("-" * 78)
+            for name in ENCODE_PROFILES:
+                profile = EncodeProfiles.get(name)
+                elapsed, size = _bench_profile(image, EncodeProfiles.save_kwargs(profile), args.runs)
+                print(
+                    f"{name:>8} | {elapsed * 1000:>7.1f} | {size / 1024:>7.0f} | {profile['quality']:>3} | "
+                    f"{profile.get('subsampling', '-'):>5} | {'sí' if profile.get('optimize') else 'no':>3} | "
+                    f"{'sí' if profile.get('progressive') else 'no':>4} | {', '.join(used_by.get(name, [])) or '-'}"
+                )
+            print()
+            image.close()
+
+
+if __name__ == "__main__":
+    main()
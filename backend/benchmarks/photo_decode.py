@@ -0,0 +1,142 @@
+"""
+Benchmark: decodificación de fotos para compose_strip
+
+Compara la ruta anterior (decode completo + LANCZOS) contra la actual
+(``ImageService._open_photo`` con DCT scaling + ``reducing_gap``) para una
+tira de 6 fotos a varias resoluciones de cámara.
+
+Cada modo corre en un proceso hijo para medir el pico de RSS de forma
+aislada (``ru_maxrss``, solo Linux/macOS).
+
+Uso:
+    python -m benchmarks.photo_decode [--runs 5] [--photos 6]
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+# Caja de foto típica de un strip 6x1 (ancho 550 = 600 - 2 * 25 de margen)
+TARGET_BOX = (550, 413)
+SOURCE_SIZES = [(1280, 720), (1920, 1080), (3840, 2160)]
+
+
+def _make_source(path: Path, size: tuple[int, int]) -> None:
+    """Genera una foto sintética con detalle suficiente para que el JPEG pese."""
+    width, height = size
+    img = Image.new("RGB", size, (90, 140, 200))
+    draw = ImageDraw.Draw(img)
+    step = max(8, width // 80)
+    for x in range(0, width, step):
+        draw.line([(x, 0), (width - x, height)], fill=(255, (x * 7) % 255, 40), width=3)
+    for y in range(0, height, step):
+        draw.line([(0, y), (width, height - y)], fill=(30, (y * 5) % 255, 220), width=2)
+    img.save(path, format="JPEG", quality=90)
+
+
+def _legacy_process(photo_path: Path) -> None:
+    """Ruta anterior: decode completo + LANCZOS directo + recorte."""
+    target_width, target_height = TARGET_BOX
+    with Image.open(photo_path) as photo:
+        img_ratio = photo.width / photo.height
+        if img_ratio > target_width / target_height:
+            new_size = (int(target_height * img_ratio), target_height)
+        else:
+            new_size = (target_width, int(target_width / img_ratio))
+        resized = photo.resize(new_size, Image.Resampling.LANCZOS)
+        left = (new_size[0] - target_width) // 2
+        top = (new_size[1] - target_height) // 2
+        cropped = resized.crop((left, top, left + target_width, top + target_height))
+        cropped.close()
+        resized.close()
+
+
+def _current_process(photo_path: Path) -> None:
+    from app.services.image_service import ImageService
+
+    photo = ImageService._open_photo(photo_path, *TARGET_BOX)
+    try:
+        processed = ImageService._process_photo(photo, *TARGET_BOX)
+        processed.close()
+    finally:
+        photo.close()
+
+
+def _run_mode(mode: str, photo_paths: list[str], runs: int, queue) -> None:
+    # Ambos modos importan el servicio para partir del mismo RSS base
+    import app.services.image_service  # noqa: F401
+
+    worker = _legacy_process if mode == "legacy" else _current_process
+    paths = [Path(p) for p in photo_paths]
+
+    # Calentar imports y caches del decoder
+    worker(paths[0])
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for path in paths:
+            worker(path)
+        timings.append(time.perf_counter() - start)
+
+    peak_rss_mb = None
+    try:
+        import resource
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB, macOS bytes
+        peak_rss_mb = rss / 1024 if sys.platform != "darwin" else rss / (1024 * 1024)
+    except ImportError:  # pragma: no cover - Windows
+        pass
+
+    queue.put((statistics.median(timings), peak_rss_mb))
+
+
+def _measure(mode: str, photo_paths: list[Path], runs: int) -> tuple[float, float | None]:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_mode, args=(mode, [str(p) for p in photo_paths], runs, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--photos", type=int, default=6)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_decode_") as tmp:
+        tmp_dir = Path(tmp)
+        print(f"Tira de {args.photos} fotos -> caja {TARGET_BOX[0]}x{TARGET_BOX[1]}, mediana de {args.runs} corridas\n")
+        print(f"{'fuente':>11} | {'legacy ms':>9} | {'draft ms':>9} | {'speedup':>7} | {'RSS legacy':>10} | {'RSS draft':>9}")
+        print("-" * 72)
+
+        for size in SOURCE_SIZES:
+            source = tmp_dir / f"source_{size[0]}x{size[1]}.jpg"
+            _make_source(source, size)
+            photo_paths = [source] * args.photos
+
+            legacy_s, legacy_rss = _measure("legacy", photo_paths, args.runs)
+            current_s, current_rss = _measure("current", photo_paths, args.runs)
+
+            def _fmt_rss(value: float | None) -> str:
+                return f"{value:.0f} MB" if value is not None else "n/a"
+
+            print(
+                f"{size[0]:>5}x{size[1]:<5} | {legacy_s * 1000:>9.1f} | {current_s * 1000:>9.1f} | "
+                f"{legacy_s / current_s:>6.1f}x | {_fmt_rss(legacy_rss):>10} | {_fmt_rss(current_rss):>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
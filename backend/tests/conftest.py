@@ -0,0 +1,59 @@
+"""
+Configuración común de los tests del backend
+
+``app.config`` resuelve las rutas de datos al importarse, así que la carpeta
+temporal se fija aquí, antes del primer ``import app``. Ejecutar desde
+``backend/``:
+
+    python -m pytest
+"""
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+os.environ["PHOTOBOOTH_DATA_DIR"] = tempfile.mkdtemp(prefix="photobooth_tests_")
+os.environ["PHOTOBOOTH_PHOTO_FSYNC"] = "0"
+
+
+@pytest.fixture
+def session_store(tmp_path, monkeypatch):
+    """SessionService sobre una base SQLite vacía en ``tmp_path``."""
+    from app.services.session_service import SessionService
+
+    sessions_dir = tmp_path / "sessions"
+    monkeypatch.setattr(SessionService, "SESSIONS_DIR", sessions_dir)
+    monkeypatch.setattr(SessionService, "DB_FILE", sessions_dir / "sessions.db")
+    monkeypatch.setattr(SessionService, "LEGACY_JSON_FILE", sessions_dir / "sessions.json")
+    return SessionService
+
+
+@pytest.fixture
+def photos_dir() -> Path:
+    from app.config import PHOTOS_DIR
+
+    return PHOTOS_DIR
+
+
+def make_jpeg(width: int = 64, height: int = 48, color=(200, 80, 40)) -> bytes:
+    """JPEG chico en memoria para capturas y uploads de prueba."""
+    import io
+
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def pipeline(session_store):
+    """PhotoPipeline con writers y marcas de índice limpios."""
+    from app.services.photo_pipeline import PhotoPipeline
+
+    PhotoPipeline.shutdown(timeout=5.0)
+    PhotoPipeline._pending.clear()
+    PhotoPipeline._next_index.clear()
+    yield PhotoPipeline
+    PhotoPipeline.shutdown(timeout=5.0)
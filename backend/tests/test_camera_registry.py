@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from app.services import camera_registry
+from app.services.camera_registry import CameraRegistry, parse_v4l2_formats
+from app.services.frame_sources import FrameSources
+
+V4L2_OUTPUT = """\
+ioctl: VIDIOC_ENUM_FMT
+\tType: Video Capture
+
+\t[0]: 'MJPG' (Motion-JPEG, compressed)
+\t\tSize: Discrete 1920x1080
+\t\t\tInterval: Discrete 0.033s (30.000 fps)
+\t\tSize: Discrete 1280x720
+\t\t\tInterval: Discrete 0.033s (30.000 fps)
+\t\tSize: Discrete 1280x720
+\t\t\tInterval: Discrete 0.067s (15.000 fps)
+\t[1]: 'YUYV' (YUYV 4:2:2)
+\t\tSize: Discrete 640x480
+\t\t\tInterval: Discrete 0.033s (30.000 fps)
+"""
+
+
+def test_parse_v4l2_formats_groups_sizes_by_fourcc():
+    assert parse_v4l2_formats(V4L2_OUTPUT) == {
+        "MJPG": ["1920x1080", "1280x720"],
+        "YUYV": ["640x480"],
+    }
+
+
+def test_parse_v4l2_formats_ignores_unrelated_output():
+    assert parse_v4l2_formats("Failed to open /dev/video0: Permission denied") == {}
+
+
+@pytest.fixture
+def linux_devices(tmp_path, monkeypatch):
+    """/dev y sysfs falsos: video0 captura, video1 metadata, video2 captura."""
+    dev_dir = tmp_path / "dev"
+    sysfs_dir = tmp_path / "sys"
+    dev_dir.mkdir()
+    for index, node_index, name in ((0, "0", "HD Webcam"), (1, "1", "HD Webcam"), (2, "0", "DSLR")):
+        (dev_dir / f"video{index}").touch()
+        node_sysfs = sysfs_dir / f"video{index}"
+        node_sysfs.mkdir(parents=True)
+        (node_sysfs / "index").write_text(f"{node_index}\n")
+        (node_sysfs / "name").write_text(f"{name}\n")
+
+    monkeypatch.setattr(camera_registry, "DEV_DIR", dev_dir)
+    monkeypatch.setattr(camera_registry, "SYSFS_V4L_DIR", sysfs_dir)
+    monkeypatch.setattr(camera_registry.platform, "system", lambda: "Linux")
+    monkeypatch.setattr(camera_registry.shutil, "which", lambda _: None)
+    monkeypatch.setattr(FrameSources, "SPEC", "device")
+    monkeypatch.setattr(CameraRegistry, "_devices", None)
+    monkeypatch.setattr(CameraRegistry, "_dev_mtime", None)
+    monkeypatch.setattr(CameraRegistry, "_refreshes", 0)
+    monkeypatch.setattr(CameraRegistry, "TTL_S", 0)
+    return dev_dir
+
+
+def test_linux_enumeration_skips_metadata_nodes(linux_devices):
+    devices = CameraRegistry.devices()
+
+    assert [(device.index, device.name) for device in devices] == [(0, "HD Webcam"), (2, "DSLR")]
+    assert devices[0].path == str(linux_devices / "video0")
+
+
+def test_registry_answers_from_memory_until_dev_changes(linux_devices):
+    assert CameraRegistry.indices() == [0, 2]
+    assert CameraRegistry.indices() == [0, 2]
+    assert CameraRegistry.stats()["refreshes"] == 1
+
+    (linux_devices / "video2").unlink()
+    stat = linux_devices.stat()
+    os.utime(linux_devices, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert CameraRegistry.indices() == [0]
+    assert CameraRegistry.stats()["refreshes"] == 2
+
+
+def test_virtual_source_is_a_single_device(linux_devices, monkeypatch):
+    monkeypatch.setattr(FrameSources, "SPEC", "synthetic:64x48@30")
+
+    (device,) = CameraRegistry.devices(refresh=True)
+
+    assert (device.index, device.path, device.name) == (0, "synthetic:64x48@30", "Synthetic camera")
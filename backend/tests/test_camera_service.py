@@ -0,0 +1,202 @@
+import io
+import uuid
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.camera import router
+from app.api.settings import load_settings
+from app.config import RESOURCE_LIMITS
+from app.services import camera_service
+from app.services.camera_service import CameraService
+from app.services.frame_sources import FrameSources, SyntheticSource
+from app.services.photo_pipeline import PhotoPipeline
+from tests.conftest import make_jpeg
+
+
+@pytest.fixture
+def camera(monkeypatch, pipeline):
+    """Cámara sintética chica; settings fijos sin tocar settings.json."""
+    monkeypatch.setattr(FrameSources, "SPEC", "synthetic:64x48@120")
+    settings = load_settings().model_copy(update={"camera_width": 64, "camera_height": 48})
+    monkeypatch.setattr(camera_service, "load_settings", lambda: settings)
+
+    opens = []
+    original_open = FrameSources.open.__func__
+
+    def counting_open(cls, camera_id):
+        opens.append(camera_id)
+        return original_open(cls, camera_id)
+
+    monkeypatch.setattr(FrameSources, "open", classmethod(counting_open))
+    return opens
+
+
+def _session_id() -> str:
+    return f"cam-{uuid.uuid4().hex[:8]}"
+
+
+def test_burst_captures_all_shots_with_one_open(camera, session_store):
+    session_id = _session_id()
+
+    returned_session, paths = CameraService.capture_burst(0, session_id, count=3, warmup_frames=1)
+
+    assert returned_session == session_id
+    assert [path.name for path in paths] == ["shot-1.jpg", "shot-2.jpg", "shot-3.jpg"]
+    assert all(path.stat().st_size > 0 for path in paths)
+    assert camera == [0]
+    # Thumbnails y sesión los completa el pipeline en segundo plano
+    assert PhotoPipeline.flush(session_id, timeout=10.0)
+    photos = session_store.get_session(session_id).photos
+    assert [photo.filename for photo in photos] == ["shot-1.jpg", "shot-2.jpg", "shot-3.jpg"]
+
+
+def test_burst_rejects_empty_count(camera):
+    with pytest.raises(ValueError):
+        CameraService.capture_burst(0, _session_id(), count=0)
+
+
+def test_failed_burst_releases_reserved_indices(camera, monkeypatch, session_store):
+    session_id = _session_id()
+    reads = []
+    original_read = SyntheticSource.read
+
+    def failing_read(self):
+        reads.append(1)
+        if len(reads) > 2:
+            return False, None
+        return original_read(self)
+
+    monkeypatch.setattr(SyntheticSource, "read", failing_read)
+
+    with pytest.raises(RuntimeError):
+        CameraService.capture_burst(0, session_id, count=3, warmup_frames=0)
+
+    assert not PhotoPipeline._pending.get(session_id)
+
+
+def test_burst_endpoint_returns_photo_urls(camera, session_store):
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    session_id = _session_id()
+
+    response = client.post(
+        "/api/camera/burst",
+        json={"session_id": session_id, "count": 2, "warmup_frames": 0},
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["session_id"] == session_id
+    assert [url.rsplit("/", 1)[-1] for url in body["file_paths"]] == ["shot-1.jpg", "shot-2.jpg"]
+
+
+class _ChunkRecorder(io.BytesIO):
+    """Fuente de upload que registra el tamaño de cada lectura."""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+def test_upload_stream_copies_in_bounded_chunks(pipeline, monkeypatch, session_store):
+    monkeypatch.setitem(RESOURCE_LIMITS, "upload_chunk_bytes", 1024)
+    data = make_jpeg(640, 480)
+    source = _ChunkRecorder(data)
+
+    session_id, filepath = CameraService.save_uploaded_stream(source, session_id=_session_id())
+    PhotoPipeline.flush(session_id)
+
+    assert filepath.read_bytes() == data
+    assert source.reads and all(0 < size <= 1024 for size in source.reads)
+    assert [photo.filename for photo in session_store.get_session(session_id).photos] == ["shot-1.jpg"]
+
+
+@pytest.mark.parametrize("payload, limit_mb", [(b"no es una imagen", 10), (make_jpeg(), 0), (b"", 10)])
+def test_rejected_upload_leaves_no_file(pipeline, monkeypatch, photos_dir, payload, limit_mb):
+    monkeypatch.setitem(RESOURCE_LIMITS, "max_photo_size_mb", limit_mb)
+    session_id = _session_id()
+
+    with pytest.raises(RuntimeError):
+        CameraService.save_uploaded_stream(io.BytesIO(payload), session_id=session_id)
+
+    assert not list((photos_dir / session_id).iterdir())
+    assert not PhotoPipeline._pending.get(session_id)
+
+
+def test_upload_endpoint_streams_multipart_file(pipeline, session_store):
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    session_id = _session_id()
+
+    response = client.post(
+        "/api/camera/upload",
+        files={"file": ("shot.jpg", make_jpeg(), "image/jpeg")},
+        data={"session_id": session_id},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["file_path"].endswith(f"/{session_id}/shot-1.jpg")
+
+
+@pytest.fixture
+def mjpeg_camera(camera, monkeypatch):
+    settings = camera_service.load_settings().model_copy(update={"camera_capture_mode": "mjpeg"})
+    monkeypatch.setattr(camera_service, "load_settings", lambda: settings)
+    return camera
+
+
+def _jpeg_frame(width=64, height=48):
+    return np.frombuffer(make_jpeg(width, height), np.uint8).reshape(1, -1)
+
+
+def test_is_jpeg_buffer_tells_raw_jpeg_from_bgr_frames():
+    assert CameraService.is_jpeg_buffer(_jpeg_frame())
+    assert CameraService.is_jpeg_buffer(_jpeg_frame().reshape(-1))
+    assert not CameraService.is_jpeg_buffer(np.zeros((48, 64, 3), np.uint8))
+    assert not CameraService.is_jpeg_buffer(np.array([[0xFF]], np.uint8))
+    assert not CameraService.is_jpeg_buffer(None)
+
+
+def test_decode_frame_decodes_jpeg_and_passes_bgr_through():
+    bgr = np.zeros((48, 64, 3), np.uint8)
+
+    assert CameraService.decode_frame(bgr) is bgr
+    assert CameraService.decode_frame(_jpeg_frame(640, 480)).shape == (480, 640, 3)
+    # DCT reducido: 1/4 todavía cubre 150 px de ancho, 1/8 no
+    assert CameraService.decode_frame(_jpeg_frame(640, 480), min_width=150).shape == (120, 160, 3)
+
+
+def test_decode_frame_rejects_corrupt_jpeg():
+    corrupt = np.frombuffer(b"\xff\xd8" + b"\x00" * 64, np.uint8).reshape(1, -1)
+
+    with pytest.raises(RuntimeError):
+        CameraService.decode_frame(corrupt)
+
+
+def test_mjpeg_capture_writes_camera_jpeg_unchanged(mjpeg_camera, session_store):
+    session_id, filepath = CameraService.capture_photo(0, _session_id())
+    PhotoPipeline.flush(session_id)
+
+    patterns = SyntheticSource._patterns[(64, 48, True)]
+    assert filepath.read_bytes() in {frame.tobytes() for frame in patterns}
+    (photo,) = session_store.get_session(session_id).photos
+    assert photo.thumbnail_url
+
+
+def test_decoded_capture_reencodes_frames(camera, session_store):
+    session_id, filepath = CameraService.capture_photo(0, _session_id())
+
+    decoded = cv2.imread(str(filepath))
+    assert decoded.shape == (48, 64, 3)
+    patterns = SyntheticSource._patterns.get((64, 48, True), [])
+    assert filepath.read_bytes() not in {frame.tobytes() for frame in patterns}
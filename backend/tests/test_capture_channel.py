@@ -0,0 +1,98 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.camera import router
+from app.services import capture_channel
+from app.services.capture_channel import HEADER_PREFIX, CaptureChannel, build_frame, parse_frame
+from tests.conftest import make_jpeg
+
+
+@pytest.fixture
+def client(pipeline):
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_frame_roundtrip():
+    payload = make_jpeg()
+    header, body = parse_frame(build_frame(payload, session_id="s1", shot_index=2))
+
+    assert header == {"session_id": "s1", "shot_index": 2}
+    assert body == payload
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        b"\x00\x00",
+        HEADER_PREFIX.pack(100) + b"{}",
+        HEADER_PREFIX.pack(5000) + b"x" * 5000,
+        HEADER_PREFIX.pack(2) + b"[]",
+    ],
+)
+def test_parse_frame_rejects_malformed(message):
+    with pytest.raises(ValueError):
+        parse_frame(message)
+
+
+def test_pipelined_shots_acked_in_order(client, photos_dir):
+    session_id = f"ws-{uuid.uuid4().hex[:8]}"
+    with client.websocket_connect("/api/camera/ws") as ws:
+        # Los tres shots salen antes de leer ningún ack
+        for shot_index in (1, 2, 3):
+            ws.send_bytes(build_frame(make_jpeg(color=(shot_index * 60, 0, 0)), session_id, shot_index))
+        acks = [ws.receive_json() for _ in range(3)]
+
+    assert [ack["type"] for ack in acks] == ["ack", "ack", "ack"]
+    assert [ack["shot_index"] for ack in acks] == [1, 2, 3]
+    assert [ack["file_path"].rsplit("/", 1)[-1] for ack in acks] == ["shot-1.jpg", "shot-2.jpg", "shot-3.jpg"]
+    assert {ack["session_id"] for ack in acks} == {session_id}
+
+
+def test_shot_index_names_file_and_never_overwrites(client, pipeline, session_store, photos_dir):
+    session_id = f"ws-{uuid.uuid4().hex[:8]}"
+    first = make_jpeg(color=(255, 0, 0))
+    with client.websocket_connect("/api/camera/ws") as ws:
+        ws.send_bytes(build_frame(make_jpeg(), session_id, 2))
+        ws.send_bytes(build_frame(first, session_id, 1))
+        ws.send_bytes(build_frame(make_jpeg(color=(0, 255, 0)), session_id, 1))
+        ws.send_bytes(b"\x00")
+        replies = [ws.receive_json() for _ in range(4)]
+
+    assert [reply["type"] for reply in replies] == ["ack", "ack", "error", "error"]
+    assert replies[0]["file_path"].endswith("/shot-2.jpg")
+    assert (photos_dir / session_id / "shot-1.jpg").read_bytes() == first
+    assert pipeline.flush(session_id, timeout=5.0)
+    assert [photo.filename for photo in session_store.get_session(session_id).photos] == ["shot-1.jpg", "shot-2.jpg"]
+
+
+def test_session_follows_connection_without_session_id(client):
+    with client.websocket_connect("/api/camera/ws") as ws:
+        ws.send_bytes(build_frame(make_jpeg(), None, 1))
+        ws.send_bytes(build_frame(make_jpeg(), None, 2))
+        first, second = ws.receive_json(), ws.receive_json()
+
+    assert first["session_id"] == second["session_id"]
+    assert second["file_path"].endswith("/shot-2.jpg")
+
+
+def test_dead_writer_closes_socket(client, monkeypatch):
+    monkeypatch.setattr(CaptureChannel, "MAX_IN_FLIGHT", 1)
+
+    def broken_url(path):
+        raise RuntimeError("url rota")
+
+    monkeypatch.setattr(capture_channel, "get_photo_url", broken_url)
+    session_id = f"ws-{uuid.uuid4().hex[:8]}"
+    with client.websocket_connect("/api/camera/ws") as ws:
+        for shot_index in (1, 2, 3):
+            ws.send_bytes(build_frame(make_jpeg(), session_id, shot_index))
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+
+    assert closed.value.code == 1011
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from app.services.capture_daemon import CaptureDaemon
+from app.services.frame_sources import FrameSources
+
+
+@pytest.fixture
+def daemon(monkeypatch):
+    monkeypatch.setattr(FrameSources, "SPEC", "synthetic:64x48@60")
+    yield CaptureDaemon
+    CaptureDaemon.stop()
+
+
+def _daemon_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("capture-daemon-")]
+
+
+def test_concurrent_starts_spawn_one_reader(daemon):
+    barrier = threading.Barrier(8)
+
+    def start(camera_id):
+        barrier.wait()
+        daemon.start(camera_id)
+
+    callers = [threading.Thread(target=start, args=(index % 2,)) for index in range(8)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join(timeout=10.0)
+
+    assert len(_daemon_threads()) == 1
+    assert daemon.is_running()
+    assert daemon.wait_next_frame(0.0, timeout=5.0) is not None
+
+
+def test_frame_at_returns_recent_frame(daemon):
+    assert daemon.start(0) is True
+    assert daemon.start(0) is False
+    assert daemon.wait_next_frame(0.0, timeout=5.0) is not None
+
+    frame = daemon.frame_at(time.time(), timeout=1.0)
+
+    assert frame is not None and frame.ndim == 3
+    assert daemon.stop() is True
+    assert not daemon.is_running()
+    assert daemon.frame_at(timeout=0.1) is None
+
+
+def test_start_endpoint_runs_off_the_event_loop(daemon, monkeypatch):
+    import asyncio
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api.camera import router
+
+    calls = []
+    original_start = CaptureDaemon.start.__func__
+
+    def recording_start(cls, camera_id=0, idle_timeout_s=None):
+        try:
+            asyncio.get_running_loop()
+            calls.append("event-loop")
+        except RuntimeError:
+            calls.append("worker-thread")
+        return original_start(cls, camera_id, idle_timeout_s=idle_timeout_s)
+
+    monkeypatch.setattr(CaptureDaemon, "start", classmethod(recording_start))
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    response = client.post("/api/camera/daemon/start", json={"camera_id": 0})
+
+    assert response.status_code == 200, response.text
+    assert calls == ["worker-thread"]
+    assert response.json()["running"] is True
@@ -0,0 +1,88 @@
+import os
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image, ImageChops
+
+from app.services import color_management
+from app.services.color_management import RENDERING_INTENTS, ColorManagement
+
+ImageCms = pytest.importorskip("PIL.ImageCms")
+
+
+@pytest.fixture
+def color(monkeypatch):
+    monkeypatch.setattr(ColorManagement, "ENABLED", True)
+    monkeypatch.setattr(ColorManagement, "_transforms", OrderedDict())
+    monkeypatch.setattr(ColorManagement, "_builds", 0)
+    monkeypatch.setattr(ColorManagement, "_hits", 0)
+    return ColorManagement
+
+
+def _profile(path, color_space="sRGB"):
+    path.write_bytes(ImageCms.ImageCmsProfile(ImageCms.createProfile(color_space)).tobytes())
+    return path
+
+
+def _settings(profiles, printer=None, intent="perceptual"):
+    return SimpleNamespace(printer_icc_profiles=profiles, default_printer=printer, icc_rendering_intent=intent)
+
+
+def test_resolve_prefers_printer_profile_over_wildcard(color, tmp_path):
+    dnp = _profile(tmp_path / "dnp.icc")
+    generic = _profile(tmp_path / "generic.icc")
+    settings = _settings({"DNP": str(dnp), "*": str(generic)}, printer="DNP", intent="saturation")
+
+    assert color.resolve(settings) == {"output_profile": str(dnp), "intent": RENDERING_INTENTS["saturation"]}
+    assert color.resolve(settings, "Otra")["output_profile"] == str(generic)
+
+
+def test_resolve_relative_profile_inside_data_dir(color, monkeypatch, tmp_path):
+    monkeypatch.setattr(color_management, "DATA_DIR", tmp_path)
+    _profile(tmp_path / "printer.icc")
+
+    resolved = color.resolve(_settings({"*": "printer.icc"}))
+
+    assert resolved["output_profile"] == str(tmp_path / "printer.icc")
+
+
+@pytest.mark.parametrize("profiles", [{}, {"Otra": "x.icc"}, {"*": "/no/existe.icc"}])
+def test_resolve_returns_none_without_usable_profile(color, profiles):
+    assert color.resolve(_settings(profiles, printer="DNP")) is None
+
+
+def test_resolve_disabled(color, monkeypatch, tmp_path):
+    monkeypatch.setattr(ColorManagement, "ENABLED", False)
+
+    assert color.resolve(_settings({"*": str(_profile(tmp_path / "p.icc"))})) is None
+
+
+def test_transform_is_compiled_once_and_rebuilt_on_edit(color, tmp_path):
+    profile = _profile(tmp_path / "srgb.icc")
+    resolved = {"output_profile": str(profile), "intent": 0}
+    image = Image.new("RGB", (32, 32), (180, 90, 40))
+
+    color.apply(image.copy(), resolved)
+    converted = color.apply(image.copy(), resolved)
+
+    assert color.stats()["builds"] == 1 and color.stats()["hits"] == 1
+    # sRGB -> sRGB: la conversión no cambia el color
+    diff = ImageChops.difference(converted, image)
+    assert max(high for _, high in diff.getextrema()) <= 1
+
+    stat = profile.stat()
+    os.utime(profile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    color.apply(image.copy(), resolved)
+    assert color.stats()["builds"] == 2
+
+
+def test_broken_profile_leaves_image_in_srgb(color, tmp_path):
+    lab = _profile(tmp_path / "lab.icc", "LAB")
+    image = Image.new("RGB", (8, 8), (10, 20, 30))
+
+    result = color.apply(image, {"output_profile": str(lab), "intent": 0})
+
+    assert result is image
+    assert image.getpixel((0, 0)) == (10, 20, 30)
+    assert color.stats()["transforms"] == 0
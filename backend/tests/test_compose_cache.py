@@ -0,0 +1,148 @@
+import json
+import os
+from collections import OrderedDict
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.image import router
+from app.services.compose_cache import ComposeResultCache
+from tests.conftest import make_jpeg
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(ComposeResultCache, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(ComposeResultCache, "ENABLED", True)
+    monkeypatch.setattr(ComposeResultCache, "_index", None)
+    monkeypatch.setattr(ComposeResultCache, "_total_bytes", 0)
+    monkeypatch.setattr(ComposeResultCache, "_previews", OrderedDict())
+    for counter in ("_preview_bytes", "_preview_hits", "_preview_misses", "_hits", "_misses", "_evictions"):
+        monkeypatch.setattr(ComposeResultCache, counter, 0)
+    return ComposeResultCache
+
+
+@pytest.fixture
+def photos(tmp_path):
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"shot-{index + 1}.jpg"
+        path.write_bytes(make_jpeg(320, 240, color=(index * 80, 100, 150)))
+        paths.append(path)
+    return paths
+
+
+def test_key_depends_on_params_inputs_and_order(cache, photos):
+    params = {"layout": "3x1-vertical", "photo_filter": None}
+    key = cache.make_key(params, photos)
+
+    assert key == cache.make_key({"layout": "3x1-vertical"}, photos)
+    assert key != cache.make_key({"layout": "4x1-vertical"}, photos)
+    assert key != cache.make_key(params, list(reversed(photos)))
+    assert cache.make_key(params, [*photos, photos[0].with_name("missing.jpg")]) is None
+
+    stat = photos[0].stat()
+    os.utime(photos[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert key != cache.make_key(params, photos)
+
+
+def test_disk_lru_evicts_least_recently_used(cache, monkeypatch):
+    monkeypatch.setattr(cache, "MAX_BYTES", 250)
+    for name in ("a", "b", "c"):
+        cache.store(name, "strip.jpg", b"x" * 100)
+    # "a" ya fue desalojada; "b" pasa a ser la más reciente
+    assert cache.lookup("a", "strip.jpg") is None
+    assert cache.lookup("b", "strip.jpg") is not None
+    cache.store("d", "strip.jpg", b"x" * 100)
+
+    assert cache.lookup("c", "strip.jpg") is None
+    assert cache.lookup("b", "strip.jpg").read_bytes() == b"x" * 100
+    assert cache.stats()["evictions"] == 2
+
+
+def test_previews_stay_in_memory(cache, monkeypatch):
+    monkeypatch.setattr(cache, "PREVIEW_MAX_BYTES", 250)
+    for name in ("a", "b", "c"):
+        cache.store_preview(name, "preview_0.5.jpeg", b"p" * 100)
+
+    assert cache.lookup_preview("a", "preview_0.5.jpeg") is None
+    assert cache.lookup_preview("c", "preview_0.5.jpeg") == b"p" * 100
+    assert cache.stats()["preview_bytes"] == 200
+    assert not cache.CACHE_DIR.exists() or not any(cache.CACHE_DIR.iterdir())
+
+
+def test_inline_draft_preview_is_cached_without_disk(cache, photos):
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    form = {
+        "photo_paths_json": json.dumps([str(path) for path in photos]),
+        "layout": "3x1-vertical",
+        "quality": "draft",
+        "inline": "true",
+    }
+
+    first = client.post("/api/image/preview-strip", data=form)
+    second = client.post("/api/image/preview-strip", data=form)
+
+    assert first.status_code == 200, first.text
+    assert first.headers["content-type"] == "image/jpeg"
+    assert second.content == first.content
+    stats = cache.stats()
+    assert stats["preview_hits"] >= 1 and stats["preview_entries"] == 1
+    assert stats["entries"] == 0
+
+
+def test_file_preview_served_from_memory_cache(cache, photos):
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    form = {"photo_paths_json": json.dumps([str(path) for path in photos]), "quality": "draft"}
+
+    first = client.post("/api/image/preview-strip", data=form).json()["preview_path"]
+    second = client.post("/api/image/preview-strip", data=form).json()["preview_path"]
+
+    assert first != second
+    assert cache.stats()["preview_hits"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_concurrent_file_previews_do_not_share_output(cache, photos, photos_dir):
+    import asyncio
+
+    import httpx
+    from PIL import Image
+
+    from app.config import DATA_DIR
+
+    app = FastAPI()
+    app.include_router(router)
+    colors = ["#ff0000", "#0000ff", "#00ff00", "#ffff00"]
+
+    async def post_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.post(
+                    "/api/image/preview-strip",
+                    data={
+                        "photo_paths_json": json.dumps([str(path) for path in photos]),
+                        "layout": "3x1-vertical",
+                        "background_color": color,
+                        "photo_spacing": "40",
+                        "quality": "draft",
+                    },
+                )
+                for color in colors
+            ])
+
+    responses = asyncio.run(post_all())
+
+    for color, response in zip(colors, responses):
+        assert response.status_code == 200, response.text
+        preview = DATA_DIR.parent / response.json()["preview_path"].lstrip("/")
+        with Image.open(preview) as image:
+            expected = tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+            assert image.convert("RGB").getpixel((2, 2)) == pytest.approx(expected, abs=32)
+    assert not (photos_dir / "preview").exists()
@@ -0,0 +1,53 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from app.services.compose_executor import ComposeExecutor, ComposeWorkerCrashed
+
+
+def _crash_once(marker: str) -> str:
+    path = Path(marker)
+    if not path.exists():
+        path.write_text("crashed")
+        os._exit(1)
+    return "ok"
+
+
+def _always_crash() -> None:
+    os._exit(1)
+
+
+def _square(value: int) -> int:
+    return value * value
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    ComposeExecutor.shutdown()
+    monkeypatch.setattr(ComposeExecutor, "WORKERS", 1)
+    yield ComposeExecutor
+    ComposeExecutor.shutdown()
+
+
+def test_run_surfaces_worker_crash_and_recovers(executor):
+    with pytest.raises(ComposeWorkerCrashed):
+        executor.run(_always_crash)
+
+    # El pool se recreó: la siguiente tarea corre normalmente
+    assert executor.run(_square, 7) == 49
+
+
+def test_run_idempotent_retries_once(executor, tmp_path):
+    assert executor.run_idempotent(_crash_once, str(tmp_path / "marker")) == "ok"
+
+    with pytest.raises(ComposeWorkerCrashed):
+        executor.run_idempotent(_always_crash)
+
+
+def test_inline_mode_without_workers(monkeypatch):
+    monkeypatch.setattr(ComposeExecutor, "WORKERS", 0)
+
+    assert ComposeExecutor.run(_square, 3) == 9
+    with pytest.raises(ZeroDivisionError):
+        ComposeExecutor.run(divmod, 1, 0)
@@ -0,0 +1,120 @@
+import os
+from collections import OrderedDict
+
+import pytest
+from PIL import Image
+
+from app.services.design_cache import DesignOverlayCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(DesignOverlayCache, "_entries", OrderedDict())
+    monkeypatch.setattr(DesignOverlayCache, "_source_sizes", OrderedDict())
+    monkeypatch.setattr(DesignOverlayCache, "_total_pixels", 0)
+    monkeypatch.setattr(DesignOverlayCache, "_hits", 0)
+    monkeypatch.setattr(DesignOverlayCache, "_misses", 0)
+    monkeypatch.setattr(DesignOverlayCache, "MAX_ENTRIES", 3)
+    return DesignOverlayCache
+
+
+def _design(path, size=(300, 200), mode="RGB", color=(200, 30, 30)):
+    Image.new(mode, size, color).save(path)
+    return path
+
+
+def test_overlay_is_cached_per_target_and_fit(cache, tmp_path):
+    design = _design(tmp_path / "design.png")
+
+    first = cache.get_overlay(design, (150, 100))
+    assert cache.get_overlay(design, (150, 100)) is first
+    assert cache.get_overlay(design, (150, 100), fit_mode="stretch") is not first
+    assert cache.stats()["hits"] == 1
+    assert first[0].size == (150, 100) and first[1] is None
+
+
+def test_transparent_design_gets_mask(cache, tmp_path):
+    design = tmp_path / "frame.png"
+    frame = Image.new("RGBA", (100, 100), (255, 255, 255, 0))
+    frame.paste((0, 0, 0, 255), (0, 0, 100, 10))
+    frame.save(design)
+
+    layer, mask = cache.get_overlay(design, (50, 50))
+
+    assert layer.mode == "RGB"
+    assert mask is not None and mask.getextrema() == (0, 255)
+
+
+def test_edited_design_invalidates_entries(cache, tmp_path):
+    design = _design(tmp_path / "design.png")
+    assert cache.get_source_size(design) == (300, 200)
+    before = cache.get_overlay(design, (150, 100))
+
+    _design(design, size=(400, 100))
+    stat = design.stat()
+    os.utime(design, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert cache.get_source_size(design) == (400, 100)
+    assert cache.get_overlay(design, (150, 100)) is not before
+    assert cache.stats()["source_sizes"] == 1
+
+
+def test_source_sizes_are_bounded(cache, tmp_path):
+    designs = [_design(tmp_path / f"design-{index}.png") for index in range(10)]
+    for design in designs:
+        cache.get_source_size(design)
+
+    assert cache.stats()["source_sizes"] == 3
+    assert list(cache._source_sizes) == [str(design) for design in designs[-3:]]
+
+
+def test_overlays_bounded_by_entries_and_pixels(cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "MAX_PIXELS", 30_000)
+    design = _design(tmp_path / "design.png")
+    for width in (100, 110, 120, 130):
+        cache.get_overlay(design, (width, 100))
+
+    stats = cache.stats()
+    assert stats["entries"] <= 3
+    assert stats["pixels"] <= 30_000
+
+
+def _half_transparent_frame(path):
+    """Mitad izquierda roja opaca; mitad derecha negra totalmente transparente."""
+    frame = Image.new("RGBA", (100, 100), (0, 0, 0, 0))
+    frame.paste((255, 0, 0, 255), (0, 0, 50, 100))
+    frame.save(path)
+    return path
+
+
+def test_resized_edges_keep_design_colour(cache, tmp_path):
+    design = _half_transparent_frame(tmp_path / "frame.png")
+
+    layer, mask = cache.get_overlay(design, (33, 33))
+
+    edge = [x for x in range(33) if 0 < mask.getpixel((x, 16)) < 255]
+    assert edge
+    for x in edge:
+        # Sin halo: el negro transparente no oscurece el borde
+        red, green, blue = layer.getpixel((x, 16))
+        assert red >= 240 and green <= 10 and blue <= 10
+
+
+def test_photos_show_through_transparent_areas(cache, tmp_path):
+    design = _half_transparent_frame(tmp_path / "frame.png")
+    canvas = Image.new("RGB", (100, 100), (0, 200, 0))
+
+    layer, mask = cache.get_overlay(design, (100, 100))
+    canvas.paste(layer, (0, 0), mask)
+
+    assert canvas.getpixel((10, 50)) == (255, 0, 0)
+    assert canvas.getpixel((90, 50)) == (0, 200, 0)
+
+
+def test_opaque_rgba_design_has_no_mask(cache, tmp_path):
+    design = _design(tmp_path / "opaque.png", mode="RGBA", color=(10, 20, 30, 255))
+
+    layer, mask = cache.get_overlay(design, (150, 100))
+
+    assert mask is None
+    assert layer.mode == "RGB" and layer.getpixel((0, 0)) == (10, 20, 30)
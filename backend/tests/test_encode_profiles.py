@@ -0,0 +1,60 @@
+import uuid
+from types import SimpleNamespace
+
+from PIL import Image
+
+import app.api.presets as presets_api
+from app.config import ENCODE_PROFILES
+from app.services.compose_executor import ComposeExecutor
+from app.services.encode_profiles import EncodeProfiles
+from app.services.image_service import ImageService
+
+
+def _count_preset_reads(monkeypatch, encode_profiles=None):
+    calls = []
+
+    def fake_active_preset():
+        calls.append(1)
+        return SimpleNamespace(encode_profiles=encode_profiles)
+
+    monkeypatch.setattr(presets_api, "get_active_preset", fake_active_preset)
+    return calls
+
+
+def test_preset_overrides_artifact_profile(monkeypatch):
+    _count_preset_reads(monkeypatch, {"strip": "archive"})
+
+    assert EncodeProfiles.profile_name("strip") == "archive"
+    assert EncodeProfiles.for_artifact("strip")["quality"] == ENCODE_PROFILES["archive"]["quality"]
+
+
+def test_unknown_profile_falls_back_to_print(monkeypatch):
+    _count_preset_reads(monkeypatch, {"strip": "no-existe"})
+
+    assert EncodeProfiles.profile_name("strip") == "print"
+    assert EncodeProfiles.get("no-existe") == ENCODE_PROFILES["print"]
+
+
+def test_for_artifact_uses_resolved_profiles_without_reading_preset(monkeypatch):
+    calls = _count_preset_reads(monkeypatch, {"full_strip": "screen"})
+
+    profiles = EncodeProfiles.resolved()
+    strip = EncodeProfiles.for_artifact("strip", profiles)
+    full_strip = EncodeProfiles.for_artifact("full_strip", profiles)
+
+    assert len(calls) == 1
+    assert strip == ENCODE_PROFILES["print"]
+    assert full_strip == ENCODE_PROFILES["screen"]
+
+
+def test_compose_strip_reads_active_preset_once(monkeypatch, session_store, tmp_path):
+    monkeypatch.setattr(ComposeExecutor, "WORKERS", 0)
+    calls = _count_preset_reads(monkeypatch)
+    photo = tmp_path / "shot-1.jpg"
+    Image.new("RGB", (320, 240), (90, 120, 200)).save(photo)
+
+    ImageService.compose_strip(
+        [photo] * 3, session_id=f"enc-{uuid.uuid4().hex[:8]}", layout="3x1-vertical", dual_strip=True
+    )
+
+    assert len(calls) == 1
@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.services.frame_sources import MJPG_FOURCC, FrameSources, SyntheticSource
+
+
+def test_open_parses_synthetic_spec(monkeypatch):
+    monkeypatch.setattr(FrameSources, "SPEC", "synthetic:160x120@15")
+
+    source = FrameSources.open(0)
+
+    assert isinstance(source, SyntheticSource)
+    assert (source.width, source.height, source.fps) == (160, 120, 15.0)
+    assert FrameSources.is_virtual()
+    assert FrameSources.describe() == ("synthetic:160x120@15", "Synthetic camera")
+
+
+def test_open_rejects_invalid_spec(monkeypatch):
+    monkeypatch.setattr(FrameSources, "SPEC", "synthetic:abc")
+
+    with pytest.raises(ValueError):
+        FrameSources.open(0)
+
+
+def test_synthetic_read_follows_negotiated_resolution():
+    source = SyntheticSource(width=1280, height=720, fps=0)
+    assert source.set(cv2.CAP_PROP_FRAME_WIDTH, 96)
+    assert source.set(cv2.CAP_PROP_FRAME_HEIGHT, 64)
+    assert not source.set(cv2.CAP_PROP_EXPOSURE, 1)
+
+    ok, first = source.read()
+    ok2, second = source.read()
+
+    assert ok and ok2
+    assert first.shape == (64, 96, 3) and first.dtype == np.uint8
+    assert source.get(cv2.CAP_PROP_FRAME_WIDTH) == 96
+    # Cada read entrega un buffer propio y el patrón cambia entre frames
+    assert not np.shares_memory(first, second)
+    assert not np.array_equal(first, second)
+
+
+def test_synthetic_mjpeg_mode_returns_jpeg_buffer():
+    source = SyntheticSource(width=96, height=64, fps=0)
+    source.set(cv2.CAP_PROP_FOURCC, MJPG_FOURCC)
+    source.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+
+    ok, frame = source.read()
+
+    assert ok
+    assert frame.ndim == 2 and frame.shape[0] == 1
+    assert frame.tobytes()[:2] == b"\xff\xd8"
+    assert cv2.imdecode(frame, cv2.IMREAD_COLOR).shape == (64, 96, 3)
+
+
+def test_released_source_stops_delivering_frames():
+    source = SyntheticSource(width=32, height=24, fps=0)
+    source.release()
+
+    assert not source.isOpened()
+    assert source.read() == (False, None)
@@ -0,0 +1,172 @@
+import io
+import uuid
+
+import pytest
+from PIL import Image, ImageChops, ImageDraw, ImageStat, UnidentifiedImageError
+
+from app.services.compose_executor import ComposeExecutor
+from app.services.image_service import (
+    CUT_LINE_COLOR,
+    CUT_LINE_DASH_LENGTH,
+    CUT_LINE_GAP,
+    ImageService,
+)
+
+
+@pytest.fixture
+def inline_executor(monkeypatch):
+    """Composición en el mismo proceso (sin pool)."""
+    monkeypatch.setattr(ComposeExecutor, "WORKERS", 0)
+    return ComposeExecutor
+
+
+@pytest.fixture
+def photos(tmp_path):
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"shot-{index + 1}.jpg"
+        Image.new("RGB", (640, 480), (40 + index * 70, 120, 200 - index * 50)).save(path, quality=95)
+        paths.append(path)
+    return paths
+
+
+def _legacy_dual_page(strip: Image.Image) -> Image.Image:
+    """Página dual como se armaba antes: dos copias + guiones con ImageDraw."""
+    page = Image.new("RGB", (strip.width * 2, strip.height), "white")
+    page.paste(strip, (0, 0))
+    page.paste(strip, (strip.width, 0))
+    draw = ImageDraw.Draw(page)
+    center_x = strip.width - 2
+    for y in range(0, strip.height, CUT_LINE_GAP):
+        draw.line([(center_x, y), (center_x, y + CUT_LINE_DASH_LENGTH)], fill=CUT_LINE_COLOR, width=1)
+    return page
+
+
+def test_impose_dual_strip_matches_legacy_drawing():
+    strip = Image.new("RGB", (120, 333), (10, 80, 160))
+
+    page = ImageService._impose_dual_strip(strip)
+
+    assert page.size == (240, 333)
+    assert ImageChops.difference(page, _legacy_dual_page(strip)).getbbox() is None
+
+
+def test_compose_strip_writes_dual_page_in_same_pass(inline_executor, session_store, photos):
+    session_id = f"dual-{uuid.uuid4().hex[:8]}"
+
+    strip_path = ImageService.compose_strip(photos, session_id=session_id, layout="3x1-vertical", dual_strip=True)
+    full_page_path = ImageService.full_page_output_path(strip_path)
+
+    with Image.open(strip_path) as strip, Image.open(full_page_path) as page:
+        assert page.size == (strip.width * 2, strip.height)
+    assert session_store.get_session(session_id).strip_path.endswith("/strip.jpg")
+    assert not list(strip_path.parent.glob(".*.tmp"))
+
+
+@pytest.fixture
+def large_jpeg(tmp_path):
+    path = tmp_path / "camera.jpg"
+    Image.new("RGB", (2048, 1536), (120, 80, 40)).save(path, quality=90)
+    return path
+
+
+def test_open_photo_decodes_jpeg_at_reduced_scale(large_jpeg):
+    photo = ImageService._open_photo(large_jpeg, 400, 300)
+    try:
+        # DCT 1/4: lo más chico que todavía cubre la caja destino
+        assert photo.size == (512, 384)
+    finally:
+        photo.close()
+
+
+def test_open_photo_never_decodes_below_target_box(large_jpeg):
+    photo = ImageService._open_photo(large_jpeg, 1500, 200)
+    try:
+        assert photo.width >= 1500 and photo.height >= 200
+    finally:
+        photo.close()
+
+
+def test_open_photo_leaves_non_jpeg_untouched(tmp_path):
+    path = tmp_path / "design.png"
+    Image.new("RGB", (800, 600), "white").save(path)
+
+    photo = ImageService._open_photo(path, 100, 75)
+    try:
+        assert photo.size == (800, 600)
+    finally:
+        photo.close()
+
+
+def test_load_photo_from_draft_fills_exact_crop(large_jpeg):
+    photo = ImageService._load_photo(large_jpeg, 400, 260, "none")
+    try:
+        assert photo.size == (400, 260)
+        assert photo.getpixel((200, 130)) == pytest.approx((120, 80, 40), abs=3)
+    finally:
+        photo.close()
+
+
+@pytest.fixture
+def decode_threads(monkeypatch):
+    """Fija DECODE_THREADS con un pool propio para el test."""
+    monkeypatch.setattr(ImageService, "_decode_pool", None)
+
+    def set_threads(count: int) -> None:
+        if ImageService._decode_pool is not None:
+            ImageService._decode_pool.shutdown(wait=True)
+            ImageService._decode_pool = None
+        monkeypatch.setattr(ImageService, "DECODE_THREADS", count)
+
+    yield set_threads
+    if ImageService._decode_pool is not None:
+        ImageService._decode_pool.shutdown(wait=True)
+
+
+def test_parallel_decode_matches_sequential(inline_executor, decode_threads, photos):
+    rendered = []
+    for threads in (1, 3):
+        decode_threads(threads)
+        strip = ImageService._build_strip(photos, None, "sepia", None, layout="3x1-vertical")
+        rendered.append(strip.convert("RGB"))
+        strip.close()
+
+    assert ImageService._decode_pool is not None
+    assert ImageChops.difference(*rendered).getbbox() is None
+
+
+def test_parallel_decode_surfaces_photo_errors(inline_executor, decode_threads, photos, tmp_path):
+    decode_threads(3)
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"no es un jpeg")
+
+    with pytest.raises(UnidentifiedImageError):
+        ImageService._build_strip([photos[0], broken, photos[2]], None, None, None, layout="3x1-vertical")
+
+
+def test_draft_preview_keeps_geometry_at_lower_resolution(inline_executor, photos):
+    full = ImageService.render_preview_bytes(photos, layout="3x1-vertical", design_position="bottom")
+    draft = ImageService.render_preview_bytes(
+        photos, layout="3x1-vertical", design_position="bottom", preview_scale=0.5
+    )
+
+    with Image.open(io.BytesIO(full)) as full_image, Image.open(io.BytesIO(draft)) as draft_image:
+        assert draft_image.width == pytest.approx(full_image.width / 2, abs=2)
+        assert draft_image.height == pytest.approx(full_image.height / 2, abs=2)
+        # Misma composición: el full reducido se parece al borrador
+        reduced = full_image.convert("RGB").resize(draft_image.size, Image.Resampling.BILINEAR)
+        diff = ImageChops.difference(reduced, draft_image.convert("RGB"))
+        assert max(ImageStat.Stat(diff).mean) < 4
+
+
+def test_draft_quality_resolves_default_preview_scale():
+    from app.api.image import _resolve_preview_scale
+    from app.config import IMAGE_CONFIG
+    from app.schemas.image import ComposeStripRequest
+
+    draft = ComposeStripRequest(photo_paths=["a.jpg"], quality="draft")
+    explicit = ComposeStripRequest(photo_paths=["a.jpg"], quality="draft", preview_scale=0.25)
+
+    assert _resolve_preview_scale(draft) == IMAGE_CONFIG["preview_draft_scale"]
+    assert _resolve_preview_scale(explicit) == 0.25
+    assert _resolve_preview_scale(ComposeStripRequest(photo_paths=["a.jpg"])) is None
@@ -0,0 +1,176 @@
+"""
+Paridad de LayoutPlan con la geometría que compose_strip calculaba en línea
+
+``_legacy_geometry`` es una copia congelada del cálculo anterior a
+``compile_layout_plan`` (tamaño del canvas, recorte, posiciones y banda de
+diseño), basada en ``get_layout_dimensions``.
+"""
+import itertools
+
+import pytest
+
+from app.config import IMAGE_CONFIG
+from app.models.template import (
+    LAYOUT_GRID_2X2,
+    LAYOUT_VERTICAL_3,
+    LAYOUT_VERTICAL_4,
+    LAYOUT_VERTICAL_6,
+    get_layout_dimensions,
+    get_layout_photo_count,
+)
+from app.services.layout_plan import compile_layout_plan, print_target_size
+
+DESIGN_SIZE = (1200, 900)
+
+
+def _legacy_geometry(num_photos, layout, design_mode, design_position, photo_spacing, aspect):
+    strip_width = IMAGE_CONFIG["strip_width"]
+    base_photo_height = IMAGE_CONFIG["photo_height"]
+    design_height = IMAGE_CONFIG["design_height"]
+    top, bottom = 30, 30
+    spacing = photo_spacing if photo_spacing is not None else 20
+    aspect_value = {"1:1": 1.0, "3:4": 3.0 / 4.0}.get(aspect)
+
+    target_strip_height = None
+    if layout in (LAYOUT_VERTICAL_3, LAYOUT_VERTICAL_4, LAYOUT_VERTICAL_6):
+        strip_width, target_strip_height = get_layout_dimensions(layout)
+
+    footer_height = 0
+    if design_mode == "footer":
+        footer_height = int(target_strip_height * 0.18) if target_strip_height else design_height
+        section = footer_height + 20
+    elif design_mode == "band":
+        section = design_height + spacing
+    else:
+        section = 0
+
+    if target_strip_height:
+        available = target_strip_height - top - bottom - section - spacing * (num_photos - 1)
+        if available <= 0:
+            photo_height = base_photo_height
+            strip_height = top + base_photo_height * num_photos + spacing * (num_photos - 1) + section + bottom
+        else:
+            photo_height = int(available / num_photos)
+            strip_height = target_strip_height
+    else:
+        photo_height = base_photo_height
+        strip_height = top + photo_height * num_photos + spacing * (num_photos - 1) + section + bottom
+
+    y = top
+    band = None
+    if design_mode == "band" and design_position == "top":
+        band = (0, y, strip_width, design_height)
+        y += design_height + spacing
+
+    box_width = strip_width - 50
+    crop = (box_width, photo_height)
+    if aspect_value is not None and photo_height > 0:
+        eff_height = photo_height
+        eff_width = int(eff_height * aspect_value)
+        if eff_width > box_width:
+            eff_width = box_width
+            eff_height = int(eff_width / aspect_value)
+        crop = (max(1, eff_width), max(1, eff_height))
+
+    positions = []
+    for _ in range(num_photos):
+        positions.append(((strip_width - crop[0]) // 2, y))
+        y += photo_height + spacing
+    if design_mode == "band" and design_position == "bottom":
+        band = (0, y, strip_width, design_height)
+    return (strip_width, strip_height), crop, tuple(positions), band, footer_height
+
+
+LAYOUTS = [LAYOUT_VERTICAL_3, LAYOUT_VERTICAL_4, LAYOUT_VERTICAL_6, LAYOUT_GRID_2X2, None]
+
+
+@pytest.mark.parametrize(
+    "layout, design_mode, design_position, photo_spacing, aspect",
+    list(itertools.product(LAYOUTS, ["none", "band", "footer"], ["top", "bottom"], [None, 0, 40], ["auto", "1:1", "3:4"])),
+)
+def test_plan_matches_legacy_geometry(layout, design_mode, design_position, photo_spacing, aspect):
+    num_photos = get_layout_photo_count(layout) if layout else 3
+    plan = compile_layout_plan(
+        num_photos,
+        layout=layout,
+        design_position=design_position,
+        photo_spacing=photo_spacing,
+        overlay_mode="footer" if design_mode == "footer" else "free",
+        photo_aspect_ratio=aspect,
+        design_size=None if design_mode == "none" else DESIGN_SIZE,
+    )
+    canvas, crop, positions, band, footer_height = _legacy_geometry(
+        num_photos, layout, design_mode, design_position, photo_spacing, aspect
+    )
+
+    assert plan.canvas_size == canvas
+    assert plan.crop_size == crop
+    assert plan.photo_positions == positions
+    if design_mode == "band":
+        assert (plan.overlay_box, plan.overlay_fit) == (band, "band")
+    elif design_mode == "footer":
+        left, top, width, height = plan.overlay_box
+        footer_top = canvas[1] - 30 - footer_height
+        assert footer_top <= top and top + height <= footer_top + footer_height
+        assert 0 <= left and left + width <= canvas[0]
+    else:
+        assert plan.overlay_box is None
+
+
+@pytest.mark.parametrize("layout", [LAYOUT_VERTICAL_3, LAYOUT_VERTICAL_4, LAYOUT_VERTICAL_6])
+def test_free_overlay_stays_on_canvas(layout):
+    num_photos = get_layout_photo_count(layout)
+    for scale, offset_x, offset_y in [(0.5, 0.0, 0.0), (1.0, 1.0, 1.0), (0.3, 0.5, None)]:
+        plan = compile_layout_plan(
+            num_photos, layout=layout, design_scale=scale, design_offset_x=offset_x,
+            design_offset_y=offset_y, design_size=DESIGN_SIZE,
+        )
+        left, top, width, height = plan.overlay_box
+        assert plan.overlay_fit == "fit"
+        assert 0 <= left and left + width <= plan.canvas_size[0]
+        assert 0 <= top and top + height <= plan.canvas_size[1]
+
+    stretched = compile_layout_plan(num_photos, layout=layout, design_stretch=True, design_size=DESIGN_SIZE)
+    assert stretched.overlay_box == (0, 0, *stretched.canvas_size)
+
+
+def test_plan_is_memoized_and_validates_count():
+    assert compile_layout_plan(3, layout=LAYOUT_VERTICAL_3) is compile_layout_plan(3, layout=LAYOUT_VERTICAL_3)
+    assert compile_layout_plan(3, background_color="#c60c0c").background_color == (198, 12, 12)
+    with pytest.raises(ValueError):
+        compile_layout_plan(7)
+
+
+@pytest.mark.parametrize("layout", [LAYOUT_VERTICAL_3, LAYOUT_VERTICAL_4, LAYOUT_VERTICAL_6])
+def test_scaled_keeps_proportions(layout):
+    plan = compile_layout_plan(get_layout_photo_count(layout), layout=layout, design_size=DESIGN_SIZE)
+    half = plan.scaled(0.5)
+
+    assert plan.scaled(1.0) is plan
+    assert half.canvas_size == (round(plan.canvas_size[0] / 2), round(plan.canvas_size[1] / 2))
+    assert half.crop_size == (round(plan.crop_size[0] / 2), round(plan.crop_size[1] / 2))
+    for (x, y), (hx, hy) in zip(plan.photo_positions, half.photo_positions):
+        assert (hx, hy) == (round(x / 2), round(y / 2))
+    assert half.overlay_box[2] == round(plan.overlay_box[2] / 2)
+
+
+@pytest.mark.parametrize("layout", [LAYOUT_VERTICAL_3, LAYOUT_VERTICAL_4, LAYOUT_VERTICAL_6])
+@pytest.mark.parametrize("paper_size, dpi, strips", [("4x6", 300, 2), ("2x6", 600, 1), ("4x6", 300, 1)])
+def test_fitted_to_print_target(layout, paper_size, dpi, strips):
+    plan = compile_layout_plan(get_layout_photo_count(layout), layout=layout, design_size=DESIGN_SIZE)
+    target = print_target_size(paper_size, dpi, strips)
+    fitted = plan.fitted(target)
+
+    assert fitted.canvas_size == target
+    assert plan.fitted(plan.canvas_size) is plan
+    factor = min(target[0] / plan.canvas_size[0], target[1] / plan.canvas_size[1])
+    offset_x = (target[0] - round(plan.canvas_size[0] * factor)) // 2
+    offset_y = (target[1] - round(plan.canvas_size[1] * factor)) // 2
+    assert offset_x == 0 or offset_y == 0
+    for rect in (*fitted.photo_rects, fitted.overlay_box):
+        left, top, width, height = rect
+        assert 0 <= left and left + width <= target[0]
+        assert 0 <= top and top + height <= target[1]
+    (first_x, first_y), (orig_x, orig_y) = fitted.photo_positions[0], plan.photo_positions[0]
+    assert first_x == round(orig_x * factor) + offset_x
+    assert first_y == round(orig_y * factor) + offset_y
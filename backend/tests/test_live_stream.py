@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.services.capture_daemon import CaptureDaemon
+from app.services.live_stream import BOUNDARY, LiveStreamHub
+from tests.conftest import make_jpeg
+
+
+class FakeDaemon:
+    """Entrega frames en orden: un JPEG corrupto y luego frames válidos."""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.start_threads = []
+        self.ts = 0.0
+
+    def start(self, camera_id=0, idle_timeout_s=None):
+        self.start_threads.append(threading.current_thread())
+        return True
+
+    def wait_next_frame(self, after_ts, timeout=1.0):
+        time.sleep(0.01)
+        self.ts += 1.0
+        frame = self.frames.pop(0) if len(self.frames) > 1 else self.frames[0]
+        return self.ts, frame
+
+
+def _patch_daemon(monkeypatch, fake):
+    monkeypatch.setattr(CaptureDaemon, "start", fake.start)
+    monkeypatch.setattr(CaptureDaemon, "wait_next_frame", fake.wait_next_frame)
+    monkeypatch.setattr(CaptureDaemon, "touch", lambda: None)
+    monkeypatch.setattr(CaptureDaemon, "is_running", lambda camera_id=None: True)
+
+
+def _first_part(camera_id=0) -> bytes:
+    async def run():
+        stream = LiveStreamHub.stream(camera_id)
+        try:
+            return await asyncio.wait_for(stream.__anext__(), timeout=5.0)
+        finally:
+            await stream.aclose()
+
+    return asyncio.run(run())
+
+
+def _wait_encoder_stopped():
+    deadline = time.monotonic() + 5.0
+    while LiveStreamHub._encoder is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return LiveStreamHub._encoder is None
+
+
+def test_corrupt_frame_is_skipped(monkeypatch):
+    corrupt = np.frombuffer(b"\xff\xd8" + b"\x00" * 64, dtype=np.uint8)
+    good = np.frombuffer(make_jpeg(320, 240), dtype=np.uint8)
+    fake = FakeDaemon([corrupt, corrupt, good])
+    _patch_daemon(monkeypatch, fake)
+
+    part = _first_part()
+
+    assert part.startswith(f"--{BOUNDARY}\r\nContent-Type: image/jpeg".encode("ascii"))
+    assert part[part.index(b"\r\n\r\n") + 4:].startswith(b"\xff\xd8")
+    assert all(thread is not threading.main_thread() for thread in fake.start_threads)
+    assert _wait_encoder_stopped()
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_encoder_cleared_when_thread_dies(monkeypatch):
+    fake = FakeDaemon([np.zeros((48, 64, 3), dtype=np.uint8)])
+    _patch_daemon(monkeypatch, fake)
+
+    def boom(after_ts, timeout=1.0):
+        raise RuntimeError("daemon caído")
+
+    monkeypatch.setattr(CaptureDaemon, "wait_next_frame", boom)
+    LiveStreamHub._subscribers.add((None, None))
+    try:
+        LiveStreamHub._ensure_encoder()
+        assert _wait_encoder_stopped()
+    finally:
+        LiveStreamHub._subscribers.discard((None, None))
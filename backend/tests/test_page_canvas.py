@@ -0,0 +1,66 @@
+import uuid
+
+import pytest
+from PIL import Image, ImageChops
+
+from app.config import IMAGE_CONFIG
+from app.services import page_canvas
+from app.services.compose_executor import ComposeExecutor
+from app.services.image_service import ImageService
+from app.services.page_canvas import new_canvas
+
+
+@pytest.fixture
+def mapped_threshold(monkeypatch):
+    def set_threshold(pixels: int) -> None:
+        monkeypatch.setitem(IMAGE_CONFIG, "mapped_canvas_min_pixels", pixels)
+
+    return set_threshold
+
+
+def _draw(canvas: Image.Image) -> Image.Image:
+    canvas.paste(Image.new("RGB", (40, 30), (200, 10, 90)), (5, 7))
+    canvas.paste((0, 128, 255), (50, 40, 90, 60))
+    return canvas.convert("RGB")
+
+
+def test_mapped_canvas_matches_in_memory_canvas(mapped_threshold):
+    mapped_threshold(10**9)
+    in_memory = new_canvas((120, 80), "#fafafa")
+    mapped_threshold(0)
+    mapped = new_canvas((120, 80), "#fafafa")
+
+    assert in_memory.mode == "RGB"
+    assert mapped.mode == "RGBX"
+    assert ImageChops.difference(_draw(in_memory), _draw(mapped)).getbbox() is None
+
+
+def test_compose_strip_mapped_vs_unmapped_pixel_parity(monkeypatch, mapped_threshold, session_store, tmp_path):
+    monkeypatch.setattr(ComposeExecutor, "WORKERS", 0)
+    photos = []
+    for index in range(3):
+        path = tmp_path / f"shot-{index + 1}.jpg"
+        Image.new("RGB", (320, 240), (30 + index * 80, 90, 220 - index * 60)).save(path, quality=95)
+        photos.append(path)
+
+    strips = []
+    for threshold in (10**9, 0):
+        mapped_threshold(threshold)
+        strip_path = ImageService.compose_strip(photos, session_id=f"canvas-{uuid.uuid4().hex[:8]}", layout="3x1-vertical")
+        with Image.open(strip_path) as strip:
+            strips.append(strip.convert("RGB"))
+
+    assert strips[0].size == strips[1].size
+    assert ImageChops.difference(*strips).getbbox() is None
+
+
+def test_falls_back_to_memory_when_pil_copies_the_mapping(monkeypatch, mapped_threshold):
+    mapped_threshold(0)
+    frombuffer = Image.frombuffer
+    # Simula un PIL que ignora ``readonly`` y escribe sobre una copia
+    monkeypatch.setattr(page_canvas.Image, "frombuffer", lambda *args: frombuffer(*args).copy())
+
+    canvas = new_canvas((64, 48), (10, 20, 30))
+
+    assert canvas.mode == "RGB"
+    assert canvas.getpixel((0, 0)) == (10, 20, 30)
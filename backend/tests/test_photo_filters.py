@@ -0,0 +1,54 @@
+import pytest
+from PIL import Image, ImageChops, ImageEnhance, ImageOps
+
+from app.services.photo_filters import PHOTO_FILTERS, get_photo_filter
+
+
+def _legacy_filter(photo: Image.Image, name: str) -> Image.Image:
+    """Filtros como se aplicaban antes (ImageOps / ImageEnhance encadenados)."""
+    base = photo.convert("RGB")
+    if name == "bw":
+        return ImageOps.grayscale(base).convert("RGB")
+    if name == "sepia":
+        return ImageOps.colorize(ImageOps.grayscale(base), "#2b1b0f", "#f5e0c7").convert("RGB")
+    glam = ImageEnhance.Brightness(base).enhance(1.08)
+    glam = ImageEnhance.Contrast(glam).enhance(1.12)
+    return ImageEnhance.Color(glam).enhance(1.2)
+
+
+@pytest.fixture
+def photo():
+    """Degradado de tonos medios (sin saturar: el legacy recorta en cada paso)."""
+    image = Image.new("RGB", (96, 64))
+    image.putdata([
+        (60 + x, 50 + y + x // 3, 140 - x // 2)
+        for y in range(64)
+        for x in range(96)
+    ])
+    return image
+
+
+@pytest.mark.parametrize("name, tolerance", [("bw", 1), ("sepia", 2), ("glam", 3)])
+def test_compiled_filter_matches_legacy_chain(photo, name, tolerance):
+    result = PHOTO_FILTERS[name].apply(photo)
+
+    assert result.mode == "RGB" and result.size == photo.size
+    diff = ImageChops.difference(result, _legacy_filter(photo, name))
+    assert max(high for _, high in diff.getextrema()) <= tolerance
+
+
+def test_apply_returns_new_image_and_accepts_other_modes(photo):
+    rgba = photo.convert("RGBA")
+
+    result = PHOTO_FILTERS["sepia"].apply(rgba)
+
+    assert result is not rgba
+    assert result.mode == "RGB"
+    assert rgba.mode == "RGBA"
+
+
+def test_get_photo_filter_normalizes_names():
+    assert get_photo_filter(" BW ") is PHOTO_FILTERS["bw"]
+    assert get_photo_filter("none") is None
+    assert get_photo_filter(None) is None
+    assert get_photo_filter("vintage") is None
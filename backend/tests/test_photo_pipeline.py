@@ -0,0 +1,119 @@
+import threading
+import uuid
+
+import pytest
+
+from app.services.camera_service import CameraService
+from tests.conftest import make_jpeg
+
+
+@pytest.fixture
+def session_id() -> str:
+    return f"test-{uuid.uuid4().hex[:8]}"
+
+
+def test_failed_registration_does_not_reuse_index(pipeline, session_store, session_id, monkeypatch):
+    original_append = session_store.append_photos
+    calls = []
+
+    def flaky_append(sid, photos):
+        calls.append(sid)
+        if len(calls) == 1:
+            raise RuntimeError("disco lleno")
+        return original_append(sid, photos)
+
+    monkeypatch.setattr(session_store, "append_photos", flaky_append)
+
+    first = make_jpeg(color=(255, 0, 0))
+    _, first_path = CameraService.save_uploaded_bytes(first, session_id=session_id)
+    assert pipeline.flush(session_id, timeout=5.0)
+    _, second_path = CameraService.save_uploaded_bytes(make_jpeg(color=(0, 0, 255)), session_id=session_id)
+    assert pipeline.flush(session_id, timeout=5.0)
+
+    assert first_path.name == "shot-1.jpg"
+    assert second_path.name == "shot-2.jpg"
+    assert first_path.read_bytes() == first
+    assert pipeline.stats()["failed"] >= 1
+
+
+def test_index_seeded_from_disk_after_restart(pipeline, photos_dir, session_id):
+    session_dir = photos_dir / session_id
+    session_dir.mkdir(parents=True)
+    for index in (1, 2, 5):
+        (session_dir / f"shot-{index}.jpg").write_bytes(make_jpeg())
+    (session_dir / "thumb-9.jpg").write_bytes(b"")
+
+    assert pipeline.reserve_indices(session_id, 2) == [6, 7]
+    pipeline.cancel(session_id, [6, 7])
+    # La marca no retrocede aunque ya no haya pendientes
+    assert pipeline.reserve_indices(session_id) == [8]
+    pipeline.cancel(session_id, [8])
+
+
+def test_concurrent_reservations_are_unique(pipeline, session_id):
+    results = []
+
+    def reserve():
+        results.extend(pipeline.reserve_indices(session_id, 3))
+
+    threads = [threading.Thread(target=reserve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == list(range(1, 25))
+    pipeline.cancel(session_id, results)
+    assert pipeline.flush(session_id, timeout=0)
+
+
+def test_photos_listed_in_index_order(pipeline, session_store, photos_dir, session_id):
+    first, second = pipeline.reserve_indices(session_id, 2)
+    session_dir = photos_dir / session_id
+    paths = {index: pipeline.write_original(session_dir / f"shot-{index}.jpg", make_jpeg()) for index in (first, second)}
+
+    # El shot 2 llega al writer antes que el 1
+    pipeline.submit(session_id, [(second, paths[second], None)])
+    pipeline.submit(session_id, [(first, paths[first], None)])
+    assert pipeline.flush(session_id, timeout=5.0)
+
+    photos = session_store.get_session(session_id).photos
+    assert [photo.filename for photo in photos] == ["shot-1.jpg", "shot-2.jpg"]
+    assert [photo.photo_index for photo in photos] == [1, 2]
+    assert (session_dir / "thumb-1.jpg").exists()
+
+
+def test_dead_writer_restarts_on_its_queue(pipeline, photos_dir, session_id, monkeypatch):
+    monkeypatch.setattr(pipeline, "WORKERS", 1)
+    pipeline._ensure_started()
+    tasks = pipeline._queues[0]
+    # Detener el writer deja su cola viva, como si el hilo hubiera muerto
+    tasks.put(None)
+    pipeline._threads[0].join(timeout=5.0)
+    assert not pipeline._threads[0].is_alive()
+
+    indices = pipeline.reserve_indices(session_id, 2)
+    session_dir = photos_dir / session_id
+    queued = [(index, pipeline.write_original(session_dir / f"shot-{index}.jpg", make_jpeg()), None) for index in indices]
+    tasks.put((session_id, queued[:1]))
+    pipeline.submit(session_id, queued[1:])
+
+    assert pipeline.flush(session_id, timeout=5.0)
+    assert pipeline._queues[0] is tasks
+    assert pipeline._threads[0].is_alive()
+
+
+def test_claim_index_rejects_written_or_in_flight(pipeline, photos_dir, session_id):
+    session_dir = photos_dir / session_id
+    session_dir.mkdir(parents=True)
+    (session_dir / "shot-1.jpg").write_bytes(make_jpeg())
+
+    with pytest.raises(ValueError):
+        pipeline.claim_index(session_id, 1)
+    pipeline.claim_index(session_id, 3)
+    with pytest.raises(ValueError):
+        pipeline.claim_index(session_id, 3)
+    # Los índices automáticos siguen después del mayor reclamado
+    assert pipeline.reserve_indices(session_id) == [4]
+    pipeline.cancel(session_id, [3, 4])
+    assert pipeline.flush(session_id, timeout=0)
@@ -0,0 +1,166 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image, ImageWin
+
+from app.services.layout_plan import print_target_size
+from app.services.print_service import (
+    HORZRES,
+    LOGPIXELSX,
+    LOGPIXELSY,
+    PHYSICALOFFSETX,
+    PHYSICALOFFSETY,
+    VERTRES,
+    PrintService,
+)
+
+
+@pytest.mark.parametrize(
+    "paper_size, dpi, strips, expected",
+    [
+        ("4x6", 300, 1, (1200, 1800)),
+        ("4x6", 300, 2, (600, 1800)),
+        ("2x6", 300, 1, (600, 1800)),
+        ("5x7", 600, 1, (3000, 4200)),
+        ("unknown", 300, 1, (1200, 1800)),
+    ],
+)
+def test_print_target_size(paper_size, dpi, strips, expected):
+    assert print_target_size(paper_size, dpi, strips) == expected
+
+
+def test_native_resolution_only_for_exact_page(tmp_path):
+    exact = tmp_path / "exact.jpg"
+    Image.new("RGB", (1200, 1800)).save(exact)
+    scaled = tmp_path / "scaled.jpg"
+    Image.new("RGB", (1000, 1500)).save(scaled)
+
+    assert PrintService.native_resolution_dpi(exact, "4x6", 300) == 300
+    assert PrintService.native_resolution_dpi(scaled, "4x6", 300) is None
+    assert PrintService.native_resolution_dpi(tmp_path / "missing.jpg", "4x6", 300) is None
+
+
+def _caps(dpi, offset=(25, 30), printable=(1150, 1740)):
+    values = {
+        LOGPIXELSX: dpi,
+        LOGPIXELSY: dpi,
+        PHYSICALOFFSETX: offset[0],
+        PHYSICALOFFSETY: offset[1],
+        HORZRES: printable[0],
+        VERTRES: printable[1],
+    }
+    return values.__getitem__
+
+
+def test_windows_draws_native_size_from_physical_origin():
+    rect = PrintService._windows_draw_rect(_caps(300), (1200, 1800), native_dpi=300)
+
+    assert rect == (-25, -30, 1175, 1770)
+
+
+def test_windows_scales_when_driver_keeps_other_dpi():
+    rect = PrintService._windows_draw_rect(_caps(600, printable=(2300, 3480)), (1200, 1800), native_dpi=300)
+
+    # Escalado al área imprimible, centrado y sin deformar
+    x0, y0, x1, y1 = rect
+    assert (x1 - x0) / (y1 - y0) == pytest.approx(1200 / 1800, rel=1e-3)
+    assert x1 - x0 <= 2300 and y1 - y0 <= 3480
+    assert PrintService._windows_draw_rect(_caps(300), (1200, 1800), native_dpi=None)[0] >= 0
+
+
+# Flags de DEVMODE.Fields (wingdi.h)
+DM_PAPERLENGTH = 0x4
+DM_PAPERWIDTH = 0x8
+DM_PRINTQUALITY = 0x400
+DM_YRESOLUTION = 0x2000
+
+
+class _FakePrinterDC:
+    """DC de impresora que solo aplica los campos del DEVMODE marcados en Fields."""
+
+    def __init__(self, driver_dpi=600):
+        self.dpi = driver_dpi
+        self.devmode = SimpleNamespace(Fields=0, PaperWidth=0, PaperLength=0, PrintQuality=driver_dpi, YResolution=driver_dpi)
+        self.pages = 0
+
+    def CreatePrinterDC(self, name):
+        self.printer = name
+
+    def GetDevMode(self):
+        return self.devmode
+
+    def ResetDC(self, devmode):
+        if devmode.Fields & DM_PRINTQUALITY and devmode.Fields & DM_YRESOLUTION:
+            self.dpi = devmode.PrintQuality
+
+    def GetDeviceCaps(self, index):
+        return _caps(self.dpi, printable=(self.dpi * 4 - 50, self.dpi * 6 - 60))(index)
+
+    def StartDoc(self, name):
+        pass
+
+    def StartPage(self):
+        pass
+
+    def EndPage(self):
+        self.pages += 1
+
+    def EndDoc(self):
+        pass
+
+    def DeleteDC(self):
+        pass
+
+    def GetHandleOutput(self):
+        return "hdc"
+
+
+@pytest.fixture
+def fake_win32(monkeypatch):
+    dc = _FakePrinterDC()
+    draws = []
+
+    class FakeDib:
+        def __init__(self, image):
+            self.size = image.size
+
+        def draw(self, handle, rect):
+            draws.append((self.size, rect))
+
+    monkeypatch.setitem(sys.modules, "win32con", SimpleNamespace(
+        DM_PAPERLENGTH=DM_PAPERLENGTH,
+        DM_PAPERWIDTH=DM_PAPERWIDTH,
+        DM_PRINTQUALITY=DM_PRINTQUALITY,
+        DM_YRESOLUTION=DM_YRESOLUTION,
+    ))
+    monkeypatch.setitem(sys.modules, "win32print", SimpleNamespace(
+        GetDefaultPrinter=lambda: "DNP DS-RX1",
+        OpenPrinter=lambda name: name,
+        ClosePrinter=lambda handle: None,
+    ))
+    monkeypatch.setitem(sys.modules, "win32ui", SimpleNamespace(CreateDC=lambda: dc))
+    monkeypatch.setattr(ImageWin, "Dib", FakeDib)
+    return SimpleNamespace(dc=dc, draws=draws)
+
+
+def test_print_windows_sends_print_target_raster_at_native_size(fake_win32, tmp_path):
+    raster = tmp_path / "strip.jpg"
+    Image.new("RGB", (1200, 1800)).save(raster)
+
+    assert PrintService._print_windows(raster, None, 2, (1016, 1524), native_dpi=300) is True
+
+    devmode = fake_win32.dc.devmode
+    assert devmode.Fields & (DM_PAPERWIDTH | DM_PAPERLENGTH | DM_PRINTQUALITY | DM_YRESOLUTION) == (
+        DM_PAPERWIDTH | DM_PAPERLENGTH | DM_PRINTQUALITY | DM_YRESOLUTION
+    )
+    assert (devmode.PaperWidth, devmode.PaperLength) == (1016, 1524)
+    assert fake_win32.dc.pages == 2
+    # 1:1 desde el origen físico de la hoja, sin stretch
+    assert fake_win32.draws == [((1200, 1800), (-25, -30, 1175, 1770))] * 2
+
+
+def test_print_windows_without_pywin32_returns_false(monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "win32con", None)
+
+    assert PrintService._print_windows(tmp_path / "strip.jpg", None, 1, (1016, 1524)) is False
@@ -0,0 +1,136 @@
+import json
+import sqlite3
+import threading
+
+from app.schemas.session import SessionPhoto, SessionPrintJob, SessionRecord
+
+
+def _photo(name: str) -> SessionPhoto:
+    return SessionPhoto(filename=name, path=f"/data/photos/s/{name}", url=f"/data/photos/s/{name}")
+
+
+def _write_legacy(store, records):
+    store.SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    payload = {record.session_id: record.model_dump() for record in records}
+    store.LEGACY_JSON_FILE.write_text(json.dumps(payload), encoding="utf-8")
+
+
+def test_migrates_legacy_json_once(session_store):
+    legacy = [
+        SessionRecord(session_id="a", preset_id="p1", photos=[_photo("shot-1.jpg")], created_at="2025-01-01T10:00:00"),
+        SessionRecord(
+            session_id="b",
+            status="printed",
+            print_jobs=[SessionPrintJob(job_id="j1", printer_name="P", status="sent")],
+            created_at="2025-01-02T10:00:00",
+        ),
+    ]
+    _write_legacy(session_store, legacy)
+
+    assert [record.session_id for record in session_store.get_all_sessions()] == ["b", "a"]
+    for record in legacy:
+        assert session_store.get_session(record.session_id) == record
+    assert not session_store.LEGACY_JSON_FILE.exists()
+    assert session_store.LEGACY_JSON_FILE.with_name("sessions.json.migrated").exists()
+
+
+def test_failed_migration_is_retried_after_new_sessions(session_store):
+    session_store.SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    session_store.LEGACY_JSON_FILE.write_text("{ not json", encoding="utf-8")
+
+    # El store abre igual y acepta sesiones nuevas
+    session_store.append_photos("new", [_photo("shot-1.jpg")])
+    assert session_store.LEGACY_JSON_FILE.exists()
+
+    # Se corrige el archivo y el próximo inicio lo importa aunque ya haya filas
+    _write_legacy(session_store, [SessionRecord(session_id="old", notes="legacy")])
+    session_store._initialized_file = None
+    session_store._local.conn = None
+
+    assert session_store.get_session("old").notes == "legacy"
+    assert len(session_store.get_session("new").photos) == 1
+    assert not session_store.LEGACY_JSON_FILE.exists()
+
+
+def test_create_or_update_only_writes_supplied_fields(session_store):
+    session_store.create_or_update("s", preset_id="p1")
+    session_store.set_strip("s", "/data/photos/s/strip.jpg")
+
+    record = session_store.create_or_update("s", notes="hola")
+
+    assert record.status == "composed"
+    assert record.strip_path == "/data/photos/s/strip.jpg"
+    assert record.preset_id == "p1"
+    assert record.notes == "hola"
+
+
+def test_append_and_print_jobs(session_store):
+    session_store.append_photos("s", [_photo("shot-1.jpg"), _photo("shot-2.jpg")])
+    record = session_store.add_print_job("s", SessionPrintJob(job_id="j", printer_name="P", status="sent"))
+
+    assert [photo.filename for photo in record.photos] == ["shot-1.jpg", "shot-2.jpg"]
+    assert record.status == "printed"
+    assert len(record.print_jobs) == 1
+
+
+def test_list_sessions_filters_in_sql(session_store):
+    for index in range(5):
+        session_store.create_or_update(
+            f"s{index}",
+            preset_id="even" if index % 2 == 0 else "odd",
+            created_at=f"2025-01-0{index + 1}T00:00:00",
+        )
+
+    records, total = session_store.list_sessions(preset_id="even", limit=2)
+
+    assert total == 3
+    assert [record.session_id for record in records] == ["s4", "s2"]
+
+
+def test_delete_cascades_children(session_store):
+    session_store.append_photos("s", [_photo("shot-1.jpg")])
+    session_store.add_print_job("s", SessionPrintJob(job_id="j", printer_name="P"))
+
+    assert session_store.delete_session("s") is True
+    assert session_store.delete_session("s") is False
+
+    conn = sqlite3.connect(session_store.DB_FILE)
+    assert conn.execute("SELECT COUNT(*) FROM photos").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM print_jobs").fetchone()[0] == 0
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_concurrent_appends_from_threads(session_store):
+    def append(worker: int) -> None:
+        for index in range(20):
+            session_store.append_photo("s", _photo(f"{worker}-{index}.jpg"))
+
+    threads = [threading.Thread(target=append, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(session_store.get_session("s").photos) == 80
+
+
+def test_upgrades_photos_table_without_photo_index(session_store):
+    session_store.SESSIONS_DIR.mkdir(parents=True)
+    conn = sqlite3.connect(session_store.DB_FILE)
+    conn.executescript(
+        """
+        CREATE TABLE sessions (session_id TEXT PRIMARY KEY, preset_id TEXT, preset_name TEXT,
+            template_id TEXT, template_layout TEXT, status TEXT NOT NULL DEFAULT 'capturing',
+            strip_path TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL, notes TEXT);
+        CREATE TABLE photos (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL,
+            filename TEXT NOT NULL, path TEXT NOT NULL, url TEXT NOT NULL, thumbnail_url TEXT,
+            captured_at TEXT NOT NULL);
+        INSERT INTO sessions VALUES ('s', NULL, NULL, NULL, NULL, 'capturing', NULL, 'x', 'x', NULL);
+        INSERT INTO photos (session_id, filename, path, url, captured_at) VALUES ('s', 'shot-1.jpg', 'p', 'u', 'x');
+        """
+    )
+    conn.close()
+
+    record = session_store.append_photo("s", _photo("shot-2.jpg").model_copy(update={"photo_index": 2}))
+
+    assert [(photo.filename, photo.photo_index) for photo in record.photos] == [("shot-1.jpg", None), ("shot-2.jpg", 2)]
@@ -283,10 +283,18 @@ export default function TemplateDialog({
       if (designPreviewUrl && designPreviewUrl.startsWith('blob:')) {
         URL.revokeObjectURL(designPreviewUrl);
       }
-      // stripPreviewUrl usually comes from backend (base64 or url), but if it was a blob we'd clean it too
     };
   }, [designPreviewUrl]);
 
+  // El preview del strip llega inline como blob: liberar el anterior al reemplazarlo
+  useEffect(() => {
+    return () => {
+      if (stripPreviewUrl && stripPreviewUrl.startsWith('blob:')) {
+        URL.revokeObjectURL(stripPreviewUrl);
+      }
+    };
+  }, [stripPreviewUrl]);
+
   // Generate live preview - Only when previewConfig changes (debounced)
   useEffect(() => {
     if (!open || !ENABLE_LIVE_PREVIEW) {
@@ -333,6 +341,8 @@ export default function TemplateDialog({
           overlay_mode: previewConfig.overlay_mode,
           design_stretch: previewConfig.design_stretch,
           photo_aspect_ratio: previewConfig.photo_aspect_ratio,
+          quality: 'draft',
+          inline: true,
         });
         setStripPreviewUrl(previewImage);
       } catch (error) {
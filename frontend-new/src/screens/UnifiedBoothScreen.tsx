@@ -166,6 +166,8 @@ export default function UnifiedBoothScreen() {
 
   const webcamRef = useRef<Webcam>(null);
   const escapeTimestampsRef = useRef<number[]>([]);
+  // Shots enviados por el canal de captura cuyo ack aún no llegó (en orden de envío)
+  const pendingShotsRef = useRef<Promise<void>[]>([]);
   const [fsm, dispatch] = useReducer(boothReducer, {
     mode: 'idle',
     countdown: countdownSeconds || 5,
@@ -242,44 +244,57 @@ export default function UnifiedBoothScreen() {
       }
 
       const blob = dataURLToBlob(imageSrc);
-
-      const response = await photoboothAPI.camera.upload({
-        file: blob,
-        session_id: sessionId || undefined,
-      });
-
-      console.log('✅ Foto capturada (renderer):', response);
-
-      if (!sessionId && response.session_id) {
-        setSessionId(response.session_id);
+      if (currentPhotoIndex === 0) {
+        pendingShotsRef.current = [];
       }
 
-      addPhotoPath(response.file_path);
+      // Pipelining: el shot se envía sin esperar el ack; el siguiente puede salir
+      // mientras el backend persiste este. Los acks llegan en orden de envío.
+      const shotNumber = currentPhotoIndex + 1;
+      const persisted = photoboothAPI.camera
+        .send({
+          file: blob,
+          session_id: sessionId || undefined,
+          shot_index: shotNumber,
+        })
+        .then(async (response) => {
+          console.log('✅ Foto capturada (renderer):', response);
+
+          if (!sessionId && response.session_id) {
+            setSessionId(response.session_id);
+          }
 
-      // Construir URL de la imagen real desde el backend
-      const imageUrl = `${API_BASE_URL}${response.file_path}`;
-      console.log('🖼️ URL de imagen:', imageUrl);
+          addPhotoPath(response.file_path);
 
-      // ⏳ Retry logic para esperar que backend termine de escribir el archivo
-      // Esto previene race condition donde <img> intenta cargar antes de que exista
-      await waitForImageReady(imageUrl);
+          // Construir URL de la imagen real desde el backend
+          const imageUrl = `${API_BASE_URL}${response.file_path}`;
+          await waitForImageReady(imageUrl);
 
-      setPhotoSlots((prev) => [...prev, imageUrl]);
+          addCapturedImage({
+            id: response.file_path.split('/').pop() || `img-${Date.now()}`,
+            url: imageUrl,
+            timestamp: new Date(),
+          });
+          addLog({ level: 'info', source: 'camera', message: `Foto ${shotNumber} guardada` });
+        });
+      // El error se reporta al esperar los shots pendientes (último shot)
+      persisted.catch((error) => console.error(`Error guardando foto ${shotNumber}:`, error));
+      pendingShotsRef.current.push(persisted);
 
-      addCapturedImage({
-        id: response.file_path.split('/').pop() || `img-${Date.now()}`,
-        url: imageUrl,
-        timestamp: new Date(),
-      });
+      // El slot muestra la captura local; el original ya viaja al backend
+      setPhotoSlots((prev) => [...prev, imageSrc]);
 
       incrementPhotoIndex();
-      addLog({ level: 'info', source: 'camera', message: `Foto ${currentPhotoIndex + 1} capturada` });
+      addLog({ level: 'info', source: 'camera', message: `Foto ${shotNumber} capturada` });
 
       const nextPhotoIndex = currentPhotoIndex + 1;
       const remainingPhotos = effectivePhotosToTake - nextPhotoIndex;
 
       // Si es la última foto, ir a REVIEW (carousel)
       if (nextPhotoIndex >= effectivePhotosToTake) {
+        // Review y composición necesitan todas las fotos persistidas
+        await Promise.all(pendingShotsRef.current);
+        pendingShotsRef.current = [];
         playSuccess();
         speak('¡Perfecto! Mira tus fotos.', { rate: 1.0, pitch: 1.1 });
         setTimeout(() => {
@@ -20,8 +20,13 @@ export interface BackendSettings {
   print_copies?: number;
   camera_width?: number;
   camera_height?: number;
+  camera_capture_mode?: 'decoded' | 'mjpeg';
   print_mode?: 'single' | 'dual-strip';
   paper_size?: '2x6' | '4x6' | '5x7';
+  render_target?: 'screen' | 'print';
+  printer_dpi?: number;
+  printer_icc_profiles?: Record<string, string>;
+  icc_rendering_intent?: 'perceptual' | 'relative_colorimetric' | 'saturation' | 'absolute_colorimetric';
   strip_layout?: 'vertical-3' | 'vertical-4' | 'vertical-6' | 'grid-2x2';
   photo_spacing?: number;
   photo_filter?: string | null;
@@ -122,6 +127,70 @@ apiClient.interceptors.response.use(
   }
 );
 
+// Canal WebSocket binario de capturas (backend: app/services/capture_channel.py).
+// Frame: [uint32 BE largo del header][header JSON][bytes JPEG]. El backend
+// responde un ack por shot, en el mismo orden en que se enviaron.
+interface CaptureChannelAck {
+  type: 'ack' | 'error';
+  shot_index: number | null;
+  session_id?: string;
+  file_path?: string;
+  detail?: string;
+}
+
+interface UploadResult {
+  success: boolean;
+  session_id: string;
+  file_path: string;
+}
+
+const CAPTURE_CHANNEL_URL = `${API_BASE_URL.replace(/^http/, 'ws')}/api/camera/ws`;
+let captureSocket: Promise<WebSocket> | null = null;
+const pendingShots: Array<{ resolve: (result: UploadResult) => void; reject: (error: Error) => void }> = [];
+// Serializa los envíos: el orden en el socket es el orden de llamada (y el de los acks)
+let captureSendChain: Promise<unknown> = Promise.resolve();
+
+const openCaptureChannel = (): Promise<WebSocket> => {
+  if (captureSocket) {
+    return captureSocket;
+  }
+
+  captureSocket = new Promise((resolve, reject) => {
+    const socket = new WebSocket(CAPTURE_CHANNEL_URL);
+    socket.binaryType = 'arraybuffer';
+    socket.onopen = () => resolve(socket);
+    socket.onmessage = (event) => {
+      const ack = JSON.parse(event.data as string) as CaptureChannelAck;
+      const pending = pendingShots.shift();
+      if (!pending) {
+        return;
+      }
+      if (ack.type === 'ack' && ack.session_id && ack.file_path) {
+        pending.resolve({ success: true, session_id: ack.session_id, file_path: ack.file_path });
+      } else {
+        pending.reject(new Error(ack.detail ?? 'Error en canal de captura'));
+      }
+    };
+    socket.onclose = () => {
+      captureSocket = null;
+      pendingShots.splice(0).forEach((pending) => pending.reject(new Error('Canal de captura cerrado')));
+      reject(new Error('No se pudo abrir el canal de captura'));
+    };
+  });
+
+  return captureSocket;
+};
+
+const encodeCaptureFrame = async (file: Blob, sessionId: string | null, shotIndex: number) => {
+  const header = new TextEncoder().encode(JSON.stringify({ session_id: sessionId, shot_index: shotIndex }));
+  const body = new Uint8Array(await file.arrayBuffer());
+  const frame = new Uint8Array(4 + header.length + body.length);
+  new DataView(frame.buffer).setUint32(0, header.length);
+  frame.set(header, 4);
+  frame.set(body, 4 + header.length);
+  return frame;
+};
+
 // API methods for photobooth backend
 export const photoboothAPI = {
   // Health check
@@ -171,6 +240,35 @@ export const photoboothAPI = {
 
       return response.data; // { success, session_id, file_path }
     },
+    // Envía la foto por el canal WebSocket (varios shots en vuelo, ack al
+    // persistir). No hace falta esperar el resultado para enviar el siguiente:
+    // los frames salen en orden de llamada y cada promesa se resuelve con su
+    // ack (FIFO). Si el canal no abre, usa el POST /upload de siempre.
+    send: (params: { file: Blob; session_id?: string; shot_index: number }): Promise<UploadResult> => {
+      const sent = captureSendChain.then(async () => {
+        let socket: WebSocket;
+        try {
+          socket = await openCaptureChannel();
+        } catch {
+          logEvent('warning', 'camera', 'Canal de captura no disponible; usando /api/camera/upload');
+          return { ack: photoboothAPI.camera.upload({ file: params.file, session_id: params.session_id }) };
+        }
+
+        const frame = await encodeCaptureFrame(params.file, params.session_id ?? null, params.shot_index);
+        const ack = new Promise<UploadResult>((resolve, reject) => {
+          if (socket.readyState !== WebSocket.OPEN) {
+            reject(new Error('Canal de captura cerrado'));
+            return;
+          }
+          pendingShots.push({ resolve, reject });
+          socket.send(frame);
+        });
+        // El ack se espera fuera de la cadena: solo el envío es secuencial
+        return { ack };
+      });
+      captureSendChain = sent.catch(() => undefined);
+      return sent.then(({ ack }) => ack);
+    },
     test: async (cameraId: number) => {
       const response = await apiClient.get(`/api/camera/test/${cameraId}`);
       return response.data;
@@ -293,6 +391,13 @@ export const photoboothAPI = {
       overlay_mode?: 'free' | 'footer' | null;
       design_stretch?: boolean;
       photo_aspect_ratio?: 'auto' | '1:1' | '3:4' | null;
+      // 'draft' = preview rápido a baja resolución (misma geometría)
+      quality?: 'print' | 'draft';
+      preview_scale?: number | null;
+      // inline = el backend devuelve los bytes; se retorna un blob: URL
+      // que el llamador debe liberar con URL.revokeObjectURL
+      inline?: boolean;
+      preview_format?: 'jpeg' | 'webp';
     }) => {
       // Siempre usamos multipart/form-data para alinearnos con la firma de FastAPI,
       // que combina Body opcional + campos Form/File.
@@ -344,6 +449,24 @@ export const photoboothAPI = {
       if (params.photo_aspect_ratio) {
         form.append('photo_aspect_ratio', params.photo_aspect_ratio);
       }
+      if (params.quality) {
+        form.append('quality', params.quality);
+      }
+      if (params.preview_scale !== undefined && params.preview_scale !== null) {
+        form.append('preview_scale', String(params.preview_scale));
+      }
+
+      if (params.inline) {
+        form.append('inline', 'true');
+        if (params.preview_format) {
+          form.append('preview_format', params.preview_format);
+        }
+        const inlineResponse = await imageProcessingClient.post<Blob>('/api/image/preview-strip', form, {
+          headers: { 'Content-Type': 'multipart/form-data' },
+          responseType: 'blob',
+        });
+        return URL.createObjectURL(inlineResponse.data);
+      }
 
       const response = await imageProcessingClient.post('/api/image/preview-strip', form, {
         headers: { 'Content-Type': 'multipart/form-data' },
@@ -440,6 +563,10 @@ export const photoboothAPI = {
       kiosk_mode?: boolean;
       print_mode?: 'single' | 'dual-strip';
       paper_size?: '2x6' | '4x6' | '5x7';
+      render_target?: 'screen' | 'print';
+      printer_dpi?: number;
+      printer_icc_profiles?: Record<string, string>;
+      icc_rendering_intent?: 'perceptual' | 'relative_colorimetric' | 'saturation' | 'absolute_colorimetric';
       strip_layout?: 'vertical-3' | 'vertical-4' | 'vertical-6' | 'grid-2x2';
       photo_spacing?: number;
       photo_filter?: string | null;
@@ -6,6 +6,9 @@ import type { LayoutType } from './template';
 
 export type PhotoFilter = 'none' | 'bw' | 'sepia' | 'glam';
 
+export type EncodeProfile = 'print' | 'screen' | 'preview' | 'archive';
+export type EncodeArtifact = 'strip' | 'full_strip' | 'preview' | 'draft_preview' | 'design';
+
 export interface EventPreset {
   id: string;
   name: string;
@@ -23,6 +26,7 @@ export interface EventPreset {
   voice_pitch: number;
   voice_volume: number;
   photo_filter?: PhotoFilter;
+  encode_profiles?: Partial<Record<EncodeArtifact, EncodeProfile>> | null;
   
   // Template/diseño asociado
   template_id?: string;